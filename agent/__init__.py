@@ -1,6 +1,6 @@
 """JJ Agent - Core planning and execution."""
 
-from .planner import Planner
+from .planner import Planner, PlanningError
 from .executor import Executor
 
-__all__ = ["Planner", "Executor"]
+__all__ = ["Planner", "PlanningError", "Executor"]
@@ -0,0 +1,228 @@
+"""Compact failure context for fix-planning prompts."""
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+from .tokens import estimate_tokens
+
+# Lines worth keeping from otherwise noisy command output
+_ERROR_LINE = re.compile(
+    r"error|exception|failed|failure|fatal|panic|assert|denied|not found"
+    r"|cannot|undefined|^E\s|^FAIL|^\s*File \"",
+    re.IGNORECASE,
+)
+_TRACEBACK_START = "Traceback (most recent call last):"
+
+# Result fields carrying bulk output
+_OUTPUT_FIELDS = ("stdout", "stderr", "output")
+
+# Longest string kept verbatim in args and results
+_MAX_STRING = 300
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()[:16]
+
+
+def _clip(text: str, limit: int = _MAX_STRING) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+def relevant_output(text: str, tail_lines: int) -> str:
+    """Keep tracebacks, error lines and the tail of command output."""
+    lines = text.splitlines()
+    if len(lines) <= tail_lines:
+        return text.strip()
+
+    keep = set(range(len(lines) - tail_lines, len(lines)))
+    seen_errors = set()
+    in_traceback = False
+    for i, line in enumerate(lines):
+        if line.startswith(_TRACEBACK_START):
+            in_traceback = True
+            keep.add(i)
+        elif in_traceback:
+            keep.add(i)
+            # The exception message is the first unindented line
+            if line and not line[0].isspace():
+                in_traceback = False
+        elif _ERROR_LINE.search(line) and line.strip() not in seen_errors:
+            # Repeated error lines are only worth reporting once
+            seen_errors.add(line.strip())
+            keep.add(i)
+
+    kept = []
+    previous = -1
+    for i in sorted(keep):
+        if i != previous + 1:
+            kept.append(f"... [{i - previous - 1} lines omitted]")
+        kept.append(lines[i])
+        previous = i
+    return "\n".join(kept).strip()
+
+
+class FailureContextBuilder:
+    """Builds a small, error-focused context for fix-plan requests.
+
+    File bodies are replaced by path + hash references, command output is
+    reduced to what explains the failure, identical errors are reported
+    once, and the whole context is kept under a token ceiling.
+    """
+
+    def __init__(self, max_tokens: int = 4000, tail_lines: int = 40):
+        self.max_tokens = max_tokens
+        self.tail_lines = tail_lines
+
+    def compact_args(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace file contents in tool args with references."""
+        compact: Dict[str, Any] = {}
+        for key, value in (args or {}).items():
+            if key == "content" and isinstance(value, str):
+                compact["content_sha256"] = _digest(value)
+                compact["content_chars"] = len(value)
+            elif key == "edits" and isinstance(value, list):
+                compact["edits"] = len(value)
+            elif isinstance(value, str):
+                compact[key] = _clip(value)
+            else:
+                compact[key] = value
+        return compact
+
+    def compact_result(self, result: Dict[str, Any], tail_lines: int) -> Dict[str, Any]:
+        """Reduce a tool result to the fields that explain its outcome."""
+        compact: Dict[str, Any] = {}
+        for key, value in (result or {}).items():
+            if key == "content" and isinstance(value, str):
+                compact["content_sha256"] = _digest(value)
+            elif key in _OUTPUT_FIELDS and isinstance(value, str):
+                if value.strip():
+                    compact[key] = relevant_output(value, tail_lines)
+            elif key == "error" and isinstance(value, str):
+                compact[key] = relevant_output(value, tail_lines)
+            elif isinstance(value, str):
+                compact[key] = _clip(value)
+            elif isinstance(value, (bool, int, float)) or value is None:
+                compact[key] = value
+        return compact
+
+    def _failures(
+        self, failures: List[Dict[str, Any]], tail_lines: int
+    ) -> List[Dict[str, Any]]:
+        """Compact failures, merging ones that failed the same way."""
+        merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for failure in failures:
+            result = self.compact_result(failure.get("result", {}), tail_lines)
+            signature = (
+                failure.get("tool", ""),
+                _digest(
+                    json.dumps(
+                        {k: result.get(k) for k in ("error", "stderr")},
+                        sort_keys=True,
+                    )
+                ),
+            )
+            if signature in merged:
+                merged[signature]["occurrences"] += 1
+                merged[signature]["steps"].append(
+                    self.compact_args(failure.get("args"))
+                )
+                continue
+            merged[signature] = {
+                "tool": failure.get("tool"),
+                "args": self.compact_args(failure.get("args")),
+                "error": result.pop("error", "Unknown"),
+                "result": result,
+                "occurrences": 1,
+                "steps": [],
+            }
+
+        compact = []
+        for entry in merged.values():
+            if not entry["steps"]:
+                del entry["steps"]
+            if entry["occurrences"] == 1:
+                del entry["occurrences"]
+            compact.append(entry)
+        return compact
+
+    def _history(self, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Summarize recent actions without their output."""
+        return [
+            {
+                "tool": item.get("tool"),
+                "args": self.compact_args(item.get("args")),
+                "success": item.get("result", {}).get("success", False),
+            }
+            for item in history
+        ]
+
+    def build(
+        self, failures: List[Dict[str, Any]], history: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """Return the compact context and token savings statistics."""
+        original = {
+            "failures": [
+                {
+                    "tool": f["tool"],
+                    "args": f["args"],
+                    "error": f["result"].get("error", "Unknown"),
+                }
+                for f in failures
+            ],
+            "history": history,
+        }
+        original_tokens = estimate_tokens(json.dumps(original, indent=2, default=str))
+
+        tail_lines = self.tail_lines
+        history_items = list(history)
+        while True:
+            context = {
+                "failures": self._failures(failures, tail_lines),
+                "history": self._history(history_items),
+            }
+            tokens = estimate_tokens(json.dumps(context, default=str))
+            if tokens <= self.max_tokens:
+                break
+            # Shed the least useful information first: old history, then
+            # output tail length
+            if history_items:
+                history_items = history_items[len(history_items) // 2 + 1 :]
+            elif tail_lines > 5:
+                tail_lines //= 2
+            else:
+                context = self._truncate(context)
+                tokens = estimate_tokens(json.dumps(context, default=str))
+                break
+
+        return context, {
+            "original_tokens": original_tokens,
+            "compact_tokens": tokens,
+            "saved_tokens": max(0, original_tokens - tokens),
+        }
+
+    def _truncate(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Last resort: keep as many failures as fit under the ceiling."""
+        kept: List[Dict[str, Any]] = []
+        budget = self.max_tokens
+        for failure in context["failures"]:
+            cost = estimate_tokens(json.dumps(failure, default=str))
+            if cost > budget:
+                failure = {
+                    "tool": failure["tool"],
+                    "args": failure["args"],
+                    "error": _clip(str(failure["error"]), budget * 2),
+                }
+                cost = estimate_tokens(json.dumps(failure, default=str))
+                if cost > budget:
+                    break
+            kept.append(failure)
+            budget -= cost
+        omitted = len(context["failures"]) - len(kept)
+        truncated: Dict[str, Any] = {"failures": kept, "history": []}
+        if omitted:
+            truncated["omitted_failures"] = omitted
+        return truncated
@@ -1,8 +1,12 @@
 """Executor that runs tool calls and manages execution loop."""
 
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterable, Awaitable, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import asyncio
+import functools
+import hashlib
 import sys
 import time
 
@@ -22,10 +26,21 @@ from tools import (  # noqa: E402
 # Import logging after path setup
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from jj_agent.logging import get_logger, AuditLogger  # noqa: E402
+from config import config  # noqa: E402
 from metrics import metrics  # noqa: E402
 from monitoring import monitoring  # noqa: E402
 import webbrowser  # noqa: E402
 
+from .context import FailureContextBuilder  # noqa: E402
+from .ledger import StepLedger, step_key, step_target  # noqa: E402
+from .memo import CACHEABLE_TOOLS, StepCache  # noqa: E402
+from .optimizer import PlanOptimizer  # noqa: E402
+from .prefetch import Prefetcher  # noqa: E402
+from .repomap import RepoMap  # noqa: E402
+from .router import ModelRouter  # noqa: E402
+from .scheduler import StepScheduler  # noqa: E402
+from runtime import Deadline, DeadlineExceeded, SandboxedRuntime  # noqa: E402
+
 
 class Executor:
     """Executes tool calls and manages the execution loop."""
@@ -38,12 +53,23 @@ class Executor:
         dry_run: bool = False,
         job_id: Optional[str] = None,
         state_dir: Optional[Path] = None,
+        max_parallel_steps: Optional[int] = None,
+        deadline: Optional[Deadline] = None,
+        router: Optional[ModelRouter] = None,
+        state_manager=None,
     ):
         self.workspace = Path(workspace).resolve()
         self.capabilities = capabilities
         self.llm_client = llm_client
         self.dry_run = dry_run
         self.job_id = job_id
+        # Run journal; steps are appended as they finish
+        self.state_manager = state_manager
+        self.max_parallel_steps = max_parallel_steps or config.max_parallel_steps
+        self.deadline = deadline or Deadline()
+        self.router = router or ModelRouter.from_config(
+            getattr(llm_client, "model", None)
+        )
 
         # Initialize logging
         log_file = (state_dir / job_id / "exec.log") if (state_dir and job_id) else None
@@ -54,103 +80,252 @@ class Executor:
             else None
         )
 
-        # Initialize tools
+        # Memoized results of expensive steps, shared across jobs
+        self.step_cache = (
+            StepCache(
+                state_dir / "cache" / "steps",
+                self.workspace,
+                max_bytes=config.step_cache_max_mb * 1024 * 1024,
+            )
+            if (state_dir and config.step_cache)
+            else None
+        )
+
+        # Compact workspace map for planner context, cached per workspace
+        self.repo_map = None
+        if config.repo_map:
+            cache_path = None
+            if state_dir:
+                digest = hashlib.sha256(str(self.workspace).encode()).hexdigest()
+                cache_path = state_dir / "cache" / "repomap" / f"{digest[:16]}.json"
+            self.repo_map = RepoMap(self.workspace, cache_path=cache_path)
+
+        # Initialize tools; subprocess-backed tools share one shell so the
+        # job deadline applies to every command
         self.fs = FileSystemTool(self.workspace, capabilities)
         self.shell = ShellTool(self.workspace, capabilities)
-        self.git = GitTool(self.workspace, capabilities)
-        self.pkg = PackageTool(self.workspace, capabilities)
-        self.docker = DockerTool(self.workspace, capabilities)
-        self.tests = TestTool(self.workspace, capabilities)
+        self.shell.deadline = self.deadline
+        if state_dir and job_id:
+            # Full command output, one file per command and stream
+            self.shell.spool.spill_dir = state_dir / job_id / "output"
+        if (
+            state_dir
+            and config.sandbox_cache
+            and isinstance(self.shell.runtime, SandboxedRuntime)
+        ):
+            # Package caches shared by every sandboxed job
+            self.shell.runtime.enable_dependency_caches(
+                state_dir / "cache" / "sandbox",
+                max_bytes=config.sandbox_cache_max_mb * 1024 * 1024,
+            )
+        self.git = GitTool(self.workspace, capabilities, shell=self.shell)
+        self.pkg = PackageTool(self.workspace, capabilities, shell=self.shell)
+        self.docker = DockerTool(self.workspace, capabilities, shell=self.shell)
+        self.tests = TestTool(self.workspace, capabilities, shell=self.shell)
+
+        # Thread pool for the synchronous file system tools
+        self._offload_pool = ThreadPoolExecutor(
+            max_workers=self.max_parallel_steps, thread_name_prefix="jj-tool"
+        )
 
         # Execution history
         self.history: List[Dict[str, Any]] = []
 
-    def _execute_tool_call(
-        self, tool_name: str, args: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Execute a single tool call."""
-        start_time = time.time()
-        self.logger.info(f"Executing tool: {tool_name}", tool=tool_name, args=args)
+        # Side effects committed so far in this job
+        self.ledger = StepLedger(self.workspace)
+        self.iteration = 1
+        # Entries of the current iteration restored from a checkpoint
+        self._restored: Dict[int, Dict[str, Any]] = {}
+        self.optimizer = (
+            PlanOptimizer(self.workspace) if config.optimize_plans else None
+        )
+        self.prefetcher: Optional[Prefetcher] = None
+        self.context_builder = FailureContextBuilder(
+            max_tokens=config.fix_context_tokens
+        )
 
-        try:
-            if tool_name == "fs_write":
-                return self.fs.write(
-                    path=args["path"], content=args["content"], dry_run=self.dry_run
-                )
+    def close(self):
+        """Release the thread pool, shell session, log file and speculation."""
+        if self.prefetcher:
+            self.prefetcher.cancel()
+        self.shell.close()
+        self._offload_pool.shutdown(wait=False)
+        self.logger.close()
+
+    async def aclose(self):
+        """``close`` for async callers; runtime teardown does not block."""
+        if self.prefetcher:
+            self.prefetcher.cancel()
+        await self.shell.aclose()
+        aclose = getattr(self.llm_client, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        self._offload_pool.shutdown(wait=False)
+        self.logger.close()
+
+    def start_prefetch(self):
+        """Warm up slow environment steps while the plan is being generated."""
+        if self.dry_run:
+            return
+        self.prefetcher = Prefetcher(self)
+        self.prefetcher.start()
+
+    async def _offload(self, func, *args, **kwargs) -> Dict[str, Any]:
+        """Run a blocking tool method on the offload thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._offload_pool, functools.partial(func, *args, **kwargs)
+        )
 
-            elif tool_name == "fs_patch":
-                return self.fs.patch(
-                    path=args["path"],
-                    old_string=args["old_string"],
-                    new_string=args["new_string"],
-                    dry_run=self.dry_run,
-                )
+    async def _dispatch(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Route a tool call to its implementation.
+
+        Subprocess-backed tools run natively on the event loop; the
+        synchronous file system tools are offloaded to a thread pool.
+        """
+        if tool_name == "fs_write":
+            return await self._offload(
+                self.fs.write,
+                path=args["path"],
+                content=args["content"],
+                dry_run=self.dry_run,
+            )
 
-            elif tool_name == "fs_mkdir":
-                return self.fs.mkdir(path=args["path"], dry_run=self.dry_run)
+        elif tool_name == "fs_patch" and "edits" in args:
+            # Multi-edit patch produced by the plan optimizer
+            return await self._offload(
+                self.fs.patch_many,
+                path=args["path"],
+                edits=args["edits"],
+                dry_run=self.dry_run,
+            )
 
-            elif tool_name == "fs_read":
-                return self.fs.read(path=args["path"])
+        elif tool_name == "fs_patch":
+            return await self._offload(
+                self.fs.patch,
+                path=args["path"],
+                old_string=args["old_string"],
+                new_string=args["new_string"],
+                dry_run=self.dry_run,
+            )
 
-            elif tool_name == "shell_run":
-                return self.shell.run(
-                    command=args["command"], cwd=args.get("cwd"), dry_run=self.dry_run
-                )
+        elif tool_name == "fs_mkdir":
+            return await self._offload(
+                self.fs.mkdir, path=args["path"], dry_run=self.dry_run
+            )
 
-            elif tool_name == "git_init":
-                return self.git.init(dry_run=self.dry_run)
+        elif tool_name == "fs_read":
+            return await self._offload(self.fs.read, path=args["path"])
 
-            elif tool_name == "git_add":
-                return self.git.add(files=args.get("files", "."), dry_run=self.dry_run)
+        elif tool_name == "shell_run":
+            return await self.shell.run_async(
+                command=args["command"], cwd=args.get("cwd"), dry_run=self.dry_run
+            )
 
-            elif tool_name == "git_commit":
-                return self.git.commit(message=args["message"], dry_run=self.dry_run)
+        elif tool_name == "git_init":
+            return await self.git.init_async(dry_run=self.dry_run)
 
-            elif tool_name == "git_branch":
-                return self.git.branch(
-                    name=args["name"],
-                    create=args.get("create", True),
-                    dry_run=self.dry_run,
-                )
+        elif tool_name == "git_add":
+            return await self.git.add_async(
+                files=args.get("files", "."), dry_run=self.dry_run
+            )
 
-            elif tool_name == "git_push":
-                return self.git.push(
-                    remote=args.get("remote", "origin"),
-                    branch=args.get("branch"),
-                    dry_run=self.dry_run,
-                )
+        elif tool_name == "git_commit":
+            return await self.git.commit_async(
+                message=args["message"], dry_run=self.dry_run
+            )
 
-            elif tool_name == "pkg_install":
-                return self.pkg.install(
-                    packages=args.get("packages"),
-                    manager=args.get("manager"),
-                    path=args.get("path"),
-                    dry_run=self.dry_run,
-                )
+        elif tool_name == "git_branch":
+            return await self.git.branch_async(
+                name=args["name"],
+                create=args.get("create", True),
+                dry_run=self.dry_run,
+            )
 
-            elif tool_name == "docker_compose_up":
-                return self.docker.compose_up(
-                    file=args.get("file"),
-                    detach=args.get("detach", True),
-                    build=args.get("build", False),
-                    dry_run=self.dry_run,
-                )
+        elif tool_name == "git_push":
+            return await self.git.push_async(
+                remote=args.get("remote", "origin"),
+                branch=args.get("branch"),
+                dry_run=self.dry_run,
+            )
 
-            elif tool_name == "tests_run":
-                return self.tests.run(
-                    framework=args.get("framework"),
-                    path=args.get("path"),
-                    args=args.get("args"),
-                    dry_run=self.dry_run,
-                )
+        elif tool_name == "pkg_install":
+            return await self.pkg.install_async(
+                packages=args.get("packages"),
+                manager=args.get("manager"),
+                path=args.get("path"),
+                dry_run=self.dry_run,
+            )
 
-            elif tool_name == "browser_open":
-                if not self.dry_run:
-                    webbrowser.open(args["url"])
-                return {"success": True, "url": args["url"], "dry_run": self.dry_run}
+        elif tool_name == "docker_compose_up":
+            return await self.docker.compose_up_async(
+                file=args.get("file"),
+                detach=args.get("detach", True),
+                build=args.get("build", False),
+                dry_run=self.dry_run,
+            )
 
-            else:
-                result = {"success": False, "error": f"Unknown tool: {tool_name}"}
+        elif tool_name == "tests_run":
+            return await self.tests.run_async(
+                framework=args.get("framework"),
+                path=args.get("path"),
+                args=args.get("args"),
+                dry_run=self.dry_run,
+            )
+
+        elif tool_name == "browser_open":
+            if not self.dry_run:
+                await self._offload(webbrowser.open, args["url"])
+            return {"success": True, "url": args["url"], "dry_run": self.dry_run}
+
+        return {"success": False, "error": f"Unknown tool: {tool_name}"}
+
+    async def _execute_memoized(
+        self, tool_name: str, args: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Dispatch a tool call, reusing a cached result if its inputs match."""
+        if self.step_cache is None or self.dry_run or tool_name not in CACHEABLE_TOOLS:
+            return await self._dispatch(tool_name, args)
+
+        key = await self._offload(self.step_cache.key, tool_name, args)
+        cached = await self._offload(self.step_cache.get, key)
+        if cached is not None:
+            metrics.record_cache_hit()
+            self.logger.info(f"Cache hit: {tool_name}", tool=tool_name)
+            return {**cached, "cached": True}
+
+        metrics.record_cache_miss()
+        result = await self._dispatch(tool_name, args)
+        if result.get("success") and not result.get("denied"):
+            # Also key on the post-run inputs (e.g. a lockfile the install
+            # rewrote) so the next identical call hits
+            post_key = await self._offload(self.step_cache.key, tool_name, args)
+            await self._offload(self.step_cache.put, [key, post_key], tool_name, result)
+        return result
+
+    async def _execute_tool_call(
+        self, tool_name: str, args: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Execute a single tool call."""
+        start_time = time.time()
+        result: Dict[str, Any] = {}
+        self.logger.info(f"Executing tool: {tool_name}", tool=tool_name, args=args)
+
+        try:
+            adopted = (
+                await self.prefetcher.adopt(tool_name, args)
+                if self.prefetcher
+                else None
+            )
+            result = (
+                adopted
+                if adopted is not None
+                else await self._execute_memoized(tool_name, args)
+            )
+
+        except asyncio.CancelledError:
+            result = {"success": False, "error": "Cancelled", "tool": tool_name}
+            raise
 
         except Exception as e:
             result = {"success": False, "error": str(e), "tool": tool_name}
@@ -160,16 +335,14 @@ class Executor:
             duration_ms = (time.time() - start_time) * 1000
             metrics.record_tool_call(time.time() - start_time)
 
-            # Record denial if applicable
+            # One audit record per call: the denial, or the action
             if result.get("denied"):
                 metrics.record_denial()
                 if self.audit:
                     self.audit.log_denial(
                         tool_name, args, result.get("error", "Denied")
                     )
-
-            # Log to audit trail
-            if self.audit:
+            elif self.audit:
                 self.audit.log_action(
                     tool=tool_name,
                     args=args,
@@ -187,108 +360,349 @@ class Executor:
 
         return result
 
-    async def execute_plan(self, plan: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Execute a plan of tool calls."""
-        start_time = time.time()
-        results = []
+    async def _run_step(
+        self, index: int, step: Dict[str, Any], total: Optional[int]
+    ) -> Optional[Dict[str, Any]]:
+        """Run one plan step and record its outcome.
+
+        `total` is None while the plan is still streaming in.
+        """
+        tool_name = step.get("tool")
+        args = step.get("args", {})
 
         self.logger.info(
-            f"Starting plan execution with {len(plan)} steps", steps=len(plan)
+            f"Step {index+1}/{total or '?'}: {tool_name}", step=index + 1, total=total
         )
 
-        for i, step in enumerate(plan):
-            tool_name = step.get("tool")
-            args = step.get("args", {})
+        if not isinstance(tool_name, str) or not tool_name:
+            self.logger.error(
+                "Invalid tool name in plan",
+                step=index + 1,
+                tool=tool_name,
+                args=args,
+            )
+            return None
 
+        if self.deadline.expired():
+            return self._deadline_entry(index, step)
+
+        committed = self.ledger.lookup(tool_name, args)
+        if committed is not None:
+            self.ledger.skipped += 1
             self.logger.info(
-                f"Step {i+1}/{len(plan)}: {tool_name}", step=i + 1, total=len(plan)
+                f"Step {index+1} skipped: {tool_name} already committed",
+                step=index + 1,
+                tool=tool_name,
             )
+            return {
+                "step": index + 1,
+                "tool": tool_name,
+                "args": args,
+                "result": {**committed, "skipped": True},
+            }
+
+        result = await self._execute_tool_call(tool_name, args)
+        self.ledger.record(tool_name, args, result, self.iteration)
+
+        self.history.append(
+            {
+                "timestamp": datetime.now().isoformat(),
+                "tool": tool_name,
+                "args": args,
+                "result": result,
+            }
+        )
 
-            if not isinstance(tool_name, str) or not tool_name:
-                self.logger.error(
-                    "Invalid tool name in plan",
-                    step=i + 1,
+        # Log result
+        if result.get("success"):
+            if result.get("denied"):
+                error_reason = str(result.get("error", "Denied"))
+                self.logger.warning(
+                    f"Action denied: {tool_name}",
                     tool=tool_name,
-                    args=args,
+                    reason=error_reason,
                 )
-                continue
+            else:
+                self.logger.info(
+                    f"Step {index+1} succeeded: {tool_name}",
+                    step=index + 1,
+                    tool=tool_name,
+                )
+        else:
+            error_reason = str(result.get("error", "Unknown error"))
+            self.logger.error(
+                f"Step {index+1} failed: {tool_name}",
+                step=index + 1,
+                tool=tool_name,
+                error=error_reason,
+            )
+
+        return {"step": index + 1, "tool": tool_name, "args": args, "result": result}
+
+    async def workspace_context(self) -> Dict[str, Any]:
+        """Planner context describing the current workspace."""
+        if self.repo_map is None:
+            return {}
+        repo_map = await self._offload(self.repo_map.render, config.repo_map_tokens)
+        return {"repo_map": repo_map} if repo_map else {}
 
-            result = self._execute_tool_call(tool_name, args)
-            results.append(
-                {"step": i + 1, "tool": tool_name, "args": args, "result": result}
+    def optimize_plan(self, plan: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Coalesce redundant steps before execution (no-op when disabled)."""
+        if not self.optimizer:
+            return plan
+
+        optimized, report = self.optimizer.optimize(plan)
+        if report["removed_steps"]:
+            self.logger.info(
+                f"Plan optimizer removed {report['removed_steps']} step(s)", **report
             )
+        return optimized
 
-            self.history.append(
-                {
-                    "timestamp": datetime.now().isoformat(),
-                    "tool": tool_name,
-                    "args": args,
-                    "result": result,
-                }
+    async def execute_plan(
+        self, plan: Union[List[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Execute a plan of tool calls.
+
+        Independent steps run concurrently (up to ``max_parallel_steps``);
+        steps touching overlapping paths, barrier tools such as shell_run,
+        git_* and pkg_install, and explicit ``depends_on`` hints keep their
+        plan order.
+
+        `plan` may also be an async iterable of steps (see
+        ``Planner.plan_stream``): each step is scheduled as soon as it
+        arrives, so execution overlaps with plan generation.
+        """
+        start_time = time.time()
+        streamed = not isinstance(plan, list)
+        steps: List[Dict[str, Any]] = [] if streamed else plan
+        total = None if streamed else len(steps)
+
+        if streamed:
+            self.logger.info(
+                "Starting streamed plan execution",
+                max_parallel=self.max_parallel_steps,
+            )
+        else:
+            self.logger.info(
+                f"Starting plan execution with {total} steps",
+                steps=total,
+                max_parallel=self.max_parallel_steps,
             )
 
-            # Log result
-            if result.get("success"):
-                if result.get("denied"):
-                    error_reason = str(result.get("error", "Denied"))
-                    self.logger.warning(
-                        f"Action denied: {tool_name}",
-                        tool=tool_name,
-                        reason=error_reason,
-                    )
-                    if self.audit:
-                        self.audit.log_denial(tool_name, args, error_reason)
-                else:
-                    self.logger.info(
-                        f"Step {i+1} succeeded: {tool_name}", step=i + 1, tool=tool_name
-                    )
+        scheduler = StepScheduler(
+            lambda index, step: self._checkpointed(index, step, total),
+            max_parallel=self.max_parallel_steps,
+            workspace=self.workspace,
+        )
+
+        async def schedule_all() -> List[Any]:
+            if streamed:
+                async for step in plan:
+                    steps.append(step)
+                    scheduler.submit(step)
+                self._checkpoint_plan(steps)
             else:
-                error_reason = str(result.get("error", "Unknown error"))
-                self.logger.error(
-                    f"Step {i+1} failed: {tool_name}",
-                    step=i + 1,
-                    tool=tool_name,
-                    error=error_reason,
-                )
+                self._checkpoint_plan(steps)
+                for step in steps:
+                    scheduler.submit(step)
+            return await scheduler.drain()
 
-            if self.audit:
-                exit_code = result.get("returncode")
-                if not isinstance(exit_code, int):
-                    exit_code = None
-                self.audit.log_action(
-                    tool=tool_name,
-                    args=args,
-                    result=result,
-                    duration_ms=duration_ms,
-                    exit_code=exit_code,
-                )
+        deadline_exceeded = False
+        try:
+            entries = await asyncio.wait_for(schedule_all(), self.deadline.remaining())
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            # Budget exhausted: in-flight steps were cancelled (killing their
+            # subprocesses); report what finished and mark the rest
+            deadline_exceeded = True
+            await scheduler.shutdown()
+            completed = scheduler.completed()
+            entries = [
+                completed[i] if i in completed else self._deadline_entry(i, step)
+                for i, step in enumerate(steps)
+            ]
+            self.logger.warning(
+                "Job time budget exhausted during plan execution",
+                completed=len(completed),
+                steps=len(steps),
+            )
+        except BaseException:
+            await scheduler.shutdown()
+            raise
+        results = [r for r in entries if r is not None]
+        self._restored.clear()
+
+        # Speculation the plan did not ask for is no longer useful
+        if self.prefetcher:
+            self.prefetcher.cancel()
 
         duration = time.time() - start_time
-        success = all(r["result"].get("success", False) for r in results)
+        success = not deadline_exceeded and all(
+            r["result"].get("success", False) for r in results
+        )
 
         self.logger.info(
             "Plan execution completed",
             success=success,
             duration_seconds=duration,
-            steps=len(plan),
+            steps=len(steps),
         )
 
         return {
             "success": success,
+            "plan": steps,
             "results": results,
             "history": self.history,
             "duration_seconds": duration,
+            "deadline_exceeded": deadline_exceeded or self.deadline.expired(),
         }
 
+    def _checkpoint_plan(self, steps: List[Dict[str, Any]]):
+        """Journal the iteration's plan so the run can be resumed."""
+        if self.state_manager is not None:
+            self.state_manager.log_event("plan", iteration=self.iteration, plan=steps)
+
+    def restore(self, checkpoint: Dict[str, Any]):
+        """Rebuild job state from a run checkpoint (see ``load_checkpoint``).
+
+        Committed steps are replayed into the ledger and history; steps the
+        checkpoint's iteration already finished are returned as-is by the
+        next ``execute_plan`` instead of running again.
+        """
+        self.iteration = checkpoint["iteration"]
+        completed = checkpoint["completed"]
+        for entry in [*checkpoint["committed"], *completed.values()]:
+            self.ledger.record(
+                entry["tool"],
+                entry["args"],
+                entry["result"],
+                entry.get("iteration", self.iteration),
+            )
+            self.history.append(
+                {
+                    "timestamp": datetime.now().isoformat(),
+                    "tool": entry["tool"],
+                    "args": entry["args"],
+                    "result": entry["result"],
+                }
+            )
+        self._restored = dict(completed)
+
+    async def _checkpointed(
+        self, index: int, step: Dict[str, Any], total: Optional[int]
+    ) -> Optional[Dict[str, Any]]:
+        """Run a step, unless the checkpoint being resumed already finished it."""
+        entry = self._restored.pop(index, None)
+        if entry is not None:
+            self.logger.info(
+                f"Step {index+1} restored from checkpoint: {entry['tool']}",
+                step=index + 1,
+                tool=entry["tool"],
+            )
+            return entry
+        return await self._journaled(self._run_step(index, step, total))
+
+    async def _journaled(
+        self, run: Awaitable[Optional[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Await a step and append its outcome to the run journal."""
+        entry = await run
+        if entry is not None and self.state_manager is not None:
+            result = dict(entry["result"])
+            content = result.pop("content", None)
+            if isinstance(content, str):
+                # The file is in the workspace; keep a reference only
+                result["content_sha256"] = hashlib.sha256(
+                    content.encode("utf-8")
+                ).hexdigest()
+            self.state_manager.log_step(
+                {
+                    **entry,
+                    "iteration": self.iteration,
+                    "args": self.context_builder.compact_args(entry["args"]),
+                    "result": result,
+                }
+            )
+        return entry
+
+    def _deadline_entry(
+        self, index: int, step: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Result entry for a step that did not run within the job budget."""
+        tool_name = step.get("tool")
+        if not isinstance(tool_name, str) or not tool_name:
+            return None
+        return {
+            "step": index + 1,
+            "tool": tool_name,
+            "args": step.get("args", {}),
+            "result": {
+                "success": False,
+                "error": "Job time budget exhausted",
+                "deadline_exceeded": True,
+            },
+        }
+
+    def _next_iteration_plan(
+        self, fix_plan: List[Dict[str, Any]], failures: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Build the next iteration: the fix steps, then the failed steps.
+
+        A failed step is dropped when a fix step acts on the same target
+        (e.g. the same file), since the fix supersedes it.
+        """
+        fix_targets = {
+            step_target(s["tool"], s.get("args", {}), self.workspace)
+            for s in fix_plan
+            if isinstance(s.get("tool"), str)
+        }
+        fix_keys = {
+            step_key(s["tool"], s.get("args", {}))
+            for s in fix_plan
+            if isinstance(s.get("tool"), str)
+        }
+
+        plan = list(fix_plan)
+        for failure in failures:
+            if (
+                step_target(failure["tool"], failure["args"], self.workspace)
+                in fix_targets
+            ):
+                continue
+            key = step_key(failure["tool"], failure["args"])
+            if key in fix_keys:
+                continue
+            fix_keys.add(key)
+            plan.append({"tool": failure["tool"], "args": failure["args"]})
+        return plan
+
     async def execute_with_retry(
-        self, plan: List[Dict[str, Any]], max_iterations: int = 3
+        self,
+        plan: Union[List[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        max_iterations: int = 3,
+        checkpoint: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        """Execute plan with retry logic and adaptive planning."""
+        """Execute plan with retry logic and adaptive planning.
+
+        The first plan may be streamed (see ``execute_plan``); fix plans
+        are always complete lists.
+
+        Each retry iteration runs only the LLM's fix steps plus the steps
+        that failed; identical idempotent steps that already succeeded in
+        this job are skipped via the step ledger.
+
+        With a ``checkpoint``, `plan` is the checkpoint's plan and execution
+        continues at its iteration without running its finished steps again.
+        """
         iteration = 0
+        if checkpoint is not None:
+            self.restore(checkpoint)
+            iteration = checkpoint["iteration"] - 1
         full_results = []
+        message = "Failed after max iterations"
 
         while iteration < max_iterations:
             iteration += 1
+            self.iteration = iteration
             print(f"\n=== Execution Iteration {iteration}/{max_iterations} ===\n")
 
             result = await self.execute_plan(plan)
@@ -300,8 +714,12 @@ class Executor:
                     "success": True,
                     "iterations": iteration,
                     "results": full_results,
+                    "ledger": self._ledger_summary(),
                 }
 
+            if result.get("deadline_exceeded"):
+                break
+
             # If we have failures, ask LLM to plan fixes
             failures = [
                 r for r in result["results"] if not r["result"].get("success", False)
@@ -309,37 +727,67 @@ class Executor:
 
             if failures and iteration < max_iterations:
                 print(f"\n{len(failures)} step(s) failed. Planning fixes...")
-                # Create context for LLM to fix issues
-                context = {
-                    "failures": [
-                        {
-                            "tool": f["tool"],
-                            "args": f["args"],
-                            "error": f["result"].get("error", "Unknown"),
-                        }
-                        for f in failures
-                    ],
-                    "history": self.history[-10:],  # Last 10 actions
-                }
+                # Create context for LLM to fix issues: error-relevant
+                # output only, file bodies replaced by hashes
+                context, savings = self.context_builder.build(
+                    failures, self.history[-10:]  # Last 10 actions
+                )
+                context.update(await self.workspace_context())
+                metrics.record_context_savings(savings["saved_tokens"])
+                self.logger.info("Fix context compacted", **savings)
 
                 # Get fix plan from LLM
-                from .planner import Planner
-
-                planner = Planner(self.llm_client)
-                fix_plan = await planner.plan(
-                    "Fix the errors that occurred. Review the failures and create a plan to resolve them.",
-                    context=context,
-                )
+                from .planner import Planner, PlanningError
+
+                planner = Planner(self.llm_client, router=self.router)
+                try:
+                    fix_plan = await planner.plan(
+                        "Fix the errors that occurred. Review the failures and "
+                        "create a plan to resolve them. Steps that already "
+                        "succeeded are kept and must not be repeated. Failed "
+                        "steps are retried after your plan unless it includes a "
+                        "replacement step for the same file or command.",
+                        context=context,
+                        deadline=self.deadline,
+                        phase="fix",
+                        failed_iterations=iteration,
+                    )
+                except DeadlineExceeded:
+                    break
+                except PlanningError as e:
+                    self.logger.error(str(e))
+                    message = str(e)
+                    break
 
                 if fix_plan:
-                    plan = fix_plan
+                    plan = self.optimize_plan(
+                        self._next_iteration_plan(fix_plan, failures)
+                    )
                     continue
 
             break
 
+        if self.deadline.expired():
+            self.logger.warning(
+                "Job stopped: time budget exhausted", iterations=iteration
+            )
+            return {
+                "success": False,
+                "iterations": iteration,
+                "results": full_results,
+                "ledger": self._ledger_summary(),
+                "deadline_exceeded": True,
+                "message": "Job time budget exhausted",
+            }
+
         return {
             "success": False,
             "iterations": iteration,
             "results": full_results,
-            "message": "Failed after max iterations",
+            "ledger": self._ledger_summary(),
+            "message": message,
         }
+
+    def _ledger_summary(self) -> Dict[str, Any]:
+        """Summarize committed and skipped steps for the job result."""
+        return {"committed": len(self.ledger), "skipped": self.ledger.skipped}
@@ -0,0 +1,147 @@
+"""Step ledger tracking side effects committed during a job."""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .scheduler import normalize_path, paths_overlap
+
+# Tools whose effect is fully determined by their args, so re-running an
+# identical, already successful call cannot change the outcome.
+IDEMPOTENT_TOOLS = {
+    "fs_write",
+    "fs_mkdir",
+    "git_init",
+    "pkg_install",
+    "docker_compose_up",
+}
+
+# Files that, when rewritten, make an earlier install/compose stale
+WATCHED_FILES = {
+    "pkg_install": [
+        "requirements.txt",
+        "pyproject.toml",
+        "uv.lock",
+        "package.json",
+        "package-lock.json",
+        "pnpm-lock.yaml",
+        "yarn.lock",
+    ],
+    "docker_compose_up": [
+        "docker-compose.yml",
+        "docker-compose.yaml",
+        "compose.yml",
+        "compose.yaml",
+        "Dockerfile",
+    ],
+}
+
+# Committed tools that may rewrite arbitrary workspace files
+WORKTREE_TOOLS = {"shell_run", "git_branch"}
+
+
+def step_key(tool: str, args: Dict[str, Any]) -> str:
+    """Stable identity of a tool call."""
+    payload = json.dumps({"tool": tool, "args": args}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def step_target(
+    tool: str, args: Dict[str, Any], workspace: Optional[Path] = None
+) -> Tuple[str, Any]:
+    """What a step acts on; a fix step with the same target supersedes it."""
+    if tool.startswith("fs_"):
+        return "fs", normalize_path(args.get("path"), workspace)
+    if tool == "shell_run":
+        return tool, args.get("command")
+    if tool in ("pkg_install", "tests_run"):
+        return tool, normalize_path(args.get("path"), workspace)
+    if tool == "docker_compose_up":
+        return tool, args.get("file")
+    if tool == "browser_open":
+        return tool, args.get("url")
+    return tool, None
+
+
+class StepLedger:
+    """Records successful side effects so retries never replay them."""
+
+    def __init__(self, workspace: Optional[Path] = None):
+        self.workspace = workspace
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, tool: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the committed result of an identical idempotent step."""
+        if tool not in IDEMPOTENT_TOOLS:
+            return None
+        entry = self._entries.get(step_key(tool, args))
+        return entry["result"] if entry else None
+
+    def record(
+        self, tool: str, args: Dict[str, Any], result: Dict[str, Any], iteration: int
+    ):
+        """Record a finished step and drop entries its effects invalidated."""
+        if not result.get("success") or result.get("dry_run"):
+            return
+
+        key = step_key(tool, args)
+        self._invalidate(tool, args, key)
+
+        if tool in IDEMPOTENT_TOOLS:
+            self._entries[key] = {
+                "tool": tool,
+                "args": args,
+                "result": result,
+                "iteration": iteration,
+            }
+
+    def _invalidate(self, tool: str, args: Dict[str, Any], key: str):
+        if tool in WORKTREE_TOOLS:
+            # Any file may have changed, manifests and compose files included
+            stale = [
+                k
+                for k, e in self._entries.items()
+                if e["tool"].startswith("fs_") or e["tool"] in WATCHED_FILES
+            ]
+        elif tool in ("fs_write", "fs_patch", "fs_mkdir"):
+            path = normalize_path(args.get("path"), self.workspace)
+            stale = [
+                k
+                for k, e in self._entries.items()
+                if k != key and self._affected_by(e, path)
+            ]
+        else:
+            return
+
+        for k in stale:
+            del self._entries[k]
+
+    def _affected_by(self, entry: Dict[str, Any], path: Tuple[str, ...]) -> bool:
+        """Return True if writing `path` makes a committed entry stale."""
+        tool = entry["tool"]
+        args = entry["args"]
+        if tool.startswith("fs_"):
+            return paths_overlap(normalize_path(args.get("path"), self.workspace), path)
+
+        watched = WATCHED_FILES.get(tool, [])
+        base = (
+            normalize_path(args.get("path"), self.workspace)
+            if tool == "pkg_install"
+            else ()
+        )
+        if tool == "docker_compose_up" and args.get("file"):
+            if normalize_path(args["file"], self.workspace) == path:
+                return True
+        return any(base + (name,) == path for name in watched)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Return committed entries (without results) for reporting."""
+        return [
+            {"tool": e["tool"], "args": e["args"], "iteration": e["iteration"]}
+            for e in self._entries.values()
+        ]
@@ -0,0 +1,161 @@
+"""Content-addressed memoization of expensive tool calls."""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .ledger import WATCHED_FILES
+
+# Tools whose result is fully determined by their args and input files
+CACHEABLE_TOOLS = {"pkg_install", "tests_run"}
+
+# Directories that never count as test inputs
+IGNORED_DIRS = {
+    ".git",
+    ".hg",
+    ".venv",
+    "venv",
+    "node_modules",
+    "__pycache__",
+    ".pytest_cache",
+    ".mypy_cache",
+    ".ruff_cache",
+    ".tox",
+}
+
+# Installed-environment markers; their absence means an install is needed
+ENVIRONMENT_MARKERS = [
+    ".venv/pyvenv.cfg",
+    "venv/pyvenv.cfg",
+    "node_modules/.package-lock.json",
+    "node_modules/.modules.yaml",
+    "node_modules/.yarn-integrity",
+]
+
+
+class StepCache:
+    """On-disk LRU cache of successful tool results.
+
+    Entries are keyed on the tool name, its normalized args and a
+    fingerprint of the files the tool reads, so a hit means nothing the
+    tool depends on has changed since the cached run.
+    """
+
+    def __init__(self, cache_dir: Path, workspace: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.workspace = Path(workspace).resolve()
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _work_dir(self, args: Dict[str, Any]) -> Path:
+        path = args.get("path")
+        return (self.workspace / path).resolve() if path else self.workspace
+
+    def _file_digest(self, path: Path) -> Optional[str]:
+        try:
+            return hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+
+    def _stat(self, path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def _walk(self, root: Path) -> Iterator[Path]:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d not in IGNORED_DIRS)
+            for name in sorted(filenames):
+                yield Path(dirpath) / name
+
+    def fingerprint(self, tool: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Describe the inputs a tool call reads."""
+        work_dir = self._work_dir(args)
+        if tool == "pkg_install":
+            return {
+                "manifests": {
+                    name: self._file_digest(work_dir / name)
+                    for name in WATCHED_FILES["pkg_install"]
+                },
+                "environment": {
+                    marker: self._stat(work_dir / marker)
+                    for marker in ENVIRONMENT_MARKERS
+                },
+                "virtual_env": os.getenv("VIRTUAL_ENV"),
+            }
+
+        # tests_run: the test tree and the code it exercises
+        return {
+            str(p.relative_to(self.workspace)): self._stat(p)
+            for p in self._walk(self.workspace)
+            if not p.name.endswith((".pyc", ".log"))
+        }
+
+    def key(self, tool: str, args: Dict[str, Any]) -> str:
+        """Compute the cache key for a tool call in the current workspace."""
+        normalized = {k: v for k, v in sorted(args.items()) if v is not None}
+        payload = json.dumps(
+            {
+                "tool": tool,
+                "args": normalized,
+                "workspace": str(self.workspace),
+                "inputs": self.fingerprint(tool, args),
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result, refreshing its LRU position."""
+        entry_path = self._entry_path(key)
+        try:
+            entry = json.loads(entry_path.read_text(encoding="utf-8"))
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+        return entry.get("result")
+
+    def put(self, keys: List[str], tool: str, result: Dict[str, Any]):
+        """Store a successful result under one or more keys."""
+        # Whole seconds keep entries for the same result the same size
+        data = json.dumps({"tool": tool, "created": int(time.time()), "result": result})
+        for key in dict.fromkeys(keys):
+            entry_path = self._entry_path(key)
+            try:
+                entry_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = entry_path.with_suffix(".tmp")
+                tmp_path.write_text(data, encoding="utf-8")
+                os.replace(tmp_path, entry_path)
+            except OSError:
+                continue
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until under max_bytes."""
+        entries = []
+        total = 0
+        for entry_path in self.cache_dir.glob("*/*.json"):
+            try:
+                st = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry_path))
+            total += st.st_size
+
+        for _, size, entry_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry_path.unlink()
+                total -= size
+            except OSError:
+                pass
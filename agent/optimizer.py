@@ -0,0 +1,305 @@
+"""Plan optimizer that coalesces and deduplicates tool calls."""
+
+import copy
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .scheduler import classify_step, normalize_path, paths_overlap
+
+# git_add pathspecs we can safely split and join
+_SIMPLE_PATHSPEC = re.compile(r"^[\w./-]+$")
+
+
+class PlanOptimizer:
+    """Rewrites a plan into fewer steps with the same final workspace state.
+
+    Rewrites only happen between barrier steps (shell_run, git_*, ...), so
+    anything a barrier could observe is left untouched:
+
+    - an fs_write supersedes earlier writes/patches of the same file
+    - fs_patch calls following an fs_write are folded into its content
+    - chains of fs_patch on one file become a single multi-edit fs_patch
+    - fs_mkdir is dropped when a write or mkdir below it creates it anyway
+    - repeated git_add calls are merged, and repeated git_init dropped
+
+    A patch is only folded, merged or superseded when it is known to apply:
+    against a pending write's content, or against the file in `workspace`
+    as it is now (before the first barrier, which could change any file).
+    Any other patch is kept where it is, so a patch that would fail still
+    fails, leaving the same workspace state and the same error for the fix
+    planner as running the steps one by one.
+
+    Absolute step paths are compared relative to `workspace` when given.
+    """
+
+    def __init__(self, workspace: Optional[Path] = None):
+        self.workspace = workspace
+
+    def _path(self, path: Any) -> Tuple[str, ...]:
+        return normalize_path(path, self.workspace)
+
+    def optimize(
+        self, plan: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Return the optimized plan and a report of what was removed."""
+        steps = [copy.deepcopy(step) for step in plan]
+        removed = [False] * len(steps)
+        stats: Counter = Counter()
+        pinned = self._pinned(steps)
+
+        # Expected file contents after the steps seen so far (None: unknown)
+        known: Dict[Tuple[str, ...], Optional[str]] = {}
+        segment: List[int] = []
+        trust_disk = True
+        for i, step in enumerate(steps):
+            kind, _ = classify_step(step, self.workspace)
+            if kind in ("read", "write"):
+                segment.append(i)
+            else:
+                self._optimize_segment(
+                    steps, segment, removed, pinned, stats, known, trust_disk
+                )
+                segment = []
+                known.clear()
+                trust_disk = False
+        self._optimize_segment(
+            steps, segment, removed, pinned, stats, known, trust_disk
+        )
+
+        self._merge_git_steps(steps, removed, pinned, stats)
+
+        optimized = [step for i, step in enumerate(steps) if not removed[i]]
+        return optimized, {
+            "original_steps": len(plan),
+            "optimized_steps": len(optimized),
+            "removed_steps": len(plan) - len(optimized),
+            "rewrites": dict(stats),
+        }
+
+    def _pinned(self, steps: List[Dict[str, Any]]) -> Set[int]:
+        """Steps with or targeted by explicit depends_on hints are kept as-is."""
+        referenced = set()
+        pinned = set()
+        for i, step in enumerate(steps):
+            hints = step.get("depends_on")
+            if hints:
+                pinned.add(i)
+                referenced.update(hints if isinstance(hints, list) else [hints])
+        for i, step in enumerate(steps):
+            if step.get("id") in referenced or (i + 1) in referenced:
+                pinned.add(i)
+        return pinned
+
+    def _optimize_segment(
+        self,
+        steps: List[Dict[str, Any]],
+        segment: List[int],
+        removed: List[bool],
+        pinned: Set[int],
+        stats: Counter,
+        known: Dict[Tuple[str, ...], Optional[str]],
+        trust_disk: bool,
+    ):
+        """Coalesce fs steps between two barriers."""
+        # Live write/patch chains per file since it was last observed, and
+        # whether every patch in a chain is known to apply
+        chains: Dict[Tuple[str, ...], List[int]] = {}
+        verified: Dict[Tuple[str, ...], bool] = {}
+        mkdirs: List[int] = []
+
+        for i in segment:
+            tool = steps[i]["tool"]
+            args = steps[i].setdefault("args", {})
+            path = self._path(args.get("path"))
+
+            if tool == "fs_read" or i in pinned:
+                # The step observes the file: earlier edits must stay
+                for other in [p for p in chains if paths_overlap(p, path)]:
+                    del chains[other]
+                if tool == "fs_write":
+                    known[path] = self._written(args)
+                elif tool == "fs_patch":
+                    before = self._content(path, known, trust_disk)
+                    known[path] = self._apply(before, args)
+                continue
+
+            if tool == "fs_mkdir":
+                chains.pop(path, None)
+                mkdirs.append(i)
+                continue
+
+            chain = chains.get(path, [])
+            if tool == "fs_write":
+                if verified.get(path, True):
+                    for j in chain:
+                        removed[j] = True
+                        stats["superseded_writes"] += 1
+                chains[path] = [i]
+                verified[path] = True
+                known[path] = self._written(args)
+            elif tool == "fs_patch":
+                before = self._content(path, known, trust_disk)
+                known[path] = self._apply(before, args)
+                if not chain:
+                    chains[path] = [i]
+                    verified[path] = known[path] is not None
+                    continue
+                if known[path] is not None and verified[path] and len(chain) == 1:
+                    head = steps[chain[0]]
+                    if head["tool"] == "fs_write":
+                        if self._fold_into_write(head, args):
+                            removed[i] = True
+                            stats["folded_patches"] += 1
+                            continue
+                    elif head["tool"] == "fs_patch":
+                        self._merge_patches(head, args)
+                        removed[i] = True
+                        stats["merged_patches"] += 1
+                        continue
+                chain.append(i)
+                verified[path] = verified[path] and known[path] is not None
+
+        for i in mkdirs:
+            if removed[i] or i in pinned:
+                continue
+            target = self._path(steps[i]["args"].get("path"))
+            for j in segment:
+                if j == i or removed[j]:
+                    continue
+                if steps[j]["tool"] not in ("fs_write", "fs_mkdir"):
+                    continue
+                other = self._path(steps[j]["args"].get("path"))
+                implied = len(other) > len(target) and paths_overlap(other, target)
+                duplicate = steps[j]["tool"] == "fs_mkdir" and other == target and j < i
+                if implied or duplicate:
+                    removed[i] = True
+                    stats["implied_mkdirs"] += 1
+                    break
+
+    def _content(
+        self,
+        path: Tuple[str, ...],
+        known: Dict[Tuple[str, ...], Optional[str]],
+        trust_disk: bool,
+    ) -> Optional[str]:
+        """What a file will contain when the next step on it runs, if known."""
+        if path in known:
+            return known[path]
+        if not trust_disk or self.workspace is None or not path:
+            return None
+        if path[0] == "/":
+            file_path = Path("/", *path[1:])
+        else:
+            file_path = Path(self.workspace, *path)
+        try:
+            return file_path.read_text(encoding="utf-8")
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _written(args: Dict[str, Any]) -> Optional[str]:
+        content = args.get("content")
+        return content if isinstance(content, str) else None
+
+    def _apply(self, content: Optional[str], patch: Dict[str, Any]) -> Optional[str]:
+        """Content after a patch; None if it would fail or cannot be known."""
+        edits = self._edits(patch)
+        if content is None or edits is None:
+            return None
+        for old, new in edits:
+            if old not in content:
+                return None
+            content = content.replace(old, new)
+        return content
+
+    def _fold_into_write(self, write: Dict[str, Any], patch: Dict[str, Any]) -> bool:
+        """Apply a patch to a pending write's content; False if it would fail."""
+        content = self._apply(self._written(write["args"]), patch)
+        if content is None:
+            return False
+        write["args"]["content"] = content
+        return True
+
+    def _merge_patches(self, head: Dict[str, Any], patch: Dict[str, Any]):
+        """Append a patch's edits to an earlier patch of the same file."""
+        head_args = head["args"]
+        edits = self._edits(head_args) or []
+        edits.extend(self._edits(patch) or [])
+        head["args"] = {
+            "path": head_args.get("path"),
+            "edits": [{"old_string": old, "new_string": new} for old, new in edits],
+        }
+
+    def _edits(self, args: Dict[str, Any]):
+        """Return (old, new) pairs of a single or multi-edit fs_patch."""
+        if "edits" in args:
+            return [(e["old_string"], e["new_string"]) for e in args["edits"]]
+        if "old_string" in args and "new_string" in args:
+            return [(args["old_string"], args["new_string"])]
+        return None
+
+    def _merge_git_steps(
+        self,
+        steps: List[Dict[str, Any]],
+        removed: List[bool],
+        pinned: Set[int],
+        stats: Counter,
+    ):
+        """Merge git_add calls separated only by fs steps; drop repeat git_init."""
+        pending = None
+        touched: List[Tuple[str, ...]] = []
+        initialized = False
+
+        for i, step in enumerate(steps):
+            if removed[i]:
+                continue
+            tool = step.get("tool")
+
+            if tool == "git_init":
+                if initialized and i not in pinned:
+                    removed[i] = True
+                    stats["duplicate_steps"] += 1
+                initialized = True
+                pending = None
+            elif tool == "git_add" and i not in pinned:
+                if pending is not None and self._merge_add(
+                    steps[pending], step, touched
+                ):
+                    removed[pending] = True
+                    stats["merged_git_adds"] += 1
+                pending = i
+                touched = []
+            elif tool in ("fs_write", "fs_patch", "fs_mkdir"):
+                touched.append(self._path(step.get("args", {}).get("path")))
+            elif tool != "fs_read":
+                pending = None
+                if tool in ("shell_run", "git_branch"):
+                    initialized = False
+
+    def _merge_add(
+        self,
+        earlier: Dict[str, Any],
+        later: Dict[str, Any],
+        touched: List[Tuple[str, ...]],
+    ) -> bool:
+        """Fold an earlier git_add into a later one; False if not equivalent."""
+        first = str(earlier.get("args", {}).get("files", ".")).split()
+        second = str(later.setdefault("args", {}).get("files", ".")).split()
+
+        # The later call already stages everything the earlier one did
+        if second == ["."] or second == first:
+            return True
+
+        if not all(_SIMPLE_PATHSPEC.match(f) for f in first + second):
+            return False
+
+        # Files edited in between would be staged in their newer state
+        for spec in first:
+            if any(paths_overlap(self._path(spec), p) for p in touched):
+                return False
+
+        merged = list(dict.fromkeys(first + second))
+        later["args"]["files"] = " ".join(merged)
+        return True
@@ -1,14 +1,28 @@
 """Planner that converts user prompts into task graphs."""
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
+import asyncio
 import json
+import time
+
+from metrics import metrics
+from runtime import Deadline, DeadlineExceeded
+
+from .router import ModelRouter, usage_tokens
+
+
+class PlanningError(Exception):
+    """Raised when the LLM could not produce a plan."""
 
 
 class Planner:
     """Converts natural language prompts into executable task plans."""
 
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, router: Optional[ModelRouter] = None):
         self.llm_client = llm_client
+        self.router = router or ModelRouter.from_config(
+            getattr(llm_client, "model", None)
+        )
 
     def create_tool_schema(self) -> List[Dict[str, Any]]:
         """Create tool schemas for LLM function calling."""
@@ -287,10 +301,10 @@ class Planner:
             },
         ]
 
-    async def plan(
+    def _build_messages(
         self, prompt: str, context: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
-        """Convert user prompt into a plan of tool calls."""
+        """Build the chat messages for a planning request."""
         system_prompt = """You are a planning agent that converts user requests into a sequence of tool calls.
 
 You have access to the following tools:
@@ -320,10 +334,18 @@ Return a JSON array of tool calls. Each tool call should have:
 
 Be thorough and create complete, working solutions."""
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt},
-        ]
+        messages = [{"role": "system", "content": system_prompt}]
+
+        # The repo map goes in verbatim; JSON-encoding it would escape
+        # every newline and cost more tokens
+        context = dict(context or {})
+        repo_map = context.pop("repo_map", None)
+        if repo_map:
+            messages.append(
+                {"role": "system", "content": f"Current workspace files:\n{repo_map}"}
+            )
+
+        messages.append({"role": "user", "content": prompt})
 
         if context:
             messages.append(
@@ -333,13 +355,62 @@ Be thorough and create complete, working solutions."""
                 }
             )
 
+        return messages
+
+    def _request_kwargs(
+        self, messages: List[Dict[str, Any]], model: str
+    ) -> Dict[str, Any]:
+        """Arguments for the chat completions request."""
+        return {
+            "model": model,
+            "messages": messages,
+            "tools": self.create_tool_schema(),
+            "tool_choice": "auto",
+            "temperature": 0.3,
+        }
+
+    async def plan(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+        phase: str = "plan",
+        failed_iterations: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Convert user prompt into a plan of tool calls.
+
+        `phase` and `failed_iterations` select the model (see ModelRouter).
+        Raises DeadlineExceeded if the job budget runs out before the LLM
+        responds, and PlanningError if the request fails after retries or
+        returns malformed tool calls.
+        """
+        messages = self._build_messages(prompt, context)
+        model = self.router.select(phase, failed_iterations)
+
+        if deadline:
+            deadline.check()
+
         try:
-            response = await self.llm_client.chat.completions.create(
-                model="gpt-4o-mini",  # Can be made configurable
-                messages=messages,
-                tools=self.create_tool_schema(),
-                tool_choice="auto",
-                temperature=0.3,
+            start = time.monotonic()
+            response = await asyncio.wait_for(
+                self.llm_client.chat.completions.create(
+                    **self._request_kwargs(messages, model)
+                ),
+                deadline.remaining() if deadline else None,
+            )
+            # Without streaming the first token arrives with the last
+            latency = time.monotonic() - start
+            prompt_tokens, completion_tokens = usage_tokens(
+                getattr(response, "usage", None)
+            )
+            metrics.record_llm_call(
+                phase,
+                model,
+                latency_seconds=latency,
+                ttft_seconds=latency,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cached=getattr(response, "served_locally", False),
             )
 
             # Extract tool calls from response
@@ -355,11 +426,137 @@ Be thorough and create complete, working solutions."""
                     )
 
             return plan
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded("Job time budget exhausted while planning") from e
         except Exception as e:
-            # Fallback: try to parse as JSON plan
-            return [
-                {
-                    "tool": "shell_run",
-                    "args": {"command": f"echo Error in planning: {e}"},
-                }
-            ]
+            raise PlanningError(f"Planning failed: {e}") from e
+
+    async def plan_stream(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+        phase: str = "plan",
+        failed_iterations: int = 0,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a plan, yielding each tool call once its arguments are complete.
+
+        The executor can start on the first step while the LLM is still
+        generating the rest of the plan.
+        """
+        messages = self._build_messages(prompt, context)
+        model = self.router.select(phase, failed_iterations)
+
+        if deadline:
+            deadline.check()
+
+        parser = ToolCallStreamParser()
+        try:
+            start = time.monotonic()
+            ttft = None
+            usage = None
+            stream = await asyncio.wait_for(
+                self.llm_client.chat.completions.create(
+                    **self._request_kwargs(messages, model),
+                    stream=True,
+                    stream_options={"include_usage": True},
+                ),
+                deadline.remaining() if deadline else None,
+            )
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(),
+                        deadline.remaining() if deadline else None,
+                    )
+                except StopAsyncIteration:
+                    break
+                if ttft is None:
+                    ttft = time.monotonic() - start
+                # With include_usage, the last chunk carries the totals
+                usage = getattr(chunk, "usage", None) or usage
+                for step in parser.feed(chunk):
+                    yield step
+
+            for step in parser.finish():
+                yield step
+
+            latency = time.monotonic() - start
+            prompt_tokens, completion_tokens = usage_tokens(usage)
+            metrics.record_llm_call(
+                phase,
+                model,
+                latency_seconds=latency,
+                ttft_seconds=latency if ttft is None else ttft,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cached=getattr(stream, "served_locally", False),
+            )
+        except asyncio.TimeoutError as e:
+            raise DeadlineExceeded("Job time budget exhausted while planning") from e
+        except Exception as e:
+            raise PlanningError(f"Planning failed: {e}") from e
+
+
+class ToolCallStreamParser:
+    """Reassembles tool calls from chat completion delta chunks.
+
+    Tool calls are emitted in order, as soon as their arguments form a
+    complete JSON object or a later tool call starts.
+    """
+
+    def __init__(self):
+        self._calls: Dict[int, Dict[str, Any]] = {}
+        self._next = 0
+
+    def feed(self, chunk: Any) -> List[Dict[str, Any]]:
+        """Consume one stream chunk and return newly completed tool calls."""
+        for choice in getattr(chunk, "choices", None) or []:
+            delta = getattr(choice, "delta", None)
+            for tool_call in getattr(delta, "tool_calls", None) or []:
+                index = tool_call.index
+                call = self._calls.setdefault(
+                    index, {"id": None, "name": "", "arguments": ""}
+                )
+                if tool_call.id:
+                    call["id"] = tool_call.id
+                function = getattr(tool_call, "function", None)
+                if function is not None:
+                    call["name"] += function.name or ""
+                    call["arguments"] += function.arguments or ""
+
+        return self._emit(final=False)
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Return the remaining tool calls once the stream has ended."""
+        return self._emit(final=True)
+
+    def _emit(self, final: bool) -> List[Dict[str, Any]]:
+        ready = []
+        while self._next in self._calls:
+            call = self._calls[self._next]
+            started_later = any(index > self._next for index in self._calls)
+            args = self._parse_arguments(call["arguments"])
+            if args is None:
+                if not (final or started_later):
+                    break
+                raise ValueError(
+                    f"Malformed arguments for tool call {call['name'] or self._next}"
+                )
+            ready.append({"tool": call["name"], "args": args, "id": call["id"]})
+            del self._calls[self._next]
+            self._next += 1
+        return ready
+
+    def _parse_arguments(self, text: str) -> Optional[Dict[str, Any]]:
+        """Parse complete JSON arguments; None while still incomplete."""
+        if not text.strip():
+            return None
+        if not text.rstrip().endswith("}"):
+            return None
+        try:
+            args = json.loads(text)
+        except ValueError:
+            return None
+        return args if isinstance(args, dict) else None
@@ -0,0 +1,134 @@
+"""Speculative prefetch of slow environment steps while the LLM plans."""
+
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from metrics import metrics
+from runtime import SandboxedRuntime
+
+from .ledger import WATCHED_FILES, step_key
+from .scheduler import classify_step, paths_overlap
+
+
+def _normalize_args(args: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop unset args so {} and {"path": None} identify the same call."""
+    return {k: v for k, v in (args or {}).items() if v is not None}
+
+
+class Prefetcher:
+    """Runs the environment steps a plan will most likely need, early.
+
+    Predictions come from the same workspace signals the tools use
+    (manifests for ``PackageTool``, the sandbox image for
+    ``SandboxedRuntime``). A speculative step's result is adopted when the
+    plan asks for the identical call and the files it watches are as the
+    speculative run left them (an install may write its own lockfile);
+    otherwise it is discarded. Workspace-touching speculation settles
+    before any barrier step or fs step on a watched file runs, so it never
+    overlaps a step that could observe it.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.workspace = executor.workspace
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._background: List["asyncio.Task[Any]"] = []
+
+    def predict(self) -> List[Dict[str, Any]]:
+        """Plan steps the workspace suggests will be needed."""
+        manager = self.executor.pkg._detect_from_files(self.workspace)
+        has_lockfile = (self.workspace / "requirements.txt").exists()
+        if manager in ("npm", "pnpm", "yarn") or (manager == "python" and has_lockfile):
+            return [{"tool": "pkg_install", "args": {}}]
+        return []
+
+    def _snapshot(self, tool: str) -> Dict[str, Optional[str]]:
+        """Digests of the files a tool reads and may rewrite."""
+        digests = {}
+        for name in WATCHED_FILES[tool]:
+            try:
+                data = (self.workspace / name).read_bytes()
+            except OSError:
+                digests[name] = None
+                continue
+            digests[name] = hashlib.sha256(data).hexdigest()
+        return digests
+
+    async def _speculate(self, tool: str, args: Dict[str, Any]):
+        result = await self.executor._execute_memoized(tool, args)
+        # Taken once the step is done, so files it wrote count as its own
+        return result, self._snapshot(tool)
+
+    def _observes(self, tool: str, args: Dict[str, Any]) -> bool:
+        """Whether a step could see or disturb in-flight speculation."""
+        kind, path = classify_step({"tool": tool, "args": args}, self.workspace)
+        if kind == "barrier":
+            return True
+        if kind not in ("read", "write"):
+            return False
+        return any(
+            paths_overlap(path, (name,))
+            for spec in self._pending.values()
+            for name in WATCHED_FILES[spec["tool"]]
+        )
+
+    def start(self):
+        """Launch speculative work in the background."""
+        for step in self.predict():
+            tool, args = step["tool"], step["args"]
+            self._pending[step_key(tool, args)] = {
+                "tool": tool,
+                "task": asyncio.ensure_future(self._speculate(tool, args)),
+            }
+            self.executor.logger.info(f"Prefetch started: {tool}", tool=tool)
+
+        runtime = self.executor.shell.runtime
+        if isinstance(runtime, SandboxedRuntime):
+            # Pulling the image and starting pooled containers touches no
+            # workspace files; nothing to adopt
+            self._background.append(asyncio.ensure_future(runtime.warm_async()))
+
+    async def adopt(self, tool: str, args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the speculative result for this call, if still valid."""
+        spec = self._pending.pop(step_key(tool, _normalize_args(args)), None)
+        if spec is None:
+            if self._pending and self._observes(tool, args):
+                await self.settle()
+            return None
+
+        try:
+            result, snapshot = await spec["task"]
+        except Exception:
+            result, snapshot = None, None
+
+        if (
+            not result
+            or not result.get("success")
+            or result.get("denied")
+            or snapshot != self._snapshot(tool)
+        ):
+            metrics.record_prefetch_discarded()
+            self.executor.logger.info(f"Prefetch discarded: {tool}", tool=tool)
+            return None
+
+        metrics.record_prefetch_adopted()
+        self.executor.logger.info(f"Prefetch adopted: {tool}", tool=tool)
+        return {**result, "prefetched": True}
+
+    async def settle(self):
+        """Wait for in-flight workspace speculation to finish."""
+        tasks = [spec["task"] for spec in self._pending.values()]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def cancel(self):
+        """Discard all speculation that was not adopted."""
+        for spec in self._pending.values():
+            if not spec["task"].done():
+                spec["task"].cancel()
+            metrics.record_prefetch_discarded()
+        self._pending.clear()
+        for task in self._background:
+            if not task.done():
+                task.cancel()
+        self._background.clear()
@@ -0,0 +1,187 @@
+"""Compact map of a workspace for grounding the planner."""
+
+import ast
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .memo import IGNORED_DIRS
+from .tokens import estimate_tokens
+
+# Files larger than this are listed but not parsed for symbols
+MAX_PARSE_BYTES = 512 * 1024
+
+JS_SUFFIXES = {".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx"}
+
+_JS_SYMBOL = re.compile(
+    r"^(?:export\s+(?:default\s+)?)?(?:async\s+)?"
+    r"(function\*?|class|const|let|var|interface|type)\s+([A-Za-z_$][\w$]*)",
+    re.MULTILINE,
+)
+
+
+def python_symbols(source: str) -> List[str]:
+    """Top-level classes and functions of a Python module."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+
+    symbols = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            methods = [
+                n.name
+                for n in node.body
+                if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+                and not n.name.startswith("_")
+            ]
+            suffix = f"({', '.join(methods)})" if methods else ""
+            symbols.append(f"class {node.name}{suffix}")
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append(f"def {node.name}")
+    return symbols
+
+
+def js_symbols(source: str) -> List[str]:
+    """Top-level declarations of a JavaScript/TypeScript module."""
+    symbols = []
+    for kind, name in _JS_SYMBOL.findall(source):
+        kind = "function" if kind.startswith("function") else kind
+        if kind in ("let", "var"):
+            kind = "const"
+        symbols.append(f"{kind} {name}")
+    return list(dict.fromkeys(symbols))
+
+
+# Symbol extractor per file suffix
+PARSERS: Dict[str, Callable[[str], List[str]]] = {
+    ".py": python_symbols,
+    **{suffix: js_symbols for suffix in JS_SUFFIXES},
+}
+
+
+def _format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size}B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f}K"
+    return f"{size / (1024 * 1024):.1f}M"
+
+
+class RepoMap:
+    """Tree, file sizes and top-level symbols of a workspace.
+
+    Per-file entries are cached on disk and only re-parsed when a file's
+    mtime or size changes, so rebuilding the map between iterations is
+    cheap.
+    """
+
+    def __init__(
+        self,
+        workspace: Path,
+        cache_path: Optional[Path] = None,
+        parsers: Optional[Dict[str, Callable[[str], List[str]]]] = None,
+    ):
+        self.workspace = Path(workspace).resolve()
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.parsers = PARSERS if parsers is None else parsers
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.cache_path:
+            return {}
+        try:
+            return json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self._entries), encoding="utf-8")
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def _symbols(self, path: Path, size: int) -> List[str]:
+        parse = self.parsers.get(path.suffix)
+        if parse is None or size > MAX_PARSE_BYTES:
+            return []
+        try:
+            return parse(path.read_text(encoding="utf-8", errors="replace"))
+        except OSError:
+            return []
+
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        """Rescan the workspace, re-parsing only files that changed."""
+        entries = {}
+        changed = False
+        for dirpath, dirnames, filenames in os.walk(self.workspace):
+            dirnames[:] = sorted(
+                d for d in dirnames if d not in IGNORED_DIRS and not d.startswith(".")
+            )
+            for name in filenames:
+                path = Path(dirpath) / name
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                rel = path.relative_to(self.workspace).as_posix()
+                entry = self._entries.get(rel)
+                if not entry or (entry["mtime_ns"], entry["size"]) != (
+                    st.st_mtime_ns,
+                    st.st_size,
+                ):
+                    entry = {
+                        "mtime_ns": st.st_mtime_ns,
+                        "size": st.st_size,
+                        "symbols": self._symbols(path, st.st_size),
+                    }
+                    changed = True
+                entries[rel] = entry
+
+        if changed or entries.keys() != self._entries.keys():
+            self._entries = entries
+            self._save()
+        return entries
+
+    def render(self, max_tokens: int) -> str:
+        """Render the map, trimmed to roughly `max_tokens` tokens.
+
+        Shallow files are kept first; a file's symbols are dropped before
+        the file itself.
+        """
+        entries = self.refresh()
+        if not entries:
+            return ""
+
+        budget = max_tokens
+        lines: Dict[str, str] = {}
+        by_priority = sorted(entries, key=lambda rel: (rel.count("/"), rel))
+        for rel in by_priority:
+            entry = entries[rel]
+            bare = f"{rel} ({_format_size(entry['size'])})"
+            full = bare
+            if entry["symbols"]:
+                full = f"{bare}: {'; '.join(entry['symbols'])}"
+
+            for line in (full, bare):
+                cost = estimate_tokens(line)
+                if cost <= budget:
+                    lines[rel] = line
+                    budget -= cost
+                    break
+            else:
+                break
+
+        omitted = len(entries) - len(lines)
+        rendered = [lines[rel] for rel in sorted(lines)]
+        if omitted:
+            rendered.append(f"... {omitted} more files")
+        return "\n".join(rendered)
@@ -0,0 +1,64 @@
+"""Per-phase model selection for LLM requests."""
+
+from typing import Any, Dict, Optional, Tuple
+
+from config import config
+
+# Phases of a job that call the LLM
+PHASES = ("plan", "fix", "summarize")
+
+
+def usage_tokens(usage: Any) -> Tuple[int, int]:
+    """Prompt and completion token counts of a response's usage block."""
+    if usage is None:
+        return 0, 0
+    return (
+        getattr(usage, "prompt_tokens", 0) or 0,
+        getattr(usage, "completion_tokens", 0) or 0,
+    )
+
+
+class ModelRouter:
+    """Picks the model for each LLM phase.
+
+    Every phase uses ``default_model`` unless ``phase_models`` overrides
+    it. Fix plans escalate to ``escalation_model`` once
+    ``escalate_after`` iterations in a row have failed, i.e. only after a
+    fix attempt on the cheaper model has itself failed.
+    """
+
+    def __init__(
+        self,
+        default_model: str,
+        phase_models: Optional[Dict[str, str]] = None,
+        escalation_model: Optional[str] = None,
+        escalate_after: int = 2,
+    ):
+        self.default_model = default_model
+        self.phase_models = {k: v for k, v in (phase_models or {}).items() if v}
+        self.escalation_model = escalation_model or None
+        self.escalate_after = escalate_after
+
+    @classmethod
+    def from_config(cls, default_model: Optional[str] = None) -> "ModelRouter":
+        """Build a router from JJ_*_MODEL settings.
+
+        An explicit `default_model` (e.g. from --model) applies to every
+        phase and takes precedence over the per-phase settings.
+        """
+        return cls(
+            default_model or config.model,
+            phase_models={} if default_model else config.phase_models,
+            escalation_model=config.escalation_model,
+            escalate_after=config.escalate_after,
+        )
+
+    def select(self, phase: str, failed_iterations: int = 0) -> str:
+        """Return the model to use for a phase."""
+        if (
+            phase == "fix"
+            and self.escalation_model
+            and failed_iterations >= self.escalate_after
+        ):
+            return self.escalation_model
+        return self.phase_models.get(phase, self.default_model)
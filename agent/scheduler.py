@@ -0,0 +1,194 @@
+"""Dependency-aware scheduling of plan steps."""
+
+import asyncio
+import posixpath
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+# Tools whose only side effect is on the path named in their args
+FS_READ_TOOLS = {"fs_read"}
+FS_WRITE_TOOLS = {"fs_write", "fs_patch", "fs_mkdir"}
+
+
+def normalize_path(
+    path: Any, workspace: Optional[Union[str, Path]] = None
+) -> Tuple[str, ...]:
+    """Normalize a step path into a tuple of workspace-relative components.
+
+    Absolute paths inside `workspace` are made relative to it, so
+    ``/ws/a.py`` and ``a.py`` compare equal. Other absolute paths keep a
+    leading "/" component and never match a workspace-relative path.
+    """
+    text = posixpath.normpath(str(path or ".").replace("\\", "/"))
+    if text.startswith("/"):
+        if workspace is not None:
+            root = posixpath.normpath(str(workspace).replace("\\", "/"))
+            relative = posixpath.relpath(text, root)
+            if relative != ".." and not relative.startswith("../"):
+                text = relative
+        if text.startswith("/"):
+            return ("/", *[part for part in text.split("/") if part])
+    if text in ("", "."):
+        return ()
+    return tuple(text.split("/"))
+
+
+def paths_overlap(a: Tuple[str, ...], b: Tuple[str, ...]) -> bool:
+    """Return True if one path equals or contains the other."""
+    shorter = min(len(a), len(b))
+    return a[:shorter] == b[:shorter]
+
+
+def classify_step(
+    step: Dict[str, Any], workspace: Optional[Union[str, Path]] = None
+) -> Tuple[str, Optional[Tuple[str, ...]]]:
+    """Classify a step as "read", "write", "barrier" or "none".
+
+    fs_* steps touch a single path and can run alongside steps on unrelated
+    paths. Everything else (shell_run, git_*, pkg_install, ...) may touch
+    arbitrary files and acts as an ordering barrier.
+    """
+    tool = step.get("tool")
+    if not isinstance(tool, str) or not tool:
+        return "none", None
+
+    args = step.get("args") or {}
+    if tool in FS_READ_TOOLS:
+        return "read", normalize_path(args.get("path"), workspace)
+    if tool in FS_WRITE_TOOLS:
+        return "write", normalize_path(args.get("path"), workspace)
+    return "barrier", None
+
+
+class DependencyGraph:
+    """Incrementally derives ordering constraints between plan steps.
+
+    Steps are added in plan order and each one only depends on steps added
+    before it, so the graph can be built while a plan is still streaming in.
+    Absolute step paths are compared relative to `workspace` when given.
+    """
+
+    def __init__(self, workspace: Optional[Union[str, Path]] = None):
+        self.workspace = workspace
+        self.kinds: List[str] = []
+        self.paths: List[Optional[Tuple[str, ...]]] = []
+        self.dependencies: List[Set[int]] = []
+        self._ids: Dict[str, int] = {}
+        self._last_barrier: Optional[int] = None
+        self._since_barrier: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def _explicit_dependencies(self, step: Dict[str, Any]) -> Set[int]:
+        """Resolve `depends_on` hints (step ids or 1-based step numbers)."""
+        hints = step.get("depends_on") or []
+        if not isinstance(hints, (list, tuple)):
+            hints = [hints]
+
+        resolved = set()
+        for hint in hints:
+            if isinstance(hint, int) and 1 <= hint <= len(self.kinds):
+                resolved.add(hint - 1)
+            elif isinstance(hint, str) and hint in self._ids:
+                resolved.add(self._ids[hint])
+        return resolved
+
+    def add(self, step: Dict[str, Any]) -> Set[int]:
+        """Add a step and return the indexes of the steps it must wait for."""
+        index = len(self.kinds)
+        kind, path = classify_step(step, self.workspace)
+        deps = self._explicit_dependencies(step)
+
+        if kind == "barrier":
+            deps.update(self._since_barrier)
+            if self._last_barrier is not None:
+                deps.add(self._last_barrier)
+            self._last_barrier = index
+            self._since_barrier = []
+        elif kind in ("read", "write"):
+            if self._last_barrier is not None:
+                deps.add(self._last_barrier)
+            for other in self._since_barrier:
+                other_kind = self.kinds[other]
+                if other_kind == "read" and kind == "read":
+                    continue
+                other_path = self.paths[other]
+                if other_path is not None and paths_overlap(path, other_path):
+                    deps.add(other)
+            self._since_barrier.append(index)
+
+        self.kinds.append(kind)
+        self.paths.append(path)
+        self.dependencies.append(deps)
+
+        step_id = step.get("id")
+        if isinstance(step_id, str) and step_id:
+            self._ids[step_id] = index
+
+        return deps
+
+
+class StepScheduler:
+    """Runs plan steps concurrently while respecting their dependencies."""
+
+    def __init__(
+        self,
+        run_step: Callable[[int, Dict[str, Any]], Awaitable[Any]],
+        max_parallel: int = 4,
+        workspace: Optional[Union[str, Path]] = None,
+    ):
+        self.run_step = run_step
+        self.max_parallel = max(1, int(max_parallel))
+        self.graph = DependencyGraph(workspace)
+        self._semaphore = asyncio.Semaphore(self.max_parallel)
+        self._tasks: List["asyncio.Task[Any]"] = []
+
+    def submit(self, step: Dict[str, Any]) -> int:
+        """Schedule a step; it starts as soon as its dependencies finish."""
+        index = len(self.graph)
+        deps = self.graph.add(step)
+        waits = [self._tasks[d] for d in sorted(deps)]
+        self._tasks.append(asyncio.ensure_future(self._run(index, step, waits)))
+        return index
+
+    async def _run(
+        self, index: int, step: Dict[str, Any], waits: List["asyncio.Task[Any]"]
+    ) -> Any:
+        if waits:
+            # A failed dependency does not stop dependents; the executor
+            # reports every step's own outcome.
+            await asyncio.gather(*waits, return_exceptions=True)
+        async with self._semaphore:
+            return await self.run_step(index, step)
+
+    async def drain(self) -> List[Any]:
+        """Wait for all submitted steps and return their results in order.
+
+        If the drain is cancelled (e.g. by a timeout), unfinished steps are
+        cancelled too; `completed()` still returns the steps that finished.
+        """
+        try:
+            return list(await asyncio.gather(*self._tasks))
+        except BaseException:
+            await self.shutdown()
+            raise
+
+    async def shutdown(self):
+        """Cancel unfinished steps and wait until they have stopped."""
+        self.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def completed(self) -> Dict[int, Any]:
+        """Results of the steps that finished, keyed by submission index."""
+        return {
+            i: task.result()
+            for i, task in enumerate(self._tasks)
+            if task.done() and not task.cancelled() and task.exception() is None
+        }
+
+    def cancel(self):
+        """Cancel every step that has not finished yet."""
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
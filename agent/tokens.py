@@ -0,0 +1,11 @@
+"""Cheap token estimates for sizing LLM context."""
+
+# Average characters per token for English text and code
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text."""
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
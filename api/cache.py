@@ -0,0 +1,118 @@
+"""On-disk cache of LLM responses."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Canonical hash of a chat completion request.
+
+    Covers every request argument (model, messages, tools, tool_choice,
+    temperature, ...) with keys sorted, so argument order does not matter.
+    """
+    payload = json.dumps(
+        request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with a TTL and LRU size limit.
+
+    Bodies are stored as zlib-compressed JSON in a single database file.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: float, max_bytes: int):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " body BLOB NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection that commits on success and always closes."""
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached response, refreshing its LRU position."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT created, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            created, body = row
+            if self.ttl_seconds and now - created > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+
+        try:
+            return json.loads(zlib.decompress(body))
+        except (zlib.error, ValueError):
+            return None
+
+    def put(self, key: str, response: Dict[str, Any]):
+        """Store a response and evict old entries beyond max_bytes."""
+        body = zlib.compress(json.dumps(response, separators=(",", ":")).encode())
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, created, accessed, size, body)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, now, now, len(body), body),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then least recently used ones over the limit."""
+        if self.ttl_seconds:
+            conn.execute(
+                "DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)
+            )
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        excess = total[0] - self.max_bytes
+        if excess <= 0:
+            return
+
+        victims = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed"
+        ):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
@@ -0,0 +1,172 @@
+"""Record/replay of LLM traffic for offline, repeatable runs."""
+
+import asyncio
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from jj_agent.logging import get_logger
+
+from .cache import request_key
+
+logger = get_logger()
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recorded response matches a request."""
+
+
+class Cassette:
+    """Records chat completion requests and responses to a JSONL file.
+
+    Each line holds one interaction: the request, its key, the response
+    (or every streamed chunk with its offset from the request start) and
+    the observed latency. In replay mode responses are served from the
+    file without network access; ``latency_scale`` replays the recorded
+    timing (1.0), speeds it up, or disables it (0.0).
+
+    Requests are matched by their canonical key. Unless ``strict`` is
+    set, a request with no exact match gets the next unused interaction
+    for the same model and streaming mode in recorded order, so a
+    cassette survives small prompt changes such as different absolute
+    paths. Each such fallback is logged as a warning.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        mode: str = "replay",
+        latency_scale: float = 0.0,
+        strict: bool = False,
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self._interactions: List[Dict[str, Any]] = []
+        self._by_key: Dict[str, List[int]] = defaultdict(list)
+        self._used: set = set()
+
+        if self.replaying:
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self):
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except OSError as e:
+            raise ValueError(f"Cannot read cassette {self.path}: {e}") from e
+        for line in lines:
+            if not line.strip():
+                continue
+            interaction = json.loads(line)
+            self._by_key[interaction["key"]].append(len(self._interactions))
+            self._interactions.append(interaction)
+
+    def _append(self, interaction: Dict[str, Any]):
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(interaction, default=str) + "\n")
+
+    async def send(
+        self, kwargs: Dict[str, Any], send: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Serve a request from the cassette, or forward and record it."""
+        if self.replaying:
+            return await self._replay(kwargs)
+        return await self._record(kwargs, send)
+
+    async def _record(
+        self, kwargs: Dict[str, Any], send: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        start = time.monotonic()
+        response = await send()
+        latency = time.monotonic() - start
+        interaction = {
+            "key": request_key(kwargs),
+            "request": kwargs,
+            "latency": latency,
+        }
+        if kwargs.get("stream"):
+            return self._record_stream(interaction, response, start)
+
+        interaction["response"] = response.model_dump(mode="json")
+        self._append(interaction)
+        return response
+
+    async def _record_stream(
+        self, interaction: Dict[str, Any], stream: Any, start: float
+    ) -> AsyncIterator[Any]:
+        chunks = []
+        async for chunk in stream:
+            chunks.append(
+                {
+                    "offset": time.monotonic() - start,
+                    "chunk": chunk.model_dump(mode="json"),
+                }
+            )
+            yield chunk
+        interaction["chunks"] = chunks
+        self._append(interaction)
+
+    def _match(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Find the recorded interaction for a request."""
+        for index in self._by_key.get(request_key(kwargs), []):
+            if index not in self._used:
+                self._used.add(index)
+                return self._interactions[index]
+
+        if not self.strict:
+            model = kwargs.get("model")
+            stream = bool(kwargs.get("stream"))
+            for index, interaction in enumerate(self._interactions):
+                if (
+                    index in self._used
+                    or ("chunks" in interaction) != stream
+                    or interaction["request"].get("model") != model
+                ):
+                    continue
+                self._used.add(index)
+                logger.warning(
+                    "Cassette fallback: replaying an inexact match",
+                    cassette=str(self.path),
+                    model=model,
+                    stream=stream,
+                    interaction=index,
+                )
+                return interaction
+
+        raise CassetteMiss(
+            f"No recorded response in {self.path} for request "
+            f"(model={kwargs.get('model')}, stream={bool(kwargs.get('stream'))})"
+        )
+
+    async def _sleep(self, seconds: float):
+        if self.latency_scale > 0 and seconds > 0:
+            await asyncio.sleep(seconds * self.latency_scale)
+
+    async def _replay(self, kwargs: Dict[str, Any]) -> Any:
+        interaction = self._match(kwargs)
+        await self._sleep(interaction.get("latency", 0))
+        if "chunks" in interaction:
+            return self._replay_stream(interaction)
+        return ChatCompletion.model_validate(interaction["response"])
+
+    async def _replay_stream(
+        self, interaction: Dict[str, Any]
+    ) -> AsyncIterator[ChatCompletionChunk]:
+        previous = interaction.get("latency", 0)
+        for recorded in interaction["chunks"]:
+            await self._sleep(recorded["offset"] - previous)
+            previous = recorded["offset"]
+            yield ChatCompletionChunk.model_validate(recorded["chunk"])
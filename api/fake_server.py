@@ -0,0 +1,235 @@
+"""OpenAI-compatible stand-in server for load and latency testing.
+
+Speaks the chat-completions tool-calling protocol the Planner relies on,
+returning scripted or randomly generated plans, optionally streamed, with
+configurable latency, error rate and token counts. Point LLMClient at it
+with JJ_LLM_BASE_URL (or `jj run --base-url`); start it with
+`jj fake-llm`.
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.tokens import CHARS_PER_TOKEN, estimate_tokens  # noqa: E402
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+# Transient errors real APIs return under load
+ERROR_STATUSES = (429, 500, 503)
+
+
+class FakeLLM:
+    """Generates chat completion responses and their timing."""
+
+    def __init__(
+        self,
+        latency_ms: float = 300,
+        jitter_ms: float = 100,
+        distribution: str = "lognormal",
+        chunk_delay_ms: float = 10,
+        error_rate: float = 0.0,
+        completion_tokens: int = 200,
+        script: Optional[List[List[Dict[str, Any]]]] = None,
+        seed: Optional[int] = None,
+    ):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.distribution = distribution
+        self.chunk_delay_ms = chunk_delay_ms
+        self.error_rate = error_rate
+        self.completion_tokens = completion_tokens
+        self.random = random.Random(seed)
+        self._script = itertools.cycle(script) if script else None
+        self.requests = 0
+
+    @classmethod
+    def load_script(cls, path: Path) -> List[List[Dict[str, Any]]]:
+        """Load scripted plans: a JSON list of plans, each a list of steps."""
+        plans = json.loads(Path(path).read_text(encoding="utf-8"))
+        if not isinstance(plans, list) or not all(isinstance(p, list) for p in plans):
+            raise ValueError("Script must be a JSON list of plans (lists of steps)")
+        return plans
+
+    def latency(self) -> float:
+        """Sample a time-to-first-token in seconds."""
+        if self.distribution == "fixed":
+            ms = self.latency_ms
+        elif self.distribution == "uniform":
+            ms = self.random.uniform(
+                self.latency_ms - self.jitter_ms, self.latency_ms + self.jitter_ms
+            )
+        else:
+            # Long right tail, median at latency_ms
+            sigma = self.jitter_ms / self.latency_ms if self.latency_ms else 0
+            ms = self.latency_ms * self.random.lognormvariate(0, sigma)
+        return max(0.0, ms / 1000)
+
+    def error_status(self) -> Optional[int]:
+        """Status code of an injected failure, or None."""
+        if self.error_rate and self.random.random() < self.error_rate:
+            return self.random.choice(ERROR_STATUSES)
+        return None
+
+    def plan(self) -> List[Dict[str, Any]]:
+        """Next scripted plan, or a random plan of file writes."""
+        if self._script is not None:
+            return next(self._script)
+
+        steps = self.random.randint(1, 5)
+        content_chars = max(1, self.completion_tokens * CHARS_PER_TOKEN // steps)
+        plan: List[Dict[str, Any]] = [{"tool": "fs_mkdir", "args": {"path": "src"}}]
+        for i in range(steps):
+            body = "".join(
+                self.random.choice("abcdefghij \n") for _ in range(content_chars)
+            )
+            plan.append(
+                {
+                    "tool": "fs_write",
+                    "args": {
+                        "path": f"src/module_{i}.py",
+                        "content": f'"""{body}"""\n',
+                    },
+                }
+            )
+        return plan
+
+    def _tool_calls(self, plan: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {
+                    "name": step["tool"],
+                    "arguments": json.dumps(step.get("args", {})),
+                },
+            }
+            for step in plan
+        ]
+
+    def _usage(self, body: Dict[str, Any], tool_calls: List[Dict[str, Any]]):
+        prompt_tokens = estimate_tokens(json.dumps(body.get("messages", [])))
+        completion_tokens = sum(
+            estimate_tokens(c["function"]["arguments"]) for c in tool_calls
+        )
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """A full (non-streaming) chat completion."""
+        tool_calls = self._tool_calls(self.plan())
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls",
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": tool_calls,
+                    },
+                }
+            ],
+            "usage": self._usage(body, tool_calls),
+        }
+
+    async def stream(self, body: Dict[str, Any]) -> AsyncIterator[str]:
+        """Server-sent events for a streamed completion."""
+        tool_calls = self._tool_calls(self.plan())
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        def event(choices, usage=None) -> str:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": choices,
+            }
+            if usage is not None:
+                chunk["usage"] = usage
+            return f"data: {json.dumps(chunk)}\n\n"
+
+        def delta(tool_call: Dict[str, Any]) -> List[Dict[str, Any]]:
+            return [{"index": 0, "delta": {"tool_calls": [tool_call]}}]
+
+        piece = 8 * CHARS_PER_TOKEN
+        for index, call in enumerate(tool_calls):
+            # Header first, then the arguments in ~8-token pieces
+            yield event(
+                delta(
+                    {
+                        "index": index,
+                        "id": call["id"],
+                        "type": "function",
+                        "function": {"name": call["function"]["name"]},
+                    }
+                )
+            )
+            arguments = call["function"]["arguments"]
+            for start in range(0, len(arguments), piece):
+                await asyncio.sleep(self.chunk_delay_ms / 1000)
+                yield event(
+                    delta(
+                        {
+                            "index": index,
+                            "function": {"arguments": arguments[start : start + piece]},
+                        }
+                    )
+                )
+
+        yield event([{"index": 0, "delta": {}, "finish_reason": "tool_calls"}])
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield event([], usage=self._usage(body, tool_calls))
+        yield "data: [DONE]\n\n"
+
+
+def create_app(fake: Optional[FakeLLM] = None) -> FastAPI:
+    """Build the fake chat-completions app."""
+    fake = fake or FakeLLM()
+    app = FastAPI(title="JJ fake LLM")
+    app.state.fake = fake
+
+    @app.get("/v1/models")
+    async def models() -> Dict[str, Any]:
+        return {"object": "list", "data": [{"id": "fake", "object": "model"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        fake.requests += 1
+        await asyncio.sleep(fake.latency())
+
+        status = fake.error_status()
+        if status is not None:
+            return JSONResponse(
+                status_code=status,
+                content={"error": {"message": "Injected failure", "code": status}},
+                headers={"retry-after": "0"} if status == 429 else None,
+            )
+
+        if body.get("stream"):
+            return StreamingResponse(fake.stream(body), media_type="text/event-stream")
+        return fake.completion(body)
+
+    return app
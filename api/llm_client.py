@@ -1,22 +1,152 @@
 """LLM client wrapper for OpenAI API."""
 
-from typing import Optional
+from typing import Any, Dict, Optional
+import asyncio
 import os
+import sys
+from pathlib import Path
+
 from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import config  # noqa: E402
+from metrics import metrics  # noqa: E402
+
+from .cache import ResponseCache, request_key  # noqa: E402
+from .cassette import Cassette  # noqa: E402
+from .transport import (  # noqa: E402
+    ResilientCaller,
+    close_shared_http_client,
+    shared_http_client,
+)
+
+
+def _served_locally(response: Any) -> Any:
+    """Flag a response that never reached the API (see Planner telemetry)."""
+    if hasattr(response, "__aiter__") and not hasattr(response, "model_dump"):
+        return _LocalStream(response)
+    object.__setattr__(response, "served_locally", True)
+    return response
+
+
+class _LocalStream:
+    """A replayed chunk stream carrying the ``served_locally`` flag."""
+
+    served_locally = True
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    def __aiter__(self):
+        return self._chunks.__aiter__()
+
+
+class _Completions:
+    """``chat.completions`` facade routing requests through the client."""
+
+    def __init__(self, owner: "LLMClient"):
+        self._owner = owner
+
+    async def create(self, **kwargs):
+        return await self._owner.create(**kwargs)
+
+
+class _Chat:
+    def __init__(self, owner: "LLMClient"):
+        self.completions = _Completions(owner)
 
 
 class LLMClient:
-    """Wrapper for OpenAI API client."""
+    """Wrapper for OpenAI API client.
+
+    When a ResponseCache is given, identical non-streaming requests are
+    answered from disk instead of calling the API again. API requests go
+    through the shared pooled transport with retries and optional hedging
+    (see api.transport). With a Cassette, traffic is recorded to or
+    replayed from a file instead (see api.cassette); replay needs no API
+    key, and the response cache is bypassed so every request is captured.
+    """
 
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-mini"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = "gpt-4o-mini",
+        cache: Optional[ResponseCache] = None,
+        caller: Optional[ResilientCaller] = None,
+        cassette: Optional[Cassette] = None,
+        base_url: Optional[str] = None,
+    ):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
+            if not (cassette and cassette.replaying):
+                raise ValueError("OPENAI_API_KEY environment variable not set")
+            self.api_key = "cassette-replay"
 
         self.model = model
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        self.cassette = cassette
+        self.cache = cache if cassette is None else None
+        self.caller = caller or ResilientCaller.from_config()
+        # base_url points at any OpenAI-compatible server, e.g. api.fake_server
+        self.base_url = base_url or config.llm_base_url or None
+        # Built on first use, and again whenever the event loop changes
+        self.client: Any = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._chat = _Chat(self)
 
     @property
     def chat(self):
-        """Access chat completions."""
-        return self.client.chat.completions
+        """Access the chat API (``chat.completions.create``)."""
+        return self._chat
+
+    async def create(self, cache_bypass: bool = False, **kwargs: Any):
+        """Create a chat completion, consulting the response cache first.
+
+        Streaming requests always go to the API; ``cache_bypass`` forces a
+        fresh response (which still refreshes the cache).
+        """
+        if kwargs.get("stream"):
+            # Hedging a stream would duplicate every chunk downstream
+            return await self.caller.call(lambda: self._send(kwargs), hedge=False)
+        if self.cache is None:
+            return await self.caller.call(lambda: self._send(kwargs))
+
+        key = request_key(kwargs)
+        if not cache_bypass:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                metrics.record_llm_cache_hit()
+                return _served_locally(ChatCompletion.model_validate(cached))
+            metrics.record_llm_cache_miss()
+
+        response = await self.caller.call(lambda: self._send(kwargs))
+        await asyncio.to_thread(self.cache.put, key, response.model_dump(mode="json"))
+        return response
+
+    async def aclose(self):
+        """Close the pooled HTTP client of the running event loop."""
+        self.client = None
+        self._client_loop = None
+        await close_shared_http_client()
+
+    def _api(self):
+        loop = asyncio.get_running_loop()
+        if self.client is None or self._client_loop not in (None, loop):
+            # Retries are handled by the caller, not the SDK
+            self.client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=shared_http_client(),
+                max_retries=0,
+            )
+            self._client_loop = loop
+        return self.client
+
+    async def _send(self, kwargs: Dict[str, Any]):
+        if self.cassette is not None:
+            response = await self.cassette.send(
+                kwargs, lambda: self._api().chat.completions.create(**kwargs)
+            )
+            return _served_locally(response) if self.cassette.replaying else response
+        return await self._api().chat.completions.create(**kwargs)
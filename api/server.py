@@ -1,8 +1,8 @@
 """FastAPI server for daemon mode and health endpoints."""
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import JSONResponse
-from typing import Dict, Any, Union
+from typing import Dict, Any, Optional, Union
 import sys
 from pathlib import Path
 
@@ -11,9 +11,21 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from metrics import metrics
 from config import config
+from state.catalog import MAX_PAGE_SIZE
+from state.manager import StateManager
 
 app = FastAPI(title="JJ Agent API", version=config.version)
 
+_state_manager: Optional[StateManager] = None
+
+
+def get_state_manager() -> StateManager:
+    """State manager for the agent's state directory, opened on first use."""
+    global _state_manager
+    if _state_manager is None:
+        _state_manager = StateManager(Path(__file__).parent.parent / "state")
+    return _state_manager
+
 
 @app.get("/healthz")
 async def healthz() -> Dict[str, Any]:
@@ -21,7 +33,7 @@ async def healthz() -> Dict[str, Any]:
     return {"status": "healthy", "version": config.version}
 
 
-@app.get("/readyz")
+@app.get("/readyz", response_model=None)
 async def readyz() -> Union[Dict[str, Any], JSONResponse]:
     """Readiness probe."""
     # Check if we can load capabilities
@@ -48,6 +60,38 @@ async def version() -> Dict[str, str]:
     return {"version": config.version}
 
 
+@app.get("/runs")
+async def list_runs(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[str] = None,
+    workspace: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """List runs newest first; pass ``next_cursor`` back to page."""
+    try:
+        return get_state_manager().catalog.list(
+            limit=limit,
+            status=status,
+            workspace=workspace,
+            since=since,
+            until=until,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@app.get("/runs/{run_id}")
+async def get_run(run_id: str) -> Dict[str, Any]:
+    """Get a run's header and steps."""
+    run = get_state_manager().get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Run not found: {run_id}")
+    return run
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,183 @@
+"""Resilient request layer for LLM calls.
+
+One pooled keep-alive HTTP client per event loop is shared by every
+LLMClient in the process. Requests are retried with jittered exponential backoff on rate
+limits, server errors and connection failures, and can optionally be
+hedged: when a request is slower than the recent p95, a duplicate is sent
+and whichever answers first wins.
+"""
+
+import asyncio
+import random
+import sys
+import time
+import weakref
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Optional
+
+import httpx
+import openai
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import config  # noqa: E402
+from metrics import metrics  # noqa: E402
+
+# Pooled connections belong to the loop that opened them
+_shared_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def shared_http_client() -> httpx.AsyncClient:
+    """Return the pooled HTTP client for LLM requests on the running loop."""
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.llm_max_connections,
+                max_keepalive_connections=config.llm_max_connections,
+                keepalive_expiry=60,
+            ),
+            timeout=httpx.Timeout(config.llm_timeout_seconds, connect=10),
+        )
+        _shared_clients[loop] = client
+    return client
+
+
+async def close_shared_http_client():
+    """Close the running loop's pooled HTTP client, if one was opened."""
+    client = _shared_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, 5xx responses and connection failures are transient."""
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (openai.APIConnectionError, httpx.TransportError))
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Server-requested delay from a Retry-After header, in seconds."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        """95th percentile latency, or None until enough samples exist."""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class ResilientCaller:
+    """Runs request coroutines with retries and optional hedging."""
+
+    def __init__(
+        self,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        hedge: bool = False,
+        latency: Optional[LatencyTracker] = None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.latency = latency or LatencyTracker()
+
+    @classmethod
+    def from_config(cls) -> "ResilientCaller":
+        return cls(
+            max_retries=config.llm_max_retries,
+            backoff_base=config.llm_backoff_base,
+            backoff_max=config.llm_backoff_max,
+            hedge=config.llm_hedge,
+        )
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Full-jitter exponential delay, honouring Retry-After."""
+        ceiling = min(self.backoff_max, self.backoff_base * (2**attempt))
+        delay = random.uniform(0, ceiling)
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    async def call(
+        self, send: Callable[[], Awaitable[Any]], hedge: Optional[bool] = None
+    ) -> Any:
+        """Run `send`, retrying transient failures.
+
+        `send` must create a fresh request each time it is called.
+        Streaming requests should pass hedge=False.
+        """
+        hedge = self.hedge if hedge is None else hedge
+        attempt = 0
+        while True:
+            try:
+                if hedge:
+                    return await self._hedged(send)
+                return await self._timed(send)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                metrics.record_llm_retry()
+                await asyncio.sleep(self.backoff(attempt, e))
+                attempt += 1
+
+    async def _timed(self, send: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.monotonic()
+        result = await send()
+        self.latency.record(time.monotonic() - start)
+        return result
+
+    async def _hedged(self, send: Callable[[], Awaitable[Any]]) -> Any:
+        """Send a duplicate request once the first exceeds the p95 latency."""
+        delay = self.latency.p95()
+        first = asyncio.ensure_future(self._timed(send))
+        tasks = {first}
+        try:
+            if delay is None:
+                return await first
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                metrics.record_llm_hedge()
+                tasks.add(asyncio.ensure_future(self._timed(send)))
+
+            error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            metrics.record_llm_hedge_win()
+                        return task.result()
+                    error = error or task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
@@ -0,0 +1,87 @@
+"""Microbenchmark for the caller-side cost of structured logging.
+
+Compares Logger.info (queued to the background writer) against the
+per-call path it replaced: redact, print to stderr, mkdir, open, append
+and close the log file on every call.
+
+    python benchmarks/bench_logging.py [--number N]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from jj_agent.logging import Logger  # noqa: E402
+
+PATTERNS = [r"sk-[A-Za-z0-9]{20,}", r"ghp_[A-Za-z0-9]{36}", r"xoxb-[A-Za-z0-9-]+"]
+
+
+def legacy_redact(data):
+    if isinstance(data, str):
+        for pattern in PATTERNS:
+            data = re.sub(pattern, "[REDACTED]", data, flags=re.IGNORECASE)
+        return data
+    if isinstance(data, dict):
+        return {k: legacy_redact(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [legacy_redact(item) for item in data]
+    return data
+
+
+def legacy_info(log_file: Path, stderr, message: str, **kwargs):
+    entry = legacy_redact(
+        {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "level": "INFO",
+            "message": message,
+            "job_id": "bench",
+            **kwargs,
+        }
+    )
+    line = json.dumps(entry)
+    print(line, file=stderr)
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    kwargs = {"step": 3, "tool": "shell_run", "args": {"command": "pytest -q"}}
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        legacy_file = Path(tmp) / "legacy" / "exec.log"
+        start = time.perf_counter()
+        for _ in range(args.number):
+            legacy_info(legacy_file, devnull, "Step succeeded", **kwargs)
+        legacy = time.perf_counter() - start
+
+        # The writer thread still prints to stderr; send it to /dev/null
+        sys.stderr = devnull
+        logger = Logger(job_id="bench", log_file=Path(tmp) / "new" / "exec.log")
+        start = time.perf_counter()
+        for _ in range(args.number):
+            logger.info("Step succeeded", **kwargs)
+        queued = time.perf_counter() - start
+        logger.flush(timeout=60)
+        total = time.perf_counter() - start
+        sys.stderr = sys.__stderr__
+
+    per_call = 1e6 / args.number
+    print(f"legacy per-call write : {legacy * per_call:8.2f} us/call")
+    print(f"buffered, caller side : {queued * per_call:8.2f} us/call")
+    print(f"buffered, until flush : {total * per_call:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Microbenchmark for capability policy checks.
+
+Compares the compiled CapabilityPolicy against the per-call matching it
+replaced (re-resolving denied paths, fnmatch per glob, one regex per
+allowed command), with and without the decision cache.
+
+    python benchmarks/bench_policy.py [--number N]
+"""
+
+import argparse
+import fnmatch
+import re
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from runtime.policy import CapabilityPolicy  # noqa: E402
+
+
+def capabilities(workspace: Path) -> dict:
+    """Capabilities shaped like capabilities.yaml, with more rules."""
+    return {
+        "allowed_paths": [f"{workspace}/**"],
+        "denied_paths": [f"{workspace}/secrets", "/etc", "/root/.ssh"]
+        + [f"/opt/denied{i}" for i in range(20)],
+        "deny_globs": ["*.pem", "*.key", ".env", "*.sqlite", "id_rsa*"]
+        + [f"*.secret{i}" for i in range(10)],
+        "allowed_commands": [
+            rf"^{cmd}\b"
+            for cmd in (
+                "uv pip npm pnpm yarn python python3 node npx pytest jest git "
+                "docker echo cat ls mkdir rm cp mv curl"
+            ).split()
+        ],
+        "denied_commands": ["rm -rf /", "rm -rf *", "format", "del /f /s /q"],
+    }
+
+
+def legacy_check_path(caps: dict, path: Path):
+    path = Path(path).resolve()
+    for denied in caps["denied_paths"]:
+        try:
+            path.relative_to(Path(denied).resolve())
+            return False
+        except ValueError:
+            pass
+    path_str = str(path)
+    for glob in caps["deny_globs"]:
+        if fnmatch.fnmatch(path_str, glob) or fnmatch.fnmatch(path_str, f"**/{glob}"):
+            return False
+    for allowed in caps["allowed_paths"]:
+        try:
+            path.relative_to(Path(allowed.removesuffix("/**")).resolve())
+            return True
+        except ValueError:
+            if fnmatch.fnmatch(path_str, allowed):
+                return True
+    return False
+
+
+def legacy_check_command(caps: dict, command: str):
+    for denied in caps["denied_commands"]:
+        if denied.lower() in command.lower():
+            return False
+    return any(re.match(p, command, re.IGNORECASE) for p in caps["allowed_commands"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp).resolve()
+        caps = capabilities(workspace)
+        paths = [workspace / f"src/pkg{i % 7}/module_{i}.py" for i in range(50)]
+        commands = [f"pytest tests/test_{i}.py -q" for i in range(25)] + [
+            f"git add src/module_{i}.py" for i in range(25)
+        ]
+
+        policy = CapabilityPolicy(caps)
+        uncached = CapabilityPolicy(caps, cache_size=0)
+
+        compile_seconds = timeit.timeit(lambda: CapabilityPolicy(caps), number=100)
+        print(f"compile: {compile_seconds / 100 * 1e6:.1f} us/policy")
+
+        cases = [
+            ("path legacy", lambda: [legacy_check_path(caps, p) for p in paths]),
+            ("path compiled", lambda: [uncached.check_path(p) for p in paths]),
+            ("path cached", lambda: [policy.check_path(p) for p in paths]),
+            ("cmd legacy", lambda: [legacy_check_command(caps, c) for c in commands]),
+            ("cmd compiled", lambda: [uncached.check_command(c) for c in commands]),
+            ("cmd cached", lambda: [policy.check_command(c) for c in commands]),
+        ]
+        for name, run in cases:
+            seconds = timeit.timeit(run, number=args.number)
+            per_check = seconds / (args.number * 50) * 1e6
+            print(f"{name:14s} {per_check:8.2f} us/check")
+
+        print(f"cache: {policy.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,12 @@ import sys
 from pathlib import Path
 import subprocess
 
-from ..config import config
+try:
+    from ..config import config
+except ImportError:
+    # Fallback for direct execution
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from config import config
 
 
 def cmd_doctor() -> int:
@@ -147,3 +152,119 @@ def cmd_version() -> int:
     """Print version."""
     print(f"jj-agent version {config.version}")
     return 0
+
+
+def cmd_fake_llm(args) -> int:
+    """Serve a fake OpenAI-compatible chat-completions API."""
+    import uvicorn
+    from api.fake_server import FakeLLM, create_app
+
+    try:
+        script = FakeLLM.load_script(args.script) if args.script else None
+        fake = FakeLLM(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            distribution=args.distribution,
+            chunk_delay_ms=args.chunk_delay_ms,
+            error_rate=args.error_rate,
+            completion_tokens=args.completion_tokens,
+            script=script,
+            seed=args.seed,
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    host, port = args.listen.rsplit(":", 1)
+    print(f"Fake LLM listening on http://{args.listen}/v1")
+    print(f"  export JJ_LLM_BASE_URL=http://{args.listen}/v1")
+    uvicorn.run(create_app(fake), host=host, port=int(port), log_level="warning")
+    return 0
+
+
+def cmd_runs(args) -> int:
+    """List past runs, newest first."""
+    import json
+    from datetime import datetime
+
+    from state.manager import StateManager
+
+    state_manager = StateManager(Path(__file__).parent.parent / "state")
+    if args.reindex:
+        print(f"Indexed {state_manager.reindex()} runs")
+
+    try:
+        since = datetime.fromisoformat(args.since).timestamp() if args.since else None
+        page = state_manager.catalog.list(
+            limit=args.limit,
+            status=args.status,
+            workspace=str(Path(args.workspace).resolve()) if args.workspace else None,
+            since=since,
+            cursor=args.cursor,
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    if args.json:
+        print(json.dumps(page, indent=2))
+        return 0
+
+    if not page["runs"]:
+        print("No runs found")
+        return 0
+
+    for run in page["runs"]:
+        duration = run["duration_seconds"]
+        took = f"{duration:.1f}s" if duration is not None else "-"
+        print(
+            f"{run['run_id']}  {run['started'][:19]}  {run['status']:<9}  "
+            f"{took:>8}  {run['steps']:>3} steps  {run['prompt_preview'] or ''}"
+        )
+        if run["failure"]:
+            print(f"          ↳ {run['failure']}")
+
+    if page["next_cursor"]:
+        print(f"\nMore: jj runs --cursor {page['next_cursor']}")
+    return 0
+
+
+def cmd_gc(args) -> int:
+    """Compress finished runs and delete those past the retention budgets."""
+    import json
+
+    from state.manager import StateManager
+    from state.retention import RunRetention
+
+    state_manager = StateManager(Path(__file__).parent.parent / "state")
+    max_age_days = (
+        args.max_age_days
+        if args.max_age_days is not None
+        else config.state_max_age_days
+    )
+    max_mb = args.max_mb if args.max_mb is not None else config.state_max_mb
+    try:
+        retention = RunRetention(
+            state_manager.state_dir,
+            max_age_days=max_age_days,
+            max_bytes=max_mb * 1024 * 1024,
+            compression=args.compression or config.state_compression,
+            catalog=state_manager.catalog,
+            min_idle_seconds=0 if args.now else 300,
+            abandon_after_seconds=config.max_job_minutes * 60,
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+
+    report = retention.collect()
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    mb = 1024 * 1024
+    print(f"Compressed {report['compressed_files']} files ({retention.codec or 'off'})")
+    print(f"Deleted {report['deleted_runs']} runs")
+    print(f"Reclaimed {report['reclaimed_bytes'] / mb:.1f} MB")
+    print(f"Run state now {report['total_bytes'] / mb:.1f} MB (budget {max_mb} MB)")
+    return 0
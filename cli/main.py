@@ -10,15 +10,31 @@ agent_root = Path(__file__).parent.parent
 sys.path.insert(0, str(agent_root))
 
 from config import config  # noqa: E402
+from api.cache import ResponseCache  # noqa: E402
+from api.cassette import Cassette  # noqa: E402
 from api.llm_client import LLMClient  # noqa: E402
-from agent import Planner, Executor  # noqa: E402
+from agent import Planner, PlanningError, Executor  # noqa: E402
+from agent.router import ModelRouter  # noqa: E402
 from state.manager import StateManager  # noqa: E402
+from state.retention import RunRetention  # noqa: E402
 from metrics import metrics  # noqa: E402
-from cli.commands import cmd_doctor, cmd_config_show, cmd_version  # noqa: E402
-
-
-async def run_job(args):
-    """Run a job with the given prompt."""
+from runtime import Deadline, DeadlineExceeded  # noqa: E402
+from cli.commands import (  # noqa: E402
+    cmd_doctor,
+    cmd_config_show,
+    cmd_fake_llm,
+    cmd_gc,
+    cmd_runs,
+    cmd_version,
+)
+
+
+async def run_job(args, checkpoint=None, state_manager=None):
+    """Run a job with the given prompt.
+
+    With a ``checkpoint`` (see ``resume_job``) the run's journaled plan is
+    continued instead of planning a new one.
+    """
     # Setup workspace
     if args.workspace:
         workspace = Path(args.workspace).resolve()
@@ -45,30 +61,81 @@ async def run_job(args):
 
     # Initialize components
     try:
+        cassette = None
+        if args.record or args.replay:
+            cassette = Cassette(
+                args.record or args.replay,
+                mode="record" if args.record else "replay",
+                latency_scale=args.replay_latency,
+            )
+        elif config.cassette_path:
+            cassette = Cassette(
+                config.cassette_path,
+                mode=config.cassette_mode,
+                latency_scale=config.cassette_latency_scale,
+            )
+
         api_key = args.api_key or config.get_secret("OPENAI_API_KEY")
-        if not api_key:
+        if not api_key and not (cassette and cassette.replaying):
             print("Error: OPENAI_API_KEY not set")
             print("Please set OPENAI_API_KEY environment variable or use --api-key")
             return 1
 
-        llm_client = LLMClient(api_key=api_key, model=args.model)
+        cache = None
+        if config.llm_cache and not args.no_cache:
+            cache = ResponseCache(
+                state_dir / "cache" / "llm.sqlite",
+                ttl_seconds=config.llm_cache_ttl_hours * 3600,
+                max_bytes=config.llm_cache_max_mb * 1024 * 1024,
+            )
+        llm_client = LLMClient(
+            api_key=api_key,
+            model=args.model or config.model,
+            cache=cache,
+            cassette=cassette,
+            base_url=args.base_url,
+        )
     except ValueError as e:
         print(f"Error: {e}")
         return 1
 
     # Start job
-    state_manager = StateManager(state_dir)
-    job_id = state_manager.start_run(args.prompt, workspace, dry_run=dry_run)
+    state_manager = state_manager or StateManager(state_dir)
+    if checkpoint is not None:
+        job_id = state_manager.resume_run(checkpoint["run_id"])
+    else:
+        job_id = state_manager.start_run(args.prompt, workspace, dry_run=dry_run)
+
+    # Compress and expire old runs while this one plans
+    if config.state_gc:
+        RunRetention(
+            state_dir,
+            max_age_days=config.state_max_age_days,
+            max_bytes=config.state_max_mb * 1024 * 1024,
+            compression=config.state_compression,
+            catalog=state_manager.catalog,
+            abandon_after_seconds=config.max_job_minutes * 60,
+        ).start_background()
 
     from jj_agent.logging import get_logger
 
     logger = get_logger(job_id=job_id)
     logger.info(
-        "Job started", prompt=args.prompt, workspace=str(workspace), dry_run=dry_run
+        "Job resumed" if checkpoint is not None else "Job started",
+        prompt=args.prompt,
+        workspace=str(workspace),
+        dry_run=dry_run,
     )
     metrics.record_job_start()
 
-    planner = Planner(llm_client)
+    # The job budget covers planning, execution and every retry
+    deadline = Deadline.from_minutes(
+        capabilities.get("budgets", {}).get("job_minutes", config.max_job_minutes)
+    )
+
+    # --model pins every phase; otherwise JJ_*_MODEL pick per phase
+    router = ModelRouter.from_config(args.model)
+    planner = Planner(llm_client, router=router)
     executor = Executor(
         workspace=workspace,
         capabilities=capabilities,
@@ -76,13 +143,56 @@ async def run_job(args):
         dry_run=dry_run,
         job_id=job_id,
         state_dir=state_dir,
+        max_parallel_steps=args.parallel,
+        deadline=deadline,
+        router=router,
+        state_manager=state_manager,
     )
 
+    # Live tail of command output
+    if args.follow:
+        executor.shell.spool.subscribe(
+            lambda label, stream, line: print(f"  [{label} {stream}] {line}")
+        )
+
+    # Hide LLM latency behind likely environment setup
+    if args.prefetch or config.prefetch:
+        executor.start_prefetch()
+
     try:
+        if checkpoint is not None:
+            logger.info(
+                "Resuming from checkpoint",
+                iteration=checkpoint["iteration"],
+                completed_steps=len(checkpoint["completed"]),
+                steps=len(checkpoint["plan"]),
+            )
+            return await _execute(
+                executor,
+                checkpoint["plan"],
+                state_manager,
+                logger,
+                state_dir / job_id,
+                checkpoint=checkpoint,
+            )
+
+        # Ground the plan in what the workspace already contains
+        context = await executor.workspace_context()
+
+        # Streaming overlaps planning with execution; it is skipped when the
+        # whole plan has to be shown first
+        if (args.stream or config.stream_planning) and not (args.plan or dry_run):
+            logger.info("Planning started (streaming)")
+            plan = planner.plan_stream(args.prompt, context=context, deadline=deadline)
+            return await _execute(
+                executor, plan, state_manager, logger, state_dir / job_id
+            )
+
         # Create plan
         logger.info("Planning started")
-        plan = await planner.plan(args.prompt)
+        plan = await planner.plan(args.prompt, context=context, deadline=deadline)
         logger.info(f"Plan generated with {len(plan)} steps", steps=len(plan))
+        plan = executor.optimize_plan(plan)
 
         # Show plan if requested or in dry-run
         if args.plan or dry_run:
@@ -99,23 +209,18 @@ async def run_job(args):
                 state_manager.complete_run(True, {"plan": plan})
                 return 0
 
-        # Execute plan
-        logger.info("Execution started")
-        result = await executor.execute_with_retry(plan)
-
-        # Complete run
-        state_manager.complete_run(result["success"], result)
-
-        if result["success"]:
-            logger.info("Job completed successfully")
-            print("\n✅ Execution completed successfully!")
-            return 0
-        else:
-            logger.error("Job completed with errors")
-            print("\n❌ Execution completed with errors")
-            print(f"Check state directory for logs: {state_dir / job_id}")
-            return 1
+        return await _execute(executor, plan, state_manager, logger, state_dir / job_id)
 
+    except PlanningError as e:
+        logger.error(str(e))
+        state_manager.complete_run(False, {"error": str(e)})
+        print(f"\n\n❌ {e}")
+        return 1
+    except DeadlineExceeded as e:
+        logger.error(str(e))
+        state_manager.complete_run(False, {"error": str(e), "deadline_exceeded": True})
+        print(f"\n\n⏱️  {e}")
+        return 1
     except KeyboardInterrupt:
         logger.warning("Job interrupted by user")
         state_manager.complete_run(False, {"error": "Interrupted"})
@@ -132,6 +237,57 @@ async def run_job(args):
 
         traceback.print_exc()
         return 1
+    finally:
+        await executor.aclose()
+
+
+async def resume_job(args):
+    """Continue an interrupted run from its last journaled step."""
+    state_dir = Path(__file__).parent.parent / "state"
+    state_manager = StateManager(state_dir)
+    checkpoint = state_manager.load_checkpoint(args.run_id)
+    if checkpoint is None:
+        print(f"Error: no resumable checkpoint for run {args.run_id}")
+        return 1
+
+    run = checkpoint["run"]
+    if run.get("dry_run"):
+        print(f"Error: run {args.run_id} has nothing to resume (dry run)")
+        return 1
+    if not checkpoint["interrupted"]:
+        status = run.get("status")
+        if status != "failed" or not args.force:
+            hint = "; use --force to retry it" if status == "failed" else ""
+            print(f"Error: run {args.run_id} already finished ({status}{hint})")
+            return 1
+
+    done = len(checkpoint["completed"])
+    print(
+        f"Resuming run {args.run_id} at iteration {checkpoint['iteration']} "
+        f"({done}/{len(checkpoint['plan'])} steps already done)"
+    )
+    args.prompt = run["prompt"]
+    args.workspace = run["workspace"]
+    return await run_job(args, checkpoint=checkpoint, state_manager=state_manager)
+
+
+async def _execute(executor, plan, state_manager, logger, log_dir, checkpoint=None):
+    """Execute a plan (or plan stream) and record the outcome of the run."""
+    logger.info("Execution started")
+    result = await executor.execute_with_retry(plan, checkpoint=checkpoint)
+
+    # Complete run
+    state_manager.complete_run(result["success"], result)
+
+    if result["success"]:
+        logger.info("Job completed successfully")
+        print("\n✅ Execution completed successfully!")
+        return 0
+    else:
+        logger.error("Job completed with errors")
+        print("\n❌ Execution completed with errors")
+        print(f"Check state directory for logs: {log_dir}")
+        return 1
 
 
 def main():
@@ -145,7 +301,7 @@ def main():
     # Run command
     run_parser = subparsers.add_parser("run", help="Run a job")
     run_parser.add_argument(
-        "prompt", help="Natural language prompt describing what to build"
+        "prompt", nargs="?", help="Natural language prompt describing what to build"
     )
     run_parser.add_argument(
         "--workspace",
@@ -167,14 +323,149 @@ def main():
     run_parser.add_argument(
         "--model",
         type=str,
-        default="gpt-4o-mini",
-        help="LLM model to use (default: gpt-4o-mini)",
+        default=None,
+        help="LLM model to use for every phase (default: JJ_MODEL, or "
+        "JJ_PLAN_MODEL/JJ_FIX_MODEL per phase, falling back to gpt-4o-mini)",
+    )
+    run_parser.add_argument(
+        "--base-url",
+        type=str,
+        default=None,
+        help="OpenAI-compatible API base URL (or set JJ_LLM_BASE_URL), "
+        "e.g. a 'jj fake-llm' server",
+    )
+    run_parser.add_argument(
+        "--parallel",
+        type=int,
+        default=None,
+        help="Maximum number of independent steps to run concurrently "
+        "(default: JJ_MAX_PARALLEL_STEPS or 4)",
+    )
+    run_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Start executing steps while the plan is still being generated "
+        "(or set JJ_STREAM_PLANNING=1)",
+    )
+    run_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the LLM instead of reusing cached responses "
+        "(or set JJ_LLM_CACHE=0)",
+    )
+    cassette_group = run_parser.add_mutually_exclusive_group()
+    cassette_group.add_argument(
+        "--record",
+        metavar="CASSETTE",
+        help="Record LLM requests and responses to a cassette file",
+    )
+    cassette_group.add_argument(
+        "--replay",
+        metavar="CASSETTE",
+        help="Serve LLM responses from a recorded cassette (no network or API key)",
+    )
+    run_parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=config.cassette_latency_scale,
+        help="Scale recorded LLM latency during replay (0 = none, 1 = as recorded)",
+    )
+    run_parser.add_argument(
+        "--prefetch",
+        action="store_true",
+        help="Speculatively install dependencies while planning "
+        "(or set JJ_PREFETCH=1)",
+    )
+    run_parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Print command output live as it is produced",
     )
     run_parser.add_argument(
         "--allow-web",
         action="store_true",
         help="Allow web access (requires JJ_ALLOW_WEB=1 in production)",
     )
+    run_parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Serve the HTTP API (health, metrics, runs) instead of running a job",
+    )
+    run_parser.add_argument(
+        "--listen",
+        default="127.0.0.1:5858",
+        help="Address for --daemon to listen on (host:port)",
+    )
+
+    gc_parser = subparsers.add_parser(
+        "gc", help="Compress finished runs and delete runs past the retention budget"
+    )
+    gc_parser.add_argument(
+        "--max-age-days",
+        type=float,
+        help="Delete runs older than this (default: JJ_STATE_MAX_AGE_DAYS or 30)",
+    )
+    gc_parser.add_argument(
+        "--max-mb",
+        type=int,
+        help="Size budget for run state (default: JJ_STATE_MAX_MB or 1024)",
+    )
+    gc_parser.add_argument(
+        "--compression",
+        choices=["auto", "zstd", "gzip", "none"],
+        help="Codec for finished runs (default: JJ_STATE_COMPRESSION or auto)",
+    )
+    gc_parser.add_argument(
+        "--now",
+        action="store_true",
+        help="Also compress runs that finished in the last few minutes",
+    )
+    gc_parser.add_argument("--json", action="store_true", help="Print JSON")
+
+    resume_parser = subparsers.add_parser(
+        "resume", help="Continue an interrupted run from its last completed step"
+    )
+    resume_parser.add_argument("run_id", help="Run to resume (see 'jj runs')")
+    resume_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Also resume a run that finished as failed",
+    )
+    resume_parser.add_argument(
+        "--api-key", type=str, help="OpenAI API key (or set OPENAI_API_KEY env var)"
+    )
+    resume_parser.add_argument(
+        "--model", type=str, default=None, help="LLM model for fix planning"
+    )
+    resume_parser.add_argument(
+        "--base-url", type=str, default=None, help="OpenAI-compatible API base URL"
+    )
+    resume_parser.add_argument(
+        "--parallel",
+        type=int,
+        default=None,
+        help="Maximum number of independent steps to run concurrently",
+    )
+    resume_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the LLM instead of reusing cached responses",
+    )
+    resume_parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Print command output live as it is produced",
+    )
+    # run_job options that do not apply to a resumed run
+    resume_parser.set_defaults(
+        dry_run=False,
+        plan=False,
+        stream=False,
+        prefetch=False,
+        record=None,
+        replay=None,
+        replay_latency=config.cassette_latency_scale,
+    )
 
     # Legacy: allow prompt as positional argument
     parser.add_argument("prompt_legacy", nargs="?", help=argparse.SUPPRESS)
@@ -184,6 +475,66 @@ def main():
     subparsers.add_parser("config", help="Show configuration")
     subparsers.add_parser("version", help="Show version")
 
+    runs_parser = subparsers.add_parser("runs", help="List past runs, newest first")
+    runs_parser.add_argument(
+        "--status", choices=["running", "completed", "failed"], help="Filter by status"
+    )
+    runs_parser.add_argument("--workspace", "-w", help="Filter by workspace directory")
+    runs_parser.add_argument(
+        "--since", help="Only runs started at or after this ISO date/time"
+    )
+    runs_parser.add_argument(
+        "--limit", type=int, default=20, help="Runs per page (default: 20)"
+    )
+    runs_parser.add_argument("--cursor", help="Continue from a previous page")
+    runs_parser.add_argument("--json", action="store_true", help="Print JSON")
+    runs_parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="Rebuild the run catalog from the run files first",
+    )
+
+    fake_parser = subparsers.add_parser(
+        "fake-llm", help="Serve a fake OpenAI-compatible API for load testing"
+    )
+    fake_parser.add_argument(
+        "--listen", default="127.0.0.1:8089", help="Address to listen on (host:port)"
+    )
+    fake_parser.add_argument(
+        "--latency-ms", type=float, default=300, help="Median time to first token"
+    )
+    fake_parser.add_argument(
+        "--jitter-ms", type=float, default=100, help="Latency spread"
+    )
+    fake_parser.add_argument(
+        "--distribution",
+        choices=["fixed", "uniform", "lognormal"],
+        default="lognormal",
+        help="Latency distribution",
+    )
+    fake_parser.add_argument(
+        "--chunk-delay-ms",
+        type=float,
+        default=10,
+        help="Delay between streamed chunks",
+    )
+    fake_parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of requests failing with 429/500/503",
+    )
+    fake_parser.add_argument(
+        "--completion-tokens",
+        type=int,
+        default=200,
+        help="Approximate size of generated plans",
+    )
+    fake_parser.add_argument(
+        "--script", help="JSON file with a list of plans to return in turn"
+    )
+    fake_parser.add_argument("--seed", type=int, help="Random seed")
+
     args = parser.parse_args()
 
     # Handle legacy usage (jj "prompt")
@@ -198,13 +549,21 @@ def main():
         return cmd_config_show()
     elif args.command == "version":
         return cmd_version()
+    elif args.command == "fake-llm":
+        return cmd_fake_llm(args)
+    elif args.command == "runs":
+        return cmd_runs(args)
+    elif args.command == "gc":
+        return cmd_gc(args)
+    elif args.command == "resume":
+        return asyncio.run(resume_job(args))
     elif args.command == "run":
         if args.daemon:
             # Run as daemon with API server
             from api.server import app
             import uvicorn
 
-            host, port = args.listen.split(":")
+            host, port = args.listen.rsplit(":", 1)
             uvicorn.run(app, host=host, port=int(port))
             return 0
 
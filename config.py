@@ -32,6 +32,57 @@ class Config:
         self.max_job_minutes = int(os.getenv("JJ_MAX_JOB_MINUTES", "20"))
         self.max_fetches_per_job = int(os.getenv("JJ_MAX_FETCHES_PER_JOB", "50"))
 
+        # Plan execution
+        self.max_parallel_steps = int(os.getenv("JJ_MAX_PARALLEL_STEPS", "4"))
+        self.optimize_plans = os.getenv("JJ_OPTIMIZE_PLANS", "1") == "1"
+        self.stream_planning = os.getenv("JJ_STREAM_PLANNING", "0") == "1"
+        self.prefetch = os.getenv("JJ_PREFETCH", "0") == "1"
+
+        # Model routing: per-phase models, escalating failed fix plans
+        self.model = os.getenv("JJ_MODEL", "gpt-4o-mini")
+        self.phase_models = {
+            "plan": os.getenv("JJ_PLAN_MODEL", ""),
+            "fix": os.getenv("JJ_FIX_MODEL", ""),
+            "summarize": os.getenv("JJ_SUMMARY_MODEL", ""),
+        }
+        self.escalation_model = os.getenv("JJ_ESCALATION_MODEL", "")
+        self.escalate_after = int(os.getenv("JJ_ESCALATE_AFTER", "2"))
+
+        # Workspace map sent to the planner
+        self.repo_map = os.getenv("JJ_REPO_MAP", "1") == "1"
+        self.repo_map_tokens = int(os.getenv("JJ_REPO_MAP_TOKENS", "2000"))
+
+        # Token ceiling for failure context sent with fix-plan requests
+        self.fix_context_tokens = int(os.getenv("JJ_FIX_CONTEXT_TOKENS", "4000"))
+
+        # Subprocess output kept in memory per stream; the full output
+        # spills to files in the job's state dir
+        self.capture_head_kb = int(os.getenv("JJ_CAPTURE_HEAD_KB", "16"))
+        self.capture_tail_kb = int(os.getenv("JJ_CAPTURE_TAIL_KB", "64"))
+
+        # Step result cache
+        self.step_cache = os.getenv("JJ_STEP_CACHE", "1") == "1"
+        self.step_cache_max_mb = int(os.getenv("JJ_STEP_CACHE_MAX_MB", "64"))
+
+        # LLM transport: pooled connections, retries and hedging
+        self.llm_base_url = os.getenv("JJ_LLM_BASE_URL", "")
+        self.llm_timeout_seconds = float(os.getenv("JJ_LLM_TIMEOUT_SECONDS", "120"))
+        self.llm_max_connections = int(os.getenv("JJ_LLM_MAX_CONNECTIONS", "20"))
+        self.llm_max_retries = int(os.getenv("JJ_LLM_MAX_RETRIES", "4"))
+        self.llm_backoff_base = float(os.getenv("JJ_LLM_BACKOFF_BASE", "0.5"))
+        self.llm_backoff_max = float(os.getenv("JJ_LLM_BACKOFF_MAX", "20"))
+        self.llm_hedge = os.getenv("JJ_LLM_HEDGE", "0") == "1"
+
+        # Record/replay of LLM traffic (JJ_CASSETTE_MODE=record|replay)
+        self.cassette_path = os.getenv("JJ_CASSETTE", "")
+        self.cassette_mode = os.getenv("JJ_CASSETTE_MODE", "replay")
+        self.cassette_latency_scale = float(os.getenv("JJ_CASSETTE_LATENCY", "0"))
+
+        # LLM response cache
+        self.llm_cache = os.getenv("JJ_LLM_CACHE", "1") == "1"
+        self.llm_cache_ttl_hours = float(os.getenv("JJ_LLM_CACHE_TTL_HOURS", "24"))
+        self.llm_cache_max_mb = int(os.getenv("JJ_LLM_CACHE_MAX_MB", "32"))
+
         # Web access
         self.allow_web = (
             os.getenv("JJ_ALLOW_WEB", "0") == "1" if self.is_production else True
@@ -40,7 +91,39 @@ class Config:
         # Runtime mode
         self.runtime = os.getenv(
             "JJ_RUNTIME", "localsafe"
-        ).lower()  # localsafe or sandboxed
+        ).lower()  # localsafe, session or sandboxed
+
+        # Sandboxed runtime: warm containers reused via exec (0 disables),
+        # each replaced after this many commands
+        self.sandbox_pool_size = int(os.getenv("JJ_SANDBOX_POOL_SIZE", "2"))
+        self.sandbox_pool_max_commands = int(
+            os.getenv("JJ_SANDBOX_POOL_MAX_COMMANDS", "50")
+        )
+
+        # Sandboxed runtime: pip/uv/npm caches kept under the state dir
+        self.sandbox_cache = os.getenv("JJ_SANDBOX_CACHE", "1") == "1"
+        self.sandbox_cache_max_mb = int(os.getenv("JJ_SANDBOX_CACHE_MAX_MB", "2048"))
+
+        # Session runtime: recycle the persistent shell after this many
+        # commands or seconds
+        self.session_max_commands = int(os.getenv("JJ_SESSION_MAX_COMMANDS", "200"))
+        self.session_max_age_seconds = float(
+            os.getenv("JJ_SESSION_MAX_AGE_SECONDS", "1800")
+        )
+
+        # Run state retention: finished runs are compressed, then deleted
+        # oldest first past the age or size budget (0 disables a budget)
+        self.state_gc = os.getenv("JJ_STATE_GC", "1") == "1"
+        self.state_max_age_days = float(os.getenv("JJ_STATE_MAX_AGE_DAYS", "30"))
+        self.state_max_mb = int(os.getenv("JJ_STATE_MAX_MB", "1024"))
+        self.state_compression = os.getenv("JJ_STATE_COMPRESSION", "auto")
+
+        # Structured logging: entries below the level are skipped; the rest
+        # are written by a background thread from a bounded queue
+        self.log_level = os.getenv("JJ_LOG_LEVEL", "INFO").upper()
+        self.log_stderr = os.getenv("JJ_LOG_STDERR", "1") == "1"
+        self.log_queue_size = int(os.getenv("JJ_LOG_QUEUE_SIZE", "10000"))
+        self.log_flush_seconds = float(os.getenv("JJ_LOG_FLUSH_SECONDS", "0.5"))
 
         # Secrets redaction
         self.redact_patterns = [
@@ -50,7 +133,19 @@ class Config:
         ]
 
     def load_capabilities(self, agent_dir: Path, workspace: Path) -> Dict[str, Any]:
-        """Load capabilities configuration."""
+        """Load capabilities configuration with its compiled policy attached.
+
+        The policy under the "policy" key is shared by the runtimes and
+        tools built from these capabilities.
+        """
+        from runtime.policy import CapabilityPolicy
+
+        capabilities = self._read_capabilities(agent_dir, workspace)
+        capabilities["policy"] = CapabilityPolicy(capabilities)
+        return capabilities
+
+    def _read_capabilities(self, agent_dir: Path, workspace: Path) -> Dict[str, Any]:
+        """Read capabilities from YAML, or the safe defaults."""
         if self.is_production:
             # Production mode: require capabilities.prod.yaml
             prod_file = agent_dir / "capabilities.prod.yaml"
@@ -0,0 +1,111 @@
+"""Transparent compression for files written by jj.
+
+``compress`` replaces ``x.log`` with ``x.log.zst`` (or ``.gz`` when
+``zstandard`` is not installed); ``open_text`` reads whichever variant
+exists, so readers never need to know whether a file was compressed.
+"""
+
+import gzip
+import io
+import os
+import shutil
+from pathlib import Path
+from typing import IO, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is used instead
+    zstandard = None
+
+# Codec -> file suffix; readers try them in this order
+CODECS = {"zstd": ".zst", "gzip": ".gz"}
+
+_COPY_BUFFER = 1024 * 1024
+
+
+def resolve_codec(preferred: str = "auto") -> Optional[str]:
+    """Codec to compress with: zstd when installed, else gzip; None for "none"."""
+    preferred = preferred.lower()
+    if preferred in ("none", "off", "0"):
+        return None
+    if preferred not in ("auto", "zstd", "gzip"):
+        raise ValueError(f"Unknown compression: {preferred}")
+    if preferred != "gzip" and zstandard is not None:
+        return "zstd"
+    return "gzip"
+
+
+def locate(path: Path) -> Optional[Path]:
+    """The file holding `path`'s content: itself or a compressed variant."""
+    path = Path(path)
+    if path.exists():
+        return path
+    for suffix in CODECS.values():
+        candidate = path.with_name(path.name + suffix)
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def codec_of(path: Path) -> Optional[str]:
+    """Codec a file was compressed with, from its suffix."""
+    for codec, suffix in CODECS.items():
+        if Path(path).name.endswith(suffix):
+            return codec
+    return None
+
+
+def _open_binary(path: Path, mode: str, codec: Optional[str]) -> IO[bytes]:
+    if codec == "gzip":
+        return gzip.open(path, mode, compresslevel=6)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        return zstandard.open(path, mode)
+    return open(path, mode)
+
+
+def open_text(path: Path) -> IO[str]:
+    """Open `path` (or its compressed variant) for reading text."""
+    found = locate(path)
+    if found is None:
+        raise FileNotFoundError(path)
+    codec = codec_of(found)
+    if codec is None:
+        return open(found, "r", encoding="utf-8")
+    return io.TextIOWrapper(_open_binary(found, "rb", codec), encoding="utf-8")
+
+
+def compress(path: Path, codec: str) -> int:
+    """Replace `path` with a compressed copy; returns the bytes saved."""
+    path = Path(path)
+    target = path.with_name(path.name + CODECS[codec])
+    # Unique per process so a concurrent `jj gc` cannot interleave writes
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    before = path.stat().st_size
+    try:
+        with open(path, "rb") as src, _open_binary(tmp, "wb", codec) as dst:
+            shutil.copyfileobj(src, dst, _COPY_BUFFER)
+        os.replace(tmp, target)
+    finally:
+        tmp.unlink(missing_ok=True)
+    # Both copies hold the full content; readers prefer the original
+    path.unlink(missing_ok=True)
+    return before - target.stat().st_size
+
+
+def decompress(path: Path):
+    """Restore `path` from its compressed variant, e.g. before appending."""
+    path = Path(path)
+    found = locate(path)
+    if found is None or found == path:
+        return
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with _open_binary(found, "rb", codec_of(found)) as src:
+            with open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst, _COPY_BUFFER)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    found.unlink(missing_ok=True)
@@ -1,6 +1,7 @@
 """Logging and audit system."""
 
 from .logger import Logger, get_logger
-from .audit import AuditLogger
+from .writer import LogWriter
+from .audit import AuditLogger, read_audit
 
-__all__ = ["Logger", "get_logger", "AuditLogger"]
+__all__ = ["Logger", "LogWriter", "get_logger", "AuditLogger", "read_audit"]
@@ -2,9 +2,11 @@
 
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 from datetime import datetime
 
+from ..compression import locate, open_text
+
 
 class AuditLogger:
     """Audit trail logger for all tool calls and actions."""
@@ -60,3 +62,16 @@ class AuditLogger:
                 f.write(json.dumps(audit_entry) + "\n")
         except Exception:
             pass
+
+
+def read_audit(state_dir: Path, job_id: str) -> Iterator[Dict[str, Any]]:
+    """Read a job's audit trail, whether or not it has been compressed."""
+    audit_file = Path(state_dir) / job_id / "audit.jsonl"
+    if locate(audit_file) is None:
+        return
+    with open_text(audit_file) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn line from an interrupted write
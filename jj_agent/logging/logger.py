@@ -1,33 +1,73 @@
-"""Structured JSON logging."""
+"""Structured JSON logging.
 
+Entries below the logger's level are discarded before any work is done.
+The rest are queued to a background ``LogWriter``, which redacts,
+serializes and writes them off the caller's thread.
+"""
+
+import copy
+import functools
 import json
-import sys
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, Optional, Pattern, Tuple
 from datetime import datetime
 import re
 
+from .writer import LogWriter, get_writer
+
 try:
     from ..config import config  # when installed as package
 except ImportError:
     from config import config  # fallback for direct execution
 
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+# Entries at or above this level wait for queue space instead of being dropped
+BLOCKING_LEVEL = LEVELS["WARNING"]
+
+_MUTABLE = (dict, list, set)
+
+
+@functools.lru_cache(maxsize=8)
+def _compile_redactor(patterns: Tuple[str, ...]) -> Optional[Pattern[str]]:
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+
+def _new_writer() -> LogWriter:
+    return LogWriter(
+        max_queue=config.log_queue_size,
+        flush_interval=config.log_flush_seconds,
+        stderr=config.log_stderr,
+    )
+
 
 class Logger:
     """Structured JSON logger."""
 
-    def __init__(self, job_id: Optional[str] = None, log_file: Optional[Path] = None):
+    def __init__(
+        self,
+        job_id: Optional[str] = None,
+        log_file: Optional[Path] = None,
+        level: Optional[str] = None,
+    ):
         self.job_id = job_id
-        self.log_file = log_file
+        self.log_file = Path(log_file) if log_file else None
         self.redact_patterns = config.redact_patterns
+        self.level = LEVELS.get((level or config.log_level).upper(), LEVELS["INFO"])
+        self._redactor = _compile_redactor(tuple(self.redact_patterns))
+
+    def is_enabled_for(self, level: str) -> bool:
+        """Whether entries at `level` are logged (to skip costly arguments)."""
+        return LEVELS[level] >= self.level
 
     def _redact(self, data: Any) -> Any:
         """Recursively redact secrets from data."""
         if isinstance(data, str):
-            redacted = data
-            for pattern in self.redact_patterns:
-                redacted = re.sub(pattern, "[REDACTED]", redacted, flags=re.IGNORECASE)
-            return redacted
+            if self._redactor is None:
+                return data
+            return self._redactor.sub("[REDACTED]", data)
         elif isinstance(data, dict):
             return {k: self._redact(v) for k, v in data.items()}
         elif isinstance(data, list):
@@ -35,31 +75,40 @@ class Logger:
         else:
             return data
 
+    def _format(self, log_entry: Dict[str, Any]) -> str:
+        """Redact and serialize an entry (runs on the writer thread)."""
+        return json.dumps(self._redact(log_entry), default=str)
+
     def _log(self, level: str, message: str, **kwargs):
-        """Write structured log entry."""
+        """Queue a structured log entry."""
+        level_no = LEVELS[level]
+        if level_no < self.level:
+            return
+
+        # Serialized later on the writer thread: copy containers the caller
+        # may go on mutating
         log_entry = {
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "level": level,
             "message": message,
             "job_id": self.job_id,
-            **kwargs,
+            **{
+                key: copy.copy(value) if isinstance(value, _MUTABLE) else value
+                for key, value in kwargs.items()
+            },
         }
+        get_writer(_new_writer).submit(
+            (self.log_file, log_entry, self._format), block=level_no >= BLOCKING_LEVEL
+        )
 
-        # Redact secrets
-        log_entry = self._redact(log_entry)
-
-        # Write to stdout as JSON
-        json_str = json.dumps(log_entry)
-        print(json_str, file=sys.stderr)
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything logged so far is written."""
+        return get_writer(_new_writer).flush(timeout)
 
-        # Write to file if specified
+    def close(self):
+        """Write pending entries and release this logger's file handle."""
         if self.log_file:
-            try:
-                self.log_file.parent.mkdir(parents=True, exist_ok=True)
-                with open(self.log_file, "a", encoding="utf-8") as f:
-                    f.write(json_str + "\n")
-            except Exception:
-                pass  # Don't fail on log write errors
+            get_writer(_new_writer).close_file(self.log_file)
 
     def debug(self, message: str, **kwargs):
         """Log debug message."""
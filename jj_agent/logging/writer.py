@@ -0,0 +1,235 @@
+"""Background writer for structured logs."""
+
+import atexit
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+# (log file, entry, formatter turning the entry into one line)
+Record = Tuple[Optional[Path], Dict[str, Any], Callable[[Dict[str, Any]], str]]
+
+_STOP = "stop"
+_FLUSH = "flush"
+_CLOSE = "close"
+
+
+class LogWriter:
+    """Writes log records from a bounded queue on one daemon thread.
+
+    Callers only enqueue; formatting, redaction and I/O happen on the
+    writer thread. Each log file is opened once and kept open (up to
+    ``max_open_files``, least recently used closed first). Records are
+    written in batches and flushed every ``flush_interval`` seconds, on
+    ``flush()`` and at interpreter exit.
+
+    When the queue is full, ``submit(..., block=False)`` drops the record
+    and counts it in ``dropped``; ``block=True`` (used for warnings and
+    errors) waits up to ``block_timeout`` for room first. Records whose
+    formatter raises are dropped and counted the same way.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 512,
+        flush_interval: float = 0.5,
+        max_open_files: int = 32,
+        stderr: bool = True,
+        block_timeout: float = 1.0,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_open_files = max_open_files
+        self.stderr = stderr
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._reported_drops = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._handles: "OrderedDict[Path, IO[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="jj-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, record: Record, block: bool = False) -> bool:
+        """Queue a record; returns False if it was dropped."""
+        self._ensure_started()
+        try:
+            if block:
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _control(self, command: str, arg: Any = None, timeout: float = 5.0) -> bool:
+        """Queue a command behind pending records and wait for the writer."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put((command, arg, done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Write and flush everything queued so far."""
+        return self._control(_FLUSH, timeout=timeout)
+
+    def close_file(self, path: Path, timeout: float = 5.0) -> bool:
+        """Write pending records, then close `path` (it reopens if logged to)."""
+        return self._control(_CLOSE, Path(path), timeout=timeout)
+
+    def stop(self, timeout: float = 2.0):
+        """Write everything queued and close all files."""
+        if self._control(_STOP, timeout=timeout) and self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        last_flush = time.monotonic()
+        dirty = False
+        while True:
+            wait = None
+            if dirty:
+                wait = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                batch = [self._queue.get(timeout=wait)]
+            except queue.Empty:
+                self._flush_all()
+                dirty, last_flush = False, time.monotonic()
+                continue
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            stop = self._write(batch)
+            dirty = True
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self._flush_all()
+                dirty, last_flush = False, time.monotonic()
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: List[Any]) -> bool:
+        """Write a batch in order; returns True if it contained a stop."""
+        lines: "OrderedDict[Optional[Path], List[str]]" = OrderedDict()
+        stderr_lines: List[str] = []
+
+        def drain():
+            for path, file_lines in lines.items():
+                if path is not None:
+                    self._append(path, file_lines)
+            if stderr_lines and self.stderr:
+                try:
+                    sys.stderr.write("\n".join(stderr_lines) + "\n")
+                except (OSError, ValueError):
+                    pass
+            lines.clear()
+            stderr_lines.clear()
+
+        if self.dropped > self._reported_drops:
+            dropped, self._reported_drops = self.dropped, self.dropped
+            stderr_lines.append(
+                f'{{"level": "WARNING", "message": "Dropped {dropped} log '
+                f'entries so far (queue full or unserializable)"}}'
+            )
+
+        for item in batch:
+            if item[0] in (_STOP, _FLUSH, _CLOSE):
+                command, arg, done = item
+                drain()
+                if command == _CLOSE:
+                    self._close(arg)
+                else:
+                    self._flush_all()
+                if command == _STOP:
+                    for path in list(self._handles):
+                        self._close(path)
+                done.set()
+                if command == _STOP:
+                    return True
+                continue
+
+            path, entry, formatter = item
+            try:
+                line = formatter(entry)
+            except Exception:
+                # Never let a bad entry stop the writer
+                with self._lock:
+                    self.dropped += 1
+                continue
+            lines.setdefault(path, []).append(line)
+            stderr_lines.append(line)
+
+        drain()
+        return False
+
+    def _append(self, path: Path, file_lines: List[str]):
+        try:
+            handle = self._handles.get(path)
+            if handle is None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                handle = open(path, "a", encoding="utf-8")
+                self._handles[path] = handle
+                if len(self._handles) > self.max_open_files:
+                    self._close(next(iter(self._handles)))
+            else:
+                self._handles.move_to_end(path)
+            handle.write("\n".join(file_lines) + "\n")
+        except (OSError, ValueError):
+            pass  # Don't fail on log write errors
+
+    def _flush_all(self):
+        for handle in self._handles.values():
+            try:
+                handle.flush()
+            except (OSError, ValueError):
+                pass
+        if self.stderr:
+            try:
+                sys.stderr.flush()
+            except (OSError, ValueError):
+                pass
+
+    def _close(self, path: Path):
+        handle = self._handles.pop(path, None)
+        if handle is not None:
+            try:
+                handle.close()
+            except (OSError, ValueError):
+                pass
+
+
+_writer: Optional[LogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer(factory: Callable[[], LogWriter] = LogWriter) -> LogWriter:
+    """The process-wide writer, created on first use and stopped at exit."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = factory()
+                atexit.register(_writer.stop)
+    return _writer
@@ -15,6 +15,15 @@ class Metrics:
         self.denied_actions_count = 0
         self.cache_hits = 0
         self.cache_misses = 0
+        self.prefetch_adopted = 0
+        self.prefetch_discarded = 0
+        self.llm_cache_hits = 0
+        self.llm_cache_misses = 0
+        self.context_tokens_saved = 0
+        self.llm_phases: Dict[str, Dict[str, Any]] = {}
+        self.llm_retries = 0
+        self.llm_hedges = 0
+        self.llm_hedge_wins = 0
 
     def record_job_start(self):
         """Record job start."""
@@ -46,6 +55,75 @@ class Metrics:
         """Record cache miss."""
         self.cache_misses += 1
 
+    def record_llm_cache_hit(self):
+        """Record an LLM request answered from the response cache."""
+        self.llm_cache_hits += 1
+
+    def record_llm_cache_miss(self):
+        """Record an LLM request that had to call the API."""
+        self.llm_cache_misses += 1
+
+    def record_llm_call(
+        self,
+        phase: str,
+        model: str,
+        latency_seconds: float,
+        ttft_seconds: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cached: bool = False,
+    ):
+        """Record latency and token usage of an LLM call for a job phase.
+
+        ``cached`` responses (response cache hits, cassette replays) never
+        reached the API, so they are only counted, not timed or billed.
+        """
+        stats = self.llm_phases.setdefault(
+            phase,
+            {
+                "calls": 0,
+                "cached_calls": 0,
+                "latencies": [],
+                "ttfts": [],
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "models": {},
+            },
+        )
+        if cached:
+            stats["cached_calls"] += 1
+            return
+        stats["calls"] += 1
+        stats["latencies"].append(latency_seconds)
+        stats["ttfts"].append(ttft_seconds)
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        stats["models"][model] = stats["models"].get(model, 0) + 1
+
+    def record_llm_retry(self):
+        """Record an LLM request retried after a transient error."""
+        self.llm_retries += 1
+
+    def record_llm_hedge(self):
+        """Record a duplicate (hedged) LLM request."""
+        self.llm_hedges += 1
+
+    def record_llm_hedge_win(self):
+        """Record a hedged request that answered before the original."""
+        self.llm_hedge_wins += 1
+
+    def record_context_savings(self, saved_tokens: int):
+        """Record prompt tokens saved by compacting fix-plan context."""
+        self.context_tokens_saved += saved_tokens
+
+    def record_prefetch_adopted(self):
+        """Record a speculative step whose result the plan used."""
+        self.prefetch_adopted += 1
+
+    def record_prefetch_discarded(self):
+        """Record a speculative step the plan did not use."""
+        self.prefetch_discarded += 1
+
     def get_stats(self) -> Dict[str, Any]:
         """Get current metrics."""
         avg_job_time = (
@@ -55,6 +133,23 @@ class Metrics:
             sum(self.tool_times) / len(self.tool_times) if self.tool_times else 0
         )
 
+        llm_phases = {
+            phase: {
+                "calls": stats["calls"],
+                "cached_calls": stats["cached_calls"],
+                "avg_latency_seconds": (
+                    sum(stats["latencies"]) / stats["calls"] if stats["calls"] else 0
+                ),
+                "avg_ttft_seconds": (
+                    sum(stats["ttfts"]) / stats["calls"] if stats["calls"] else 0
+                ),
+                "prompt_tokens": stats["prompt_tokens"],
+                "completion_tokens": stats["completion_tokens"],
+                "models": dict(stats["models"]),
+            }
+            for phase, stats in self.llm_phases.items()
+        }
+
         total_cache = self.cache_hits + self.cache_misses
         cache_hit_rate = self.cache_hits / total_cache if total_cache > 0 else 0
 
@@ -68,6 +163,15 @@ class Metrics:
             "cache_hit_rate": cache_hit_rate,
             "cache_hits": self.cache_hits,
             "cache_misses": self.cache_misses,
+            "llm_cache_hits": self.llm_cache_hits,
+            "llm_cache_misses": self.llm_cache_misses,
+            "context_tokens_saved": self.context_tokens_saved,
+            "llm_phases": llm_phases,
+            "llm_retries": self.llm_retries,
+            "llm_hedges": self.llm_hedges,
+            "llm_hedge_wins": self.llm_hedge_wins,
+            "prefetch_adopted": self.prefetch_adopted,
+            "prefetch_discarded": self.prefetch_discarded,
         }
 
 
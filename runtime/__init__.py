@@ -1,6 +1,22 @@
 """Runtime implementations for secure execution."""
 
+from .capture import OutputSpool
+from .deadline import Deadline, DeadlineExceeded
+from .depcache import DependencyCaches
 from .localsafe import LocalSafeRuntime
+from .policy import CapabilityPolicy
+from .pool import ContainerPool
 from .sandboxed import SandboxedRuntime
+from .session import SessionRuntime
 
-__all__ = ["LocalSafeRuntime", "SandboxedRuntime"]
+__all__ = [
+    "CapabilityPolicy",
+    "ContainerPool",
+    "Deadline",
+    "DeadlineExceeded",
+    "DependencyCaches",
+    "LocalSafeRuntime",
+    "OutputSpool",
+    "SandboxedRuntime",
+    "SessionRuntime",
+]
@@ -0,0 +1,283 @@
+"""Bounded, streaming capture of subprocess output.
+
+Both pipes are read incrementally. Only the first ``head_bytes`` and the
+last ``tail_bytes`` of each stream stay in memory; with a spill directory
+set, the full output is also written to one file per command and stream
+so it can be tailed live or inspected afterwards. Complete lines are
+published to subscribers as they arrive.
+"""
+
+import asyncio
+import itertools
+import subprocess
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .process import kill_process_group
+
+# Pipe read size
+CHUNK_SIZE = 64 * 1024
+
+# Partial lines longer than this are published unsplit
+MAX_LINE_BYTES = 64 * 1024
+
+# Called with (command label, "stdout" | "stderr", line)
+Subscriber = Callable[[str, str, str], None]
+
+
+class OutputCapture:
+    """Head and tail ring buffers for one output stream, plus its spill file."""
+
+    def __init__(
+        self,
+        label: str,
+        stream: str,
+        head_bytes: int,
+        tail_bytes: int,
+        spill_path: Optional[Path] = None,
+        subscribers: Optional[List[Subscriber]] = None,
+    ):
+        self.label = label
+        self.stream = stream
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill_path = spill_path
+        self.subscribers = subscribers if subscribers is not None else []
+        self.total_bytes = 0
+        self._head = bytearray()
+        self._tail: deque = deque()
+        self._tail_size = 0
+        self._partial = bytearray()
+        self._spill = None
+
+    def feed(self, data: bytes):
+        """Consume a chunk read from the pipe."""
+        if not data:
+            return
+        self.total_bytes += len(data)
+
+        if self.spill_path is not None:
+            if self._spill is None:
+                self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                self._spill = open(self.spill_path, "wb")
+            self._spill.write(data)
+            self._spill.flush()
+
+        if self.subscribers:
+            self._publish(data)
+
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if data:
+            self._push_tail(data)
+
+    def _push_tail(self, data: bytes):
+        if len(data) >= self.tail_bytes:
+            self._tail.clear()
+            self._tail_size = 0
+            data = data[len(data) - self.tail_bytes :]
+        if data:
+            self._tail.append(data)
+            self._tail_size += len(data)
+        # Drop whole chunks while the rest still covers tail_bytes
+        while self._tail and self._tail_size - len(self._tail[0]) >= self.tail_bytes:
+            self._tail_size -= len(self._tail.popleft())
+
+    def _publish(self, data: bytes):
+        self._partial += data
+        if b"\n" in data:
+            *lines, rest = self._partial.split(b"\n")
+            for line in lines:
+                self._emit(line)
+            self._partial = bytearray(rest)
+        if len(self._partial) >= MAX_LINE_BYTES:
+            self._emit(bytes(self._partial))
+            self._partial.clear()
+
+    def close(self):
+        """Flush a trailing partial line and close the spill file."""
+        if self._partial:
+            self._emit(bytes(self._partial))
+            self._partial.clear()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def _emit(self, line: bytes):
+        text = line.decode("utf-8", errors="replace").rstrip("\r")
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber(self.label, self.stream, text)
+            except Exception:
+                # A broken tail must never fail the command
+                pass
+
+    def text(self) -> str:
+        """Captured output, with a marker where the middle was dropped."""
+        tail = b"".join(self._tail)[-self.tail_bytes :] if self.tail_bytes else b""
+        head = self._head.decode("utf-8", errors="replace")
+        omitted = self.total_bytes - len(self._head) - len(tail)
+        if omitted <= 0:
+            return head + tail.decode("utf-8", errors="replace")
+
+        where = f"; full output in {self.spill_path}" if self.spill_path else ""
+        return (
+            f"{head}\n... [{omitted} bytes omitted{where}] ...\n"
+            f"{tail.decode('utf-8', errors='replace')}"
+        )
+
+    def info(self) -> Dict[str, Any]:
+        """Result fields describing this stream."""
+        fields: Dict[str, Any] = {}
+        if self.spill_path is not None and self.total_bytes:
+            fields[f"{self.stream}_file"] = str(self.spill_path)
+        return fields
+
+
+class OutputSpool:
+    """Creates captures for each command a runtime runs.
+
+    ``spill_dir`` (usually the job's state dir) enables spill files;
+    ``subscribers`` receive every line of every command. Labels continue
+    after the highest one already in ``spill_dir``, so a resumed job never
+    overwrites earlier output.
+    """
+
+    def __init__(
+        self,
+        head_bytes: int = 16 * 1024,
+        tail_bytes: int = 64 * 1024,
+        spill_dir: Optional[Path] = None,
+    ):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.subscribers: List[Subscriber] = []
+        self._sequence: Optional[Iterator[int]] = None
+        self._sequence_dir: Optional[Path] = None
+
+    def subscribe(self, subscriber: Subscriber):
+        """Receive (label, stream, line) for each line of output."""
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+
+    def _next_label(self) -> str:
+        if self._sequence is None or self._sequence_dir != self.spill_dir:
+            last = 0
+            if self.spill_dir is not None:
+                for path in self.spill_dir.glob("*.std*.log*"):
+                    prefix = path.name.split(".", 1)[0]
+                    if prefix.isdigit():
+                        last = max(last, int(prefix))
+            self._sequence = itertools.count(last + 1)
+            self._sequence_dir = self.spill_dir
+        return f"{next(self._sequence):04d}"
+
+    def open(self) -> Tuple[OutputCapture, OutputCapture]:
+        """Captures for the stdout and stderr of the next command."""
+        label = self._next_label()
+        return tuple(  # type: ignore[return-value]
+            OutputCapture(
+                label,
+                stream,
+                self.head_bytes,
+                self.tail_bytes,
+                spill_path=(
+                    self.spill_dir / f"{label}.{stream}.log" if self.spill_dir else None
+                ),
+                subscribers=self.subscribers,
+            )
+            for stream in ("stdout", "stderr")
+        )
+
+    @staticmethod
+    def result(stdout: OutputCapture, stderr: OutputCapture) -> Dict[str, Any]:
+        """Result fields for a finished command."""
+        fields = {"stdout": stdout.text(), "stderr": stderr.text()}
+        fields.update(stdout.info())
+        fields.update(stderr.info())
+        return fields
+
+
+async def _drain(reader: Optional[asyncio.StreamReader], capture: OutputCapture):
+    if reader is None:
+        return
+    while True:
+        data = await reader.read(CHUNK_SIZE)
+        if not data:
+            break
+        capture.feed(data)
+
+
+async def capture_async(
+    process: asyncio.subprocess.Process,
+    timeout: float,
+    stdout: OutputCapture,
+    stderr: OutputCapture,
+):
+    """Stream a child's output into captures, killing its group on timeout or cancel.
+
+    Raises asyncio.TimeoutError when the timeout expires.
+    """
+
+    async def run():
+        await asyncio.gather(
+            _drain(process.stdout, stdout), _drain(process.stderr, stderr)
+        )
+        await process.wait()
+
+    try:
+        await asyncio.wait_for(run(), timeout)
+    except BaseException:
+        # Timeout or job cancellation: never leave the child running
+        kill_process_group(process)
+        try:
+            await asyncio.shield(process.wait())
+        except BaseException:
+            pass
+        raise
+    finally:
+        stdout.close()
+        stderr.close()
+
+
+def capture_sync(
+    process: subprocess.Popen,
+    timeout: float,
+    stdout: OutputCapture,
+    stderr: OutputCapture,
+):
+    """Blocking variant of capture_async for subprocess.Popen children.
+
+    Raises subprocess.TimeoutExpired when the timeout expires.
+    """
+
+    def drain(pipe, capture: OutputCapture):
+        for data in iter(lambda: pipe.read1(CHUNK_SIZE), b""):
+            capture.feed(data)
+
+    readers = [
+        threading.Thread(target=drain, args=(pipe, capture), daemon=True)
+        for pipe, capture in ((process.stdout, stdout), (process.stderr, stderr))
+        if pipe is not None
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        process.wait(timeout)
+    except BaseException:
+        kill_process_group(process)
+        process.wait()
+        raise
+    finally:
+        for reader in readers:
+            reader.join()
+        stdout.close()
+        stderr.close()
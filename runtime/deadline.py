@@ -0,0 +1,50 @@
+"""Job-wide time budget shared by the planner, executor and runtimes."""
+
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a job runs out of its time budget."""
+
+
+class Deadline:
+    """Monotonic deadline for a whole job.
+
+    A deadline without a budget never expires, so callers can thread one
+    through unconditionally.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.budget_seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    @classmethod
+    def from_minutes(cls, minutes: Optional[float]) -> "Deadline":
+        """Create a deadline from a budget in minutes (0/None = unlimited)."""
+        return cls(minutes * 60 if minutes else None)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when unlimited."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Return True once the budget is used up."""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def clamp(self, timeout: float) -> float:
+        """Limit a per-step timeout to the time left in the job."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return min(timeout, remaining)
+
+    def check(self):
+        """Raise DeadlineExceeded if the budget is used up."""
+        if self.expired():
+            raise DeadlineExceeded(
+                f"Job time budget of {self.budget_seconds / 60:g} minutes exhausted"
+            )
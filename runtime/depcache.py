@@ -0,0 +1,157 @@
+"""Persistent package-manager caches mounted into sandbox containers."""
+
+import hashlib
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Cache name -> (mount point in the container, env var that points the tool at it)
+CACHE_MOUNTS: Dict[str, Tuple[str, str]] = {
+    "pip": ("/cache/pip", "PIP_CACHE_DIR"),
+    "uv": ("/cache/uv", "UV_CACHE_DIR"),
+    "npm": ("/cache/npm", "npm_config_cache"),
+}
+
+# Touched whenever a cache is mounted; its mtime drives LRU eviction
+LAST_USED = ".last_used"
+
+# Prefix of the lease files (".mounted.<pid>.<id>") a runtime holds on the
+# caches it has mounted until it is closed
+MOUNT_LEASE = ".mounted"
+
+
+def image_key(image: str) -> str:
+    """Filesystem-safe directory name for an image reference."""
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", image).strip("_")[:48]
+    return f"{slug}-{hashlib.sha256(image.encode()).hexdigest()[:8]}"
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class DependencyCaches:
+    """pip/uv/npm caches under ``root/<image>/<name>``, shared across jobs.
+
+    Caches are keyed by image so wheels built against one base image are
+    never reused on another. ``evict`` keeps the total under ``max_bytes``
+    by deleting the least recently mounted caches first. Caches still
+    mounted by a live runtime (in this or another process) hold a lease
+    file and are spared; ``release`` drops this instance's leases.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        image: str,
+        max_bytes: int,
+        names: Optional[Iterable[str]] = None,
+    ):
+        self.root = Path(root)
+        self.image = image
+        self.max_bytes = max_bytes
+        self._lease = f"{MOUNT_LEASE}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+        self._mounted: Set[Path] = set()
+        names = list(CACHE_MOUNTS) if names is None else list(names)
+        unknown = sorted(set(names) - set(CACHE_MOUNTS))
+        if unknown:
+            raise ValueError(f"Unknown sandbox cache mounts: {', '.join(unknown)}")
+        self.names = names
+
+    def path(self, name: str) -> Path:
+        return self.root / image_key(self.image) / name
+
+    def mount_args(self) -> List[str]:
+        """docker/podman run options mounting each cache and pointing tools at it."""
+        args: List[str] = []
+        for name in self.names:
+            path = self.path(name)
+            path.mkdir(parents=True, exist_ok=True)
+            (path / LAST_USED).touch()
+            (path / self._lease).touch()
+            self._mounted.add(path)
+            target, env = CACHE_MOUNTS[name]
+            args.extend(
+                [
+                    "--mount",
+                    f"type=bind,source={path},target={target},readonly=false",
+                    "--env",
+                    f"{env}={target}",
+                ]
+            )
+        return args
+
+    def release(self):
+        """Drop the leases on caches mounted through this instance."""
+        for path in self._mounted:
+            try:
+                (path / self._lease).unlink()
+            except OSError:
+                pass
+        self._mounted.clear()
+
+    def _in_use(self, cache: Path) -> bool:
+        """Whether a live runtime still has the cache mounted."""
+        in_use = False
+        for lease in cache.glob(f"{MOUNT_LEASE}.*"):
+            try:
+                pid = int(lease.name.split(".")[2])
+            except (IndexError, ValueError):
+                continue
+            if _pid_alive(pid):
+                in_use = True
+            else:
+                # Left behind by a process that died without closing
+                try:
+                    lease.unlink()
+                except OSError:
+                    pass
+        return in_use
+
+    def _entries(self) -> List[Tuple[float, Path]]:
+        entries = []
+        for image_dir in self.root.glob("*"):
+            for cache in image_dir.glob("*"):
+                if cache.is_dir():
+                    try:
+                        used = (cache / LAST_USED).stat().st_mtime
+                    except OSError:
+                        used = 0.0
+                    entries.append((used, cache))
+        return sorted(entries)
+
+    def evict(self) -> Dict[str, int]:
+        """Delete least recently used caches until the total fits max_bytes."""
+        entries = [(used, cache, _dir_size(cache)) for used, cache in self._entries()]
+        total = sum(size for _, _, size in entries)
+        removed = freed = 0
+        for used, cache, size in entries:
+            if total <= self.max_bytes:
+                break
+            if self._in_use(cache):
+                continue
+            shutil.rmtree(cache, ignore_errors=True)
+            total -= size
+            freed += size
+            removed += 1
+        return {"removed": removed, "freed_bytes": freed, "total_bytes": total}
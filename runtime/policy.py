@@ -0,0 +1,242 @@
+"""Compiled capability policy shared by the runtimes and tools.
+
+``CapabilityPolicy`` turns the raw capabilities mapping into lookup
+structures once, when capabilities are loaded, instead of re-resolving
+paths and re-compiling patterns on every check:
+
+- denied and allowed path prefixes are resolved up front and held in a
+  trie keyed by path component;
+- deny globs and allowed path globs are translated to compiled regexes;
+- denied command substrings and allowed command regexes are merged into
+  single alternations;
+- recent decisions are kept in a bounded LRU.
+
+The policy is immutable; build a new one to change the rules.
+"""
+
+import fnmatch
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Commands refused regardless of the allowlist
+DANGEROUS_PATTERNS = (
+    r"rm\s+-rf\s+/",
+    r"rm\s+-rf\s+\*",
+    r"format\s+",
+    r"del\s+/f\s+/s\s+/q",
+    r":\s*\(\s*\)\s*\{\s*:\s*\|:\s*&?\s*\}\s*;?\s*:",
+)
+
+# Interpreters a command may not pipe into
+PIPE_INTERPRETERS = ("bash", "sh", "python", "node")
+
+# Numbered or named backreferences change meaning once patterns are merged
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+Decision = Tuple[bool, Optional[str]]
+
+
+class PathTrie:
+    """Path prefixes indexed by component for ancestor lookups."""
+
+    _END = object()
+
+    def __init__(self, entries: Iterable[Tuple[Path, str]] = ()):
+        self._root: Dict[Any, Any] = {}
+        for path, label in entries:
+            node = self._root
+            for part in path.parts:
+                node = node.setdefault(part, {})
+            node.setdefault(self._END, label)
+
+    def __bool__(self) -> bool:
+        return bool(self._root)
+
+    def match(self, path: Path) -> Optional[str]:
+        """Label of the shortest stored prefix of ``path``, or None."""
+        node = self._root
+        for part in path.parts:
+            node = node.get(part)
+            if node is None:
+                return None
+            if self._END in node:
+                return node[self._END]
+        return None
+
+
+def _glob_regex(patterns: Iterable[str]) -> "re.Pattern[str]":
+    """Compile globs into one regex with ``fnmatch.fnmatch`` semantics."""
+    translated = [fnmatch.translate(os.path.normcase(p)) for p in patterns]
+    return re.compile("|".join(f"(?:{t})" for t in translated))
+
+
+def _merge_patterns(
+    patterns: List[str], flags: int = 0
+) -> Tuple["re.Pattern[str]", ...]:
+    """Compile regexes into one alternation, or singly if they cannot merge."""
+    compiled = []
+    for pattern in patterns:
+        try:
+            compiled.append(re.compile(pattern, flags))
+        except re.error as e:
+            raise ValueError(f"Invalid command pattern {pattern!r}: {e}") from e
+
+    if len(patterns) < 2 or any(_BACKREFERENCE.search(p) for p in patterns):
+        return tuple(compiled)
+    try:
+        return (re.compile("|".join(f"(?:{p})" for p in patterns), flags),)
+    except re.error:
+        # e.g. inline global flags that are only valid at the start
+        return tuple(compiled)
+
+
+class CapabilityPolicy:
+    """Immutable, pre-compiled path, command and domain rules."""
+
+    __slots__ = (
+        "_denied_paths",
+        "_deny_globs",
+        "_allowed_prefixes",
+        "_allowed_globs",
+        "_denied_commands",
+        "_denied_lookup",
+        "_dangerous",
+        "_allowed_commands",
+        "_allowed_domains",
+        "_path_decision",
+        "_command_decision",
+        "_frozen",
+    )
+
+    def __init__(self, capabilities: Dict[str, Any], cache_size: int = 1024):
+        allowed_paths = capabilities.get("allowed_paths", []) or []
+        denied_paths = capabilities.get("denied_paths", []) or []
+        deny_globs = capabilities.get("deny_globs", []) or []
+        allowed_commands = capabilities.get("allowed_commands", []) or []
+        denied_commands = capabilities.get("denied_commands", []) or []
+        network = capabilities.get("network", {}) or {}
+
+        self._denied_paths = PathTrie(
+            (Path(denied).resolve(), denied) for denied in denied_paths
+        )
+        # Each glob also matches at any depth, as "**/<glob>"
+        self._deny_globs = tuple(
+            (glob, _glob_regex([glob, f"**/{glob}"])) for glob in deny_globs
+        )
+
+        self._allowed_prefixes = PathTrie(
+            (Path(allowed.removesuffix("/**")).resolve(), allowed)
+            for allowed in allowed_paths
+        )
+        self._allowed_globs = _glob_regex(allowed_paths) if allowed_paths else None
+
+        # Case-insensitive substring match, reported by the configured spelling
+        self._denied_lookup = {d.lower(): d for d in reversed(denied_commands)}
+        self._denied_commands = (
+            re.compile("|".join(re.escape(d.lower()) for d in denied_commands))
+            if denied_commands
+            else None
+        )
+        self._dangerous = tuple(
+            (pattern, re.compile(pattern, re.IGNORECASE))
+            for pattern in DANGEROUS_PATTERNS
+        )
+        self._allowed_commands = _merge_patterns(allowed_commands, re.IGNORECASE)
+
+        self._allowed_domains = frozenset(
+            d.lower() for d in network.get("allowed_domains", []) or []
+        )
+
+        self._path_decision = lru_cache(maxsize=cache_size)(self._decide_path)
+        self._command_decision = lru_cache(maxsize=cache_size)(self._decide_command)
+        self._frozen = True
+
+    def __setattr__(self, name: str, value: Any):
+        if getattr(self, "_frozen", False):
+            raise AttributeError("CapabilityPolicy is immutable")
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_capabilities(cls, capabilities: Dict[str, Any]) -> "CapabilityPolicy":
+        """The policy attached by ``load_capabilities``, or a freshly compiled one."""
+        policy = capabilities.get("policy")
+        if isinstance(policy, cls):
+            return policy
+        return cls(capabilities)
+
+    def check_path(self, path: Path, allow_unlisted: bool = False) -> Decision:
+        """Check if a path is allowed.
+
+        With ``allow_unlisted`` only the deny rules apply, for callers that
+        confine paths themselves (the fs tool stays inside the workspace).
+        """
+        # Resolve on every call so symlink changes are never served stale
+        return self._path_decision(Path(path).resolve(), allow_unlisted)
+
+    def _decide_path(self, path: Path, allow_unlisted: bool) -> Decision:
+        denied = self._denied_paths.match(path)
+        if denied is not None:
+            return False, f"Path denied: {path} matches denied path {denied}"
+
+        path_str = str(path)
+        normalized = os.path.normcase(path_str)
+        for glob, regex in self._deny_globs:
+            if regex.match(normalized):
+                return False, f"Path denied: {path} matches glob {glob}"
+
+        if allow_unlisted or self._allowed_prefixes.match(path) is not None:
+            return True, None
+        if self._allowed_globs is not None and self._allowed_globs.match(normalized):
+            return True, None
+
+        return False, f"Path not in allowed paths: {path}"
+
+    def check_command(self, command: str) -> Decision:
+        """Check if a command is allowed."""
+        return self._command_decision(command)
+
+    def _decide_command(self, command: str) -> Decision:
+        lowered = command.lower()
+
+        if self._denied_commands is not None:
+            match = self._denied_commands.search(lowered)
+            if match:
+                pattern = self._denied_lookup[match.group(0)]
+                return False, f"Command matches denied pattern: {pattern}"
+
+        for pattern, regex in self._dangerous:
+            if regex.search(command):
+                return False, f"Dangerous command pattern detected: {pattern}"
+
+        if "|" in command:
+            for part in lowered.split("|")[1:]:
+                if any(cmd in part for cmd in PIPE_INTERPRETERS):
+                    return False, "Unsafe pipe to interpreter detected"
+
+        if self._allowed_commands and not any(
+            regex.match(command) for regex in self._allowed_commands
+        ):
+            return False, f"Command not in allowed list: {command}"
+
+        return True, None
+
+    def check_domain(self, domain: str) -> bool:
+        """Check a host against allowed_domains, including subdomains."""
+        labels = domain.lower().split(".")
+        return any(
+            ".".join(labels[i:]) in self._allowed_domains for i in range(len(labels))
+        )
+
+    @property
+    def has_allowed_domains(self) -> bool:
+        return bool(self._allowed_domains)
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Hit/miss counters of the decision caches."""
+        return {
+            "paths": self._path_decision.cache_info()._asdict(),
+            "commands": self._command_decision.cache_info()._asdict(),
+        }
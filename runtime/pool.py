@@ -0,0 +1,204 @@
+"""Warm pool of sandbox containers reused through `exec`."""
+
+import asyncio
+import subprocess
+import uuid
+from typing import List, Optional, Set
+
+from .process import communicate, spawn
+
+# docker/podman report their own failures (e.g. a dead container) as 125
+CONTAINER_FAILURE_STATUS = 125
+
+# exec errors for a container that has gone away, whatever the status
+CONTAINER_GONE_MARKERS = ("No such container", "is not running")
+
+
+def container_healthy(returncode: Optional[int], stderr: str = "") -> bool:
+    """Whether a container can be reused after a command with this status.
+
+    Ordinary failures keep the container; daemon errors, signal kills
+    (such as the OOM killer, 137) and vanished containers retire it.
+    """
+    return (
+        returncode is not None
+        and returncode != CONTAINER_FAILURE_STATUS
+        and returncode <= 128
+        and not any(marker in stderr for marker in CONTAINER_GONE_MARKERS)
+    )
+
+
+class PooledContainer:
+    """A long-running sandbox container and how much it has been used."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.commands = 0
+
+
+class ContainerPool:
+    """Pre-started, locked-down containers for one workspace.
+
+    Containers are created with the runtime's usual limits, security
+    options and workspace mount, then kept alive with `sleep infinity`;
+    commands run in them with `exec`. A container is replaced after
+    ``max_commands`` commands, or as soon as a command times out, is
+    cancelled or reports a container failure. ``aclose`` (or ``close``
+    outside an event loop) removes every container at job end.
+    """
+
+    def __init__(self, runtime, size: int = 2, max_commands: int = 50):
+        self.runtime = runtime
+        self.size = max(1, size)
+        self.max_commands = max_commands
+        self.started = 0
+        self._names: Set[str] = set()
+        self._idle: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._creating = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _queue(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queues and tasks belong to the loop that created them
+            names = self._reset()
+            self._loop = loop
+            self._idle = asyncio.Queue()
+            if names:
+                self._background(self._remove(*names))
+        assert self._idle is not None
+        return self._idle
+
+    def _start_command(self, name: str) -> List[str]:
+        runtime = self.runtime
+        return [
+            runtime.container_runtime,
+            "run",
+            "-d",
+            "--rm",
+            "--name",
+            name,
+            "--label",
+            "jj-agent.pool=1",
+            *runtime._container_options(runtime.workspace),
+            runtime.image,
+            "sleep",
+            "infinity",
+        ]
+
+    async def _start(self) -> PooledContainer:
+        name = f"jj-pool-{uuid.uuid4().hex[:12]}"
+        process = await spawn(self._start_command(name))
+        _, stderr = await communicate(process, 120)
+        if process.returncode != 0:
+            raise RuntimeError(f"Failed to start sandbox container: {stderr}")
+        self._names.add(name)
+        self.started += 1
+        return PooledContainer(name)
+
+    async def _create(self) -> PooledContainer:
+        self._creating += 1
+        try:
+            return await self._start()
+        finally:
+            self._creating -= 1
+
+    def _background(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _replenish(self):
+        # The slot was reserved in release() so acquire() waits for it
+        try:
+            container: Optional[PooledContainer] = await self._start()
+        except Exception:
+            # Wake a waiter so it retries the start itself
+            container = None
+        finally:
+            self._creating -= 1
+        self._queue().put_nowait(container)
+
+    async def warm(self):
+        """Start containers until the pool is full."""
+        queue = self._queue()
+        missing = self.size - len(self._names) - self._creating
+        results = await asyncio.gather(
+            *(self._create() for _ in range(max(0, missing))), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, PooledContainer):
+                queue.put_nowait(result)
+
+    async def acquire(self) -> PooledContainer:
+        """Take an idle container, starting one if the pool is not full."""
+        queue = self._queue()
+        if queue.empty() and len(self._names) + self._creating < self.size:
+            return await self._create()
+        container = await queue.get()
+        if container is None:
+            return await self._create()
+        return container
+
+    def release(self, container: PooledContainer, healthy: bool):
+        """Return a container, or replace it if it is spent or failed."""
+        container.commands += 1
+        if healthy and container.commands < self.max_commands:
+            self._queue().put_nowait(container)
+            return
+        self._names.discard(container.name)
+        self._background(self._remove(container.name))
+        self._creating += 1
+        self._background(self._replenish())
+
+    def exec_command(self, container: PooledContainer, command: str, workdir: str):
+        """argv that runs `command` in a pooled container."""
+        return [
+            self.runtime.container_runtime,
+            "exec",
+            "--workdir",
+            workdir,
+            container.name,
+            "sh",
+            "-c",
+            command,
+        ]
+
+    async def _remove(self, *names: str):
+        try:
+            process = await spawn([self.runtime.container_runtime, "rm", "-f", *names])
+            await communicate(process, 60)
+        except Exception:
+            pass
+
+    def _reset(self) -> List[str]:
+        """Forget all containers and background work; return their names."""
+        for task in list(self._tasks):
+            task.cancel()
+        self._tasks.clear()
+        self._creating = 0
+        names, self._names = sorted(self._names), set()
+        self._idle = None
+        self._loop = None
+        return names
+
+    async def aclose(self):
+        """Remove every pooled container without blocking the event loop."""
+        names = self._reset()
+        if names:
+            await self._remove(*names)
+
+    def close(self):
+        """Remove every pooled container (blocking; for synchronous callers)."""
+        names = self._reset()
+        if not names:
+            return
+        try:
+            subprocess.run(
+                [self.runtime.container_runtime, "rm", "-f", *names],
+                capture_output=True,
+                timeout=60,
+            )
+        except Exception:
+            pass
@@ -0,0 +1,71 @@
+"""Asyncio subprocess helpers shared by the runtimes."""
+
+import asyncio
+import os
+import signal
+from typing import List, Optional, Tuple
+
+
+def shell_argv(command: str) -> List[str]:
+    """Build the argv that runs `command` through the platform shell."""
+    if os.name == "nt":
+        return ["cmd", "/c", command]
+    return ["/bin/sh", "-c", command]
+
+
+async def spawn(
+    argv: List[str], cwd: Optional[str] = None, stdin: int = asyncio.subprocess.DEVNULL
+) -> asyncio.subprocess.Process:
+    """Start a child in its own process group with piped output."""
+    kwargs = {}
+    if os.name != "nt":
+        kwargs["start_new_session"] = True
+    return await asyncio.create_subprocess_exec(
+        *argv,
+        cwd=cwd,
+        stdin=stdin,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        **kwargs,
+    )
+
+
+def kill_process_group(process: asyncio.subprocess.Process):
+    """Kill a child and everything it spawned."""
+    if process.returncode is not None:
+        return
+    if os.name != "nt":
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except (ProcessLookupError, PermissionError):
+            # Not a group leader (no start_new_session); kill the child itself
+            pass
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def communicate(
+    process: asyncio.subprocess.Process, timeout: float
+) -> Tuple[str, str]:
+    """Wait for a child's output, killing its process group on timeout or cancel.
+
+    Raises asyncio.TimeoutError when the timeout expires.
+    """
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except BaseException:
+        # Timeout or job cancellation: never leave the child running
+        kill_process_group(process)
+        try:
+            await asyncio.shield(process.wait())
+        except BaseException:
+            pass
+        raise
+
+    return (
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
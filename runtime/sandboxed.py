@@ -1,17 +1,47 @@
 """Sandboxed runtime using Docker/Podman."""
 
+import asyncio
+import os
 import subprocess
-from pathlib import Path
+import uuid
+from pathlib import Path, PurePosixPath
 from typing import Dict, Any, Optional
 
+from .capture import OutputSpool, capture_async, capture_sync
+from .depcache import DependencyCaches
+from .pool import ContainerPool, container_healthy
+from .process import communicate, spawn
+
+DEFAULT_IMAGE = "python:3.11-slim"
+
 
 class SandboxedRuntime:
     """Sandboxed execution using Docker with strict security."""
 
-    def __init__(self, workspace: Path, capabilities: Dict[str, Any]):
+    def __init__(
+        self,
+        workspace: Path,
+        capabilities: Dict[str, Any],
+        pool_size: int = 0,
+        pool_max_commands: int = 50,
+    ):
         self.workspace = Path(workspace).resolve()
         self.capabilities = capabilities
         self.sandbox_config = capabilities.get("sandbox", {})
+        # Bounded output capture; ShellTool points spill files at the job dir
+        self.spool = OutputSpool()
+        # Warm containers for run_async; None starts one container per command
+        self.pool = (
+            ContainerPool(self, size=pool_size, max_commands=pool_max_commands)
+            if pool_size > 0
+            else None
+        )
+
+        # Use a minimal image unless capabilities pick another
+        self.image = self.sandbox_config.get("image") or DEFAULT_IMAGE
+
+        # Persistent pip/uv/npm caches; see enable_dependency_caches
+        self.dependency_caches: Optional[DependencyCaches] = None
 
         # Detect Docker/Podman
         self.container_runtime = "docker"
@@ -24,13 +54,9 @@ class SandboxedRuntime:
         except Exception:
             pass
 
-    def _build_run_command(
-        self, command: str, cwd: Optional[str] = None, timeout: int = 180
-    ) -> list:
-        """Build Docker/Podman run command with security constraints."""
-        work_dir = Path(cwd).resolve() if cwd else self.workspace
-
-        cmd = [self.container_runtime, "run", "--rm"]
+    def _container_options(self, work_dir: Path) -> list:
+        """Limits, security options and mounts shared by every container."""
+        cmd = []
 
         # Resource limits
         if self.sandbox_config.get("pids_limit"):
@@ -43,6 +69,8 @@ class SandboxedRuntime:
         # Security options
         if self.sandbox_config.get("read_only_root", True):
             cmd.append("--read-only")
+            # Package builds still need scratch space
+            cmd.extend(["--tmpfs", "/tmp"])
         if self.sandbox_config.get("no_new_privileges", True):
             cmd.append("--security-opt=no-new-privileges:true")
 
@@ -55,9 +83,41 @@ class SandboxedRuntime:
         )
         cmd.extend(["--workdir", "/workspace"])
 
-        # Use a minimal image
-        image = "python:3.11-slim"  # Can be configurable
-        cmd.append(image)
+        if self.dependency_caches is not None:
+            cmd.extend(self.dependency_caches.mount_args())
+
+        return cmd
+
+    def enable_dependency_caches(self, root: Path, max_bytes: int):
+        """Mount persistent package caches from ``root`` into every container.
+
+        ``sandbox.cache_mounts`` in capabilities limits which caches are
+        mounted (default: pip, uv and npm); an empty list disables them.
+        """
+        names = self.sandbox_config.get("cache_mounts")
+        if names is not None and not names:
+            return
+        self.dependency_caches = DependencyCaches(
+            root, self.image, max_bytes, names=names
+        )
+
+    def _build_run_command(
+        self,
+        command: str,
+        cwd: Optional[str] = None,
+        timeout: int = 180,
+        name: Optional[str] = None,
+    ) -> list:
+        """Build Docker/Podman run command with security constraints."""
+        work_dir = Path(cwd).resolve() if cwd else self.workspace
+
+        cmd = [self.container_runtime, "run", "--rm"]
+        if name:
+            cmd.extend(["--name", name])
+
+        cmd.extend(self._container_options(work_dir))
+
+        cmd.append(self.image)
 
         # Add command with timeout
         cmd.extend(["sh", "-c", f"timeout {timeout} {command}"])
@@ -85,21 +145,21 @@ class SandboxedRuntime:
         try:
             run_cmd = self._build_run_command(command, cwd, timeout)
 
-            process = subprocess.run(
+            process = subprocess.Popen(
                 run_cmd,
-                capture_output=True,
-                text=True,
-                timeout=timeout + 10,  # Add buffer for container overhead
-                encoding="utf-8",
-                errors="replace",
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=os.name != "nt",
             )
+            stdout, stderr = self.spool.open()
+            # Add buffer for container overhead
+            capture_sync(process, timeout + 10, stdout, stderr)
 
             return {
                 "success": process.returncode == 0,
                 "command": command,
                 "returncode": process.returncode,
-                "stdout": process.stdout,
-                "stderr": process.stderr,
+                **self.spool.result(stdout, stderr),
                 "cwd": cwd or str(self.workspace),
                 "sandboxed": True,
             }
@@ -112,3 +172,164 @@ class SandboxedRuntime:
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+    async def pull_image_async(self, timeout: int = 600) -> Dict[str, Any]:
+        """Pull the sandbox image unless it is already present locally."""
+        try:
+            process = await spawn(
+                [self.container_runtime, "image", "inspect", self.image]
+            )
+            await communicate(process, 30)
+            if process.returncode == 0:
+                return {"success": True, "image": self.image, "pulled": False}
+
+            process = await spawn([self.container_runtime, "pull", self.image])
+            _, stderr = await communicate(process, timeout)
+            return {
+                "success": process.returncode == 0,
+                "image": self.image,
+                "pulled": process.returncode == 0,
+                "stderr": stderr,
+            }
+        except asyncio.TimeoutError:
+            return {"success": False, "error": f"Image pull timed out after {timeout}s"}
+        except FileNotFoundError:
+            return {
+                "success": False,
+                "error": f"{self.container_runtime} not found. Install Docker or Podman.",
+            }
+
+    async def warm_async(self) -> Dict[str, Any]:
+        """Pull the image and pre-start pooled containers."""
+        result = await self.pull_image_async()
+        if result.get("success") and self.pool is not None:
+            await self.pool.warm()
+        return result
+
+    def close(self):
+        """Tear down pooled containers and trim the dependency caches."""
+        if self.pool is not None:
+            self.pool.close()
+        self._release_caches()
+
+    async def aclose(self):
+        """``close`` for async callers; nothing blocks the event loop."""
+        if self.pool is not None:
+            await self.pool.aclose()
+        await asyncio.to_thread(self._release_caches)
+
+    def _release_caches(self):
+        # Nothing of this runtime is mounted any more
+        if self.dependency_caches is not None:
+            self.dependency_caches.release()
+            self.dependency_caches.evict()
+
+    def _pool_workdir(self, cwd: Optional[str]) -> Optional[str]:
+        """Container path of cwd, or None if it is outside the pooled mount."""
+        work_dir = Path(cwd).resolve() if cwd else self.workspace
+        try:
+            relative = work_dir.relative_to(self.workspace)
+        except ValueError:
+            return None
+        return str(PurePosixPath("/workspace", *relative.parts))
+
+    async def _kill_container(self, name: str):
+        """Force-remove a named container (best effort)."""
+        try:
+            process = await spawn([self.container_runtime, "rm", "-f", name])
+            await communicate(process, 10)
+        except Exception:
+            pass
+
+    async def run_async(
+        self,
+        command: str,
+        cwd: Optional[str] = None,
+        timeout: int = 180,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """Run a command in a sandboxed container without blocking the loop.
+
+        On timeout or cancellation the container client's process group is
+        killed and the container itself is removed.
+        """
+        if dry_run:
+            return self.run(command, cwd=cwd, timeout=timeout, dry_run=True)
+
+        workdir = self._pool_workdir(cwd) if self.pool is not None else None
+        if workdir is not None:
+            return await self._run_pooled(command, cwd, workdir, timeout)
+
+        name = f"jj-{uuid.uuid4().hex[:12]}"
+        try:
+            run_cmd = self._build_run_command(command, cwd, timeout, name=name)
+            process = await spawn(run_cmd)
+            stdout, stderr = self.spool.open()
+            try:
+                # Add buffer for container overhead
+                await capture_async(process, timeout + 10, stdout, stderr)
+            except BaseException:
+                await asyncio.shield(self._kill_container(name))
+                raise
+
+            return {
+                "success": process.returncode == 0,
+                "command": command,
+                "returncode": process.returncode,
+                **self.spool.result(stdout, stderr),
+                "cwd": cwd or str(self.workspace),
+                "sandboxed": True,
+            }
+        except asyncio.TimeoutError:
+            return {"success": False, "error": f"Command timed out after {timeout}s"}
+        except FileNotFoundError:
+            return {
+                "success": False,
+                "error": f"{self.container_runtime} not found. Install Docker or Podman.",
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def _run_pooled(
+        self, command: str, cwd: Optional[str], workdir: str, timeout: int
+    ) -> Dict[str, Any]:
+        """Run a command in a warm pooled container via exec.
+
+        A container whose command times out or is cancelled is replaced,
+        since killing the exec client leaves the command running inside.
+        """
+        assert self.pool is not None
+        try:
+            container = await self.pool.acquire()
+            healthy = False
+            try:
+                process = await spawn(
+                    self.pool.exec_command(
+                        container, f"timeout {timeout} {command}", workdir
+                    )
+                )
+                stdout, stderr = self.spool.open()
+                # Add buffer for exec overhead
+                await capture_async(process, timeout + 10, stdout, stderr)
+                healthy = container_healthy(process.returncode, stderr.text())
+            finally:
+                self.pool.release(container, healthy)
+
+            return {
+                "success": process.returncode == 0,
+                "command": command,
+                "returncode": process.returncode,
+                **self.spool.result(stdout, stderr),
+                "cwd": cwd or str(self.workspace),
+                "sandboxed": True,
+                "pooled": True,
+            }
+        except asyncio.TimeoutError:
+            return {"success": False, "error": f"Command timed out after {timeout}s"}
+        except FileNotFoundError:
+            return {
+                "success": False,
+                "error": f"{self.container_runtime} not found. Install Docker or Podman.",
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
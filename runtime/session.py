@@ -0,0 +1,222 @@
+"""Session runtime: one persistent shell per job."""
+
+import asyncio
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .capture import CHUNK_SIZE, OutputCapture
+from .localsafe import LocalSafeRuntime
+from .process import kill_process_group, spawn
+
+
+class SessionDied(Exception):
+    """The session shell exited before finishing a command."""
+
+    def __init__(self, returncode: int):
+        super().__init__(f"Session shell exited with status {returncode}")
+        self.returncode = returncode
+
+
+def _quote(text: str) -> str:
+    """Single-quote text for /bin/sh."""
+    return "'" + text.replace("'", "'\\''") + "'"
+
+
+class SessionRuntime(LocalSafeRuntime):
+    """LocalSafe checks, but commands run in one long-lived /bin/sh.
+
+    Saves a shell spawn per command and keeps environment changes
+    (exported variables, an activated venv) between steps. Each command
+    is framed with a unique sentinel on stdout and stderr; the sentinel on
+    stdout carries the exit status. Commands run one at a time; shell
+    tools are plan barriers, so they never ran concurrently anyway.
+
+    The shell is killed and replaced after a timeout or cancellation,
+    when a command exits it, and after ``max_commands`` commands or
+    ``max_age_seconds``. The blocking ``run`` and non-POSIX platforms use
+    a fresh process per command, as LocalSafeRuntime does.
+    """
+
+    def __init__(
+        self,
+        workspace: Path,
+        capabilities: Dict[str, Any],
+        max_commands: int = 200,
+        max_age_seconds: float = 1800,
+    ):
+        super().__init__(workspace, capabilities)
+        self.max_commands = max_commands
+        self.max_age_seconds = max_age_seconds
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._started = 0.0
+        self._commands = 0
+        self.sessions_started = 0
+
+    def _session_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A shell's pipes belong to the loop that spawned it
+            self.close()
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        assert self._lock is not None
+        return self._lock
+
+    def _expired(self) -> bool:
+        process = self._process
+        return (
+            process is None
+            or process.returncode is not None
+            or self._commands >= self.max_commands
+            or time.monotonic() - self._started > self.max_age_seconds
+        )
+
+    async def _shell(self) -> asyncio.subprocess.Process:
+        if self._expired():
+            self.close()
+            self._process = await spawn(
+                ["/bin/sh"], cwd=str(self.workspace), stdin=asyncio.subprocess.PIPE
+            )
+            self._started = time.monotonic()
+            self._commands = 0
+            self.sessions_started += 1
+        assert self._process is not None
+        return self._process
+
+    def close(self):
+        """Kill the session shell; the next command starts a new one."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        kill_process_group(process)
+        try:
+            if process.stdin is not None:
+                process.stdin.close()
+        except RuntimeError:
+            # Its event loop is already closed
+            pass
+
+    async def run_async(
+        self,
+        command: str,
+        cwd: Optional[str] = None,
+        timeout: int = 180,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """Run a command in the session shell.
+
+        Cancelling the awaiting task kills the shell and everything it
+        started.
+        """
+        if os.name == "nt":
+            return await super().run_async(command, cwd, timeout, dry_run)
+
+        try:
+            early, work_dir = self._prepare(command, cwd, dry_run)
+            if early is not None:
+                return early
+
+            async with self._session_lock():
+                stdout, stderr = self.spool.open()
+                try:
+                    returncode = await asyncio.wait_for(
+                        self._send(command, work_dir, stdout, stderr), timeout
+                    )
+                except SessionDied as e:
+                    returncode = e.returncode
+                    self.close()
+                except BaseException:
+                    # Timeout or job cancellation: never leave the shell running
+                    self.close()
+                    raise
+                finally:
+                    stdout.close()
+                    stderr.close()
+
+            return {
+                "success": returncode == 0,
+                "command": command,
+                "returncode": returncode,
+                **self.spool.result(stdout, stderr),
+                "cwd": str(work_dir),
+                "session": True,
+            }
+        except asyncio.TimeoutError:
+            return {"success": False, "error": f"Command timed out after {timeout}s"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    async def _send(
+        self,
+        command: str,
+        work_dir: Path,
+        stdout: OutputCapture,
+        stderr: OutputCapture,
+    ) -> int:
+        """Write one framed command to the shell and collect its output."""
+        process = await self._shell()
+        self._commands += 1
+        sentinel = f"__jj_{uuid.uuid4().hex}__"
+        # cd and the command run in the shell itself so exports persist;
+        # stdin is closed so the command cannot read the framing
+        script = (
+            f"cd {_quote(str(work_dir))} && eval {_quote(command)} </dev/null\n"
+            f"__jj_rc=$?\n"
+            f"printf '%s %d\\n' {sentinel} \"$__jj_rc\"\n"
+            f"printf '%s\\n' {sentinel} >&2\n"
+        )
+        assert process.stdin is not None
+        process.stdin.write(script.encode())
+        await process.stdin.drain()
+
+        results = await asyncio.gather(
+            self._read_framed(process, process.stdout, sentinel, stdout),
+            self._read_framed(process, process.stderr, sentinel, stderr),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return int(results[0] or 0)
+
+    @staticmethod
+    async def _read_framed(
+        process: asyncio.subprocess.Process,
+        reader: Optional[asyncio.StreamReader],
+        sentinel: str,
+        capture: OutputCapture,
+    ) -> bytes:
+        """Feed output up to the sentinel; return the rest of its line.
+
+        Raises SessionDied with the shell's exit status if the shell exits
+        (e.g. the command ran `exit`) before the sentinel arrives.
+        """
+        assert reader is not None
+        token = sentinel.encode()
+        keep = len(token) - 1
+        pending = b""
+        while True:
+            data = await reader.read(CHUNK_SIZE)
+            if not data:
+                capture.feed(pending)
+                raise SessionDied(await process.wait())
+            pending += data
+            index = pending.find(token)
+            if index >= 0:
+                capture.feed(pending[:index])
+                rest = pending[index + len(token) :]
+                while b"\n" not in rest:
+                    more = await reader.read(CHUNK_SIZE)
+                    if not more:
+                        break
+                    rest += more
+                return rest.split(b"\n", 1)[0].strip()
+            # Hold back a possible partial sentinel
+            if len(pending) > keep:
+                capture.feed(pending[:-keep])
+                pending = pending[-keep:]
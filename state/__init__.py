@@ -1,5 +1,7 @@
 """State management module."""
 
+from .catalog import RunCatalog
 from .manager import StateManager
+from .retention import RunRetention
 
-__all__ = ["StateManager"]
+__all__ = ["RunCatalog", "RunRetention", "StateManager"]
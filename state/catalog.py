@@ -0,0 +1,260 @@
+"""SQLite index of runs for fast, time-ordered listing."""
+
+import base64
+import hashlib
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Prompt characters kept for display; the full prompt stays in the run header
+PROMPT_PREVIEW_CHARS = 120
+
+MAX_PAGE_SIZE = 500
+
+_COLUMNS = (
+    "run_id",
+    "started",
+    "completed",
+    "status",
+    "workspace",
+    "prompt_sha256",
+    "prompt_preview",
+    "dry_run",
+    "duration_seconds",
+    "steps",
+    "failure",
+)
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from an ISO timestamp, or None."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def _iso(value: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(value).isoformat() if value is not None else None
+
+
+def encode_cursor(started: float, run_id: str) -> str:
+    """Opaque cursor pointing just past the given run."""
+    raw = json.dumps([started, run_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        started, run_id = json.loads(raw)
+        return float(started), str(run_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class RunCatalog:
+    """One row per run, kept current by StateManager.
+
+    Listing is newest first with keyset pagination on (started, run_id),
+    so every page costs an index seek regardless of how many runs exist.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " run_id TEXT PRIMARY KEY,"
+                " started REAL NOT NULL,"
+                " completed REAL,"
+                " status TEXT NOT NULL,"
+                " workspace TEXT,"
+                " prompt_sha256 TEXT,"
+                " prompt_preview TEXT,"
+                " dry_run INTEGER NOT NULL DEFAULT 0,"
+                " duration_seconds REAL,"
+                " steps INTEGER NOT NULL DEFAULT 0,"
+                " failure TEXT)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS runs_started ON runs (started, run_id)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS runs_status ON runs (status, started)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS runs_workspace"
+                " ON runs (workspace, started)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection that commits on success and always closes."""
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record_start(
+        self,
+        run_id: str,
+        started: float,
+        prompt: str,
+        workspace: str,
+        dry_run: bool = False,
+    ):
+        """Add a running run."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, started, status, workspace,"
+                " prompt_sha256, prompt_preview, dry_run)"
+                " VALUES (?, ?, 'running', ?, ?, ?, ?)",
+                (
+                    run_id,
+                    started,
+                    workspace,
+                    hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+                    prompt[:PROMPT_PREVIEW_CHARS],
+                    int(dry_run),
+                ),
+            )
+
+    def record_completion(
+        self,
+        run_id: str,
+        status: str,
+        completed: float,
+        steps: int,
+        failure: Optional[str] = None,
+    ):
+        """Record a run's outcome."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET status = ?, completed = ?,"
+                " duration_seconds = ? - started, steps = ?, failure = ?"
+                " WHERE run_id = ?",
+                (status, completed, completed, steps, failure, run_id),
+            )
+
+    def record_resume(self, run_id: str):
+        """Mark a run as running again."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET status = 'running', completed = NULL,"
+                " duration_seconds = NULL, failure = NULL WHERE run_id = ?",
+                (run_id,),
+            )
+
+    def delete(self, run_ids: Iterable[str]):
+        """Drop runs whose files were removed."""
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM runs WHERE run_id = ?", [(r,) for r in run_ids]
+            )
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def list(
+        self,
+        limit: int = 20,
+        status: Optional[str] = None,
+        workspace: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """A page of runs, newest first, and the cursor for the next page."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        clauses: List[str] = []
+        params: List[Any] = []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if workspace:
+            clauses.append("workspace = ?")
+            params.append(workspace)
+        if since is not None:
+            clauses.append("started >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("started < ?")
+            params.append(until)
+        if cursor:
+            started, run_id = decode_cursor(cursor)
+            clauses.append("(started < ? OR (started = ? AND run_id < ?))")
+            params.extend([started, started, run_id])
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM runs{where}"
+                " ORDER BY started DESC, run_id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+
+        runs = [self._row(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last[1], last[0])
+        return {"runs": runs, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _row(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        run = dict(zip(_COLUMNS, row, strict=True))
+        run["dry_run"] = bool(run["dry_run"])
+        run["started"] = _iso(run["started"])
+        run["completed"] = _iso(run["completed"])
+        return run
+
+    def rebuild(self, headers: Iterable[Dict[str, Any]]) -> int:
+        """Index run headers written before the catalog existed."""
+        indexed = 0
+        for header in headers:
+            run_id = header.get("run_id")
+            started = _timestamp(header.get("timestamp"))
+            if not run_id or started is None:
+                continue
+            self.record_start(
+                run_id,
+                started,
+                header.get("prompt", ""),
+                header.get("workspace", ""),
+                header.get("dry_run", False),
+            )
+            completed = _timestamp(header.get("completed_at"))
+            if completed is not None:
+                results = header.get("results") or {}
+                self.record_completion(
+                    run_id,
+                    header.get("status", "completed"),
+                    completed,
+                    len(header.get("steps", [])),
+                    (
+                        failure_reason(results)
+                        if header.get("status") == "failed"
+                        else None
+                    ),
+                )
+            indexed += 1
+        return indexed
+
+
+def failure_reason(results: Dict[str, Any]) -> Optional[str]:
+    """Short description of why a run failed."""
+    reason = results.get("message") or results.get("error")
+    return str(reason)[:500] if reason else None
@@ -1,11 +1,70 @@
-"""State management for agent runs."""
+"""State management for agent runs.
+
+Each run is stored as two files:
+
+- ``run_<id>.json``: a small header (prompt, workspace, status, result
+  summary), rewritten atomically when the run starts and completes;
+- ``run_<id>.jsonl``: an append-only journal with one event per line
+  (``{"event": "step", "step": {...}}``, ...).
+
+Logging a step appends one line, so long runs never rewrite what they
+already recorded. Runs written before the journal existed keep their steps
+inside the header file and are still readable.
+
+The journal doubles as the run's checkpoint: each iteration's plan is
+journaled (with full step args) before it runs, and every finished step is
+committed by its own line, so an interrupted run can be resumed from
+``load_checkpoint``.
+
+Finished runs may have their journal compressed by ``RunRetention``;
+reading is transparent and resuming decompresses it first.
+"""
 
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List
 import json
+import os
 from datetime import datetime
 import uuid
 
+from jj_agent.compression import locate, open_text
+
+from .catalog import RunCatalog, failure_reason
+from .retention import decompress_run
+
+# Header format marker; legacy headers have none
+JOURNAL_FORMAT = "journal-v1"
+
+# Result keys too large for the header; their content lives in the journal
+_JOURNALED_RESULT_KEYS = {"results", "history"}
+
+
+def summarize_results(results: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact a job result for the run header.
+
+    Per-iteration step results (and the history that repeats them) are
+    already journaled step by step; the header keeps everything else plus
+    per-iteration counts.
+    """
+    summary = {k: v for k, v in results.items() if k not in _JOURNALED_RESULT_KEYS}
+    iterations = results.get("results")
+    if isinstance(iterations, list):
+        summary["iteration_summaries"] = [
+            {
+                "success": iteration.get("success"),
+                "steps": len(iteration.get("results", [])),
+                "failed_steps": [
+                    entry.get("step")
+                    for entry in iteration.get("results", [])
+                    if not entry.get("result", {}).get("success", False)
+                ],
+                "duration_seconds": iteration.get("duration_seconds"),
+            }
+            for iteration in iterations
+            if isinstance(iteration, dict)
+        ]
+    return summary
+
 
 class StateManager:
     """Manages state and logging for agent runs."""
@@ -14,76 +73,224 @@ class StateManager:
         self.state_dir = Path(state_dir)
         self.state_dir.mkdir(parents=True, exist_ok=True)
         self.current_run_id: Optional[str] = None
+        self._steps_logged = 0
+
+        # Index of every run for listing; built from the run files once
+        catalog_path = self.state_dir / "catalog.sqlite"
+        new_catalog = not catalog_path.exists()
+        self.catalog = RunCatalog(catalog_path)
+        if new_catalog:
+            self.reindex()
+
+    def _header_path(self, run_id: str) -> Path:
+        return self.state_dir / f"run_{run_id}.json"
+
+    def _journal_path(self, run_id: str) -> Path:
+        return self.state_dir / f"run_{run_id}.jsonl"
+
+    def _write_header(self, run_id: str, header: Dict[str, Any]):
+        path = self._header_path(run_id)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(header, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _read_header(self, run_id: str) -> Optional[Dict[str, Any]]:
+        path = self._header_path(run_id)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
 
     def start_run(self, prompt: str, workspace: Path, dry_run: bool = False) -> str:
         """Start a new run and return run ID."""
         run_id = str(uuid.uuid4())[:8]
         self.current_run_id = run_id
+        self._steps_logged = 0
+        started = datetime.now()
 
         run_data = {
             "run_id": run_id,
-            "timestamp": datetime.now().isoformat(),
+            "format": JOURNAL_FORMAT,
+            "timestamp": started.isoformat(),
             "prompt": prompt,
             "workspace": str(workspace),
             "dry_run": dry_run,
             "status": "running",
-            "steps": [],
         }
 
-        run_file = self.state_dir / f"run_{run_id}.json"
-        run_file.write_text(json.dumps(run_data, indent=2), encoding="utf-8")
+        self._journal_path(run_id).touch()
+        self._write_header(run_id, run_data)
+        self.catalog.record_start(
+            run_id, started.timestamp(), prompt, str(workspace), dry_run
+        )
 
         return run_id
 
-    def log_step(self, step: Dict[str, Any]):
-        """Log a step to the current run."""
+    def log_event(self, event: str, **data: Any):
+        """Append an event to the current run's journal."""
         if not self.current_run_id:
             return
 
-        run_file = self.state_dir / f"run_{self.current_run_id}.json"
-        if not run_file.exists():
+        journal = self._journal_path(self.current_run_id)
+        if not journal.exists():
             return
 
-        run_data = json.loads(run_file.read_text(encoding="utf-8"))
-        run_data["steps"].append(step)
-        run_file.write_text(json.dumps(run_data, indent=2), encoding="utf-8")
+        record = {"event": event, "timestamp": datetime.now().isoformat(), **data}
+        with journal.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    def log_step(self, step: Dict[str, Any]):
+        """Log a step to the current run."""
+        self.log_event("step", step=step)
+        self._steps_logged += 1
 
     def complete_run(self, success: bool, results: Optional[Dict[str, Any]] = None):
-        """Mark run as complete."""
+        """Mark run as complete, compacting the results into the header."""
         if not self.current_run_id:
             return
 
-        run_file = self.state_dir / f"run_{self.current_run_id}.json"
-        if not run_file.exists():
+        run_id = self.current_run_id
+        run_data = self._read_header(run_id)
+        if run_data is None:
             return
 
-        run_data = json.loads(run_file.read_text(encoding="utf-8"))
+        completed = datetime.now()
         run_data["status"] = "completed" if success else "failed"
-        run_data["completed_at"] = datetime.now().isoformat()
+        run_data["completed_at"] = completed.isoformat()
         if results:
+            if run_data.get("format") == JOURNAL_FORMAT:
+                results = summarize_results(results)
             run_data["results"] = results
 
-        run_file.write_text(json.dumps(run_data, indent=2), encoding="utf-8")
+        self.log_event("complete", status=run_data["status"])
+        self._write_header(run_id, run_data)
+        self.catalog.record_completion(
+            run_id,
+            run_data["status"],
+            completed.timestamp(),
+            self._steps_logged,
+            None if success else failure_reason(results or {}),
+        )
         self.current_run_id = None
 
-    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
-        """Get run data by ID."""
-        run_file = self.state_dir / f"run_{run_id}.json"
-        if not run_file.exists():
+    def resume_run(self, run_id: str) -> str:
+        """Reopen an interrupted run so further steps append to its journal."""
+        run_data = self._read_header(run_id)
+        if run_data is None:
+            raise ValueError(f"Run not found: {run_id}")
+
+        decompress_run(self.state_dir, run_id)
+        self.current_run_id = run_id
+        self._steps_logged = sum(
+            1 for event in self.iter_events(run_id) if event.get("event") == "step"
+        )
+        run_data["status"] = "running"
+        run_data.pop("completed_at", None)
+        self._write_header(run_id, run_data)
+        self.log_event("resume")
+        self.catalog.record_resume(run_id)
+        return run_id
+
+    def load_checkpoint(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Where an interrupted run stopped, rebuilt from its journal.
+
+        Returns the run header, the latest iteration and its plan, the
+        steps of that iteration already finished (keyed by plan index) and
+        the steps committed by earlier iterations. Step args come from the
+        journaled plans, since step events only keep compacted args.
+        ``interrupted`` is False once the run (or its latest resume) has
+        journaled a ``complete`` event.
+        Returns None for runs without a journaled plan (legacy runs, dry
+        runs, or runs interrupted while the plan was still streaming).
+        """
+        run_data = self._read_header(run_id)
+        if run_data is None or run_data.get("format") != JOURNAL_FORMAT:
+            return None
+
+        plans: Dict[int, List[Dict[str, Any]]] = {}
+        steps: List[Dict[str, Any]] = []
+        finished = False
+        for event in self.iter_events(run_id):
+            if event.get("event") == "plan":
+                plans[event["iteration"]] = event["plan"]
+            elif event.get("event") == "step":
+                steps.append(event["step"])
+            elif event.get("event") in ("complete", "resume"):
+                finished = event["event"] == "complete"
+        if not plans:
             return None
 
-        return json.loads(run_file.read_text(encoding="utf-8"))
-
-    def list_runs(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """List recent runs."""
-        runs: List[Dict[str, Any]] = []
-        for run_file in sorted(self.state_dir.glob("run_*.json"), reverse=True):
-            if len(runs) >= limit:
-                break
-            try:
-                run_data = json.loads(run_file.read_text(encoding="utf-8"))
-                runs.append(run_data)
-            except Exception:
+        iteration = max(plans)
+        completed: Dict[int, Dict[str, Any]] = {}
+        committed: List[Dict[str, Any]] = []
+        for step in steps:
+            plan = plans.get(step.get("iteration"))
+            index = step.get("step", 0) - 1
+            if plan is None or not 0 <= index < len(plan):
                 continue
+            entry = {**step, "args": plan[index].get("args", {})}
+            if step["iteration"] == iteration:
+                entry.pop("iteration")
+                completed[index] = entry
+            else:
+                committed.append(entry)
+
+        return {
+            "run": run_data,
+            "run_id": run_id,
+            "iteration": iteration,
+            "plan": plans[iteration],
+            "completed": completed,
+            "committed": committed,
+            "interrupted": run_data.get("status") == "running" or not finished,
+        }
+
+    def iter_events(self, run_id: str) -> Iterator[Dict[str, Any]]:
+        """Stream a run's journal events in order."""
+        journal = self._journal_path(run_id)
+        if locate(journal) is None:
+            return
+        with open_text(journal) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final line from a crash mid-write
+                    continue
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Get run data by ID, rebuilding its steps from the journal."""
+        run_data = self._read_header(run_id)
+        if run_data is None or run_data.get("format") != JOURNAL_FORMAT:
+            return run_data
+
+        run_data["steps"] = [
+            event["step"]
+            for event in self.iter_events(run_id)
+            if event.get("event") == "step"
+        ]
+        return run_data
+
+    def list_runs(self, limit: int = 10, **filters: Any) -> List[Dict[str, Any]]:
+        """List recent runs, newest first, from the catalog.
+
+        ``filters`` are passed to ``RunCatalog.list`` (status, workspace,
+        since, until, cursor).
+        """
+        return self.catalog.list(limit=limit, **filters)["runs"]
+
+    def reindex(self) -> int:
+        """Rebuild the catalog from the run files on disk."""
+
+        def headers() -> Iterator[Dict[str, Any]]:
+            for run_file in self.state_dir.glob("run_*.json"):
+                try:
+                    run = self.get_run(run_file.stem[len("run_") :])
+                except Exception:
+                    continue
+                if run:
+                    yield run
 
-        return runs
+        return self.catalog.rebuild(headers())
@@ -0,0 +1,240 @@
+"""Retention for run state: compression of finished runs and age/size budgets.
+
+Finished runs have their journal and per-job files (``exec.log``,
+``audit.jsonl``, spilled command output) compressed in place: ``x.jsonl``
+becomes ``x.jsonl.zst`` (or ``.gz`` when ``zstandard`` is not installed).
+Readers go through ``jj_agent.compression.open_text``, which finds whichever
+variant exists.
+Run headers stay uncompressed so listing and reindexing never decompress.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from jj_agent.compression import (
+    codec_of,
+    compress,
+    decompress,
+    locate,
+    resolve_codec,
+)
+
+
+def _tree_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class RunFiles:
+    """The files of one run in the state directory."""
+
+    def __init__(self, state_dir: Path, run_id: str):
+        self.run_id = run_id
+        self.header = state_dir / f"run_{run_id}.json"
+        self.journal = state_dir / f"run_{run_id}.jsonl"
+        self.job_dir = state_dir / run_id
+
+    def paths(self) -> List[Path]:
+        """Every existing file or directory belonging to the run."""
+        paths = [self.header, self.job_dir]
+        journal = locate(self.journal)
+        if journal is not None:
+            paths.append(journal)
+        return [p for p in paths if p.exists()]
+
+    def compressible(self) -> List[Path]:
+        """Plain (not yet compressed) data files."""
+        files = [self.journal] if self.journal.exists() else []
+        if self.job_dir.is_dir():
+            files.extend(
+                p
+                for p in sorted(self.job_dir.rglob("*"))
+                if p.is_file() and codec_of(p) is None and p.suffix != ".tmp"
+            )
+        return files
+
+    def temporary(self) -> List[Path]:
+        """Leftovers of compressions that were interrupted."""
+        files = list(self.journal.parent.glob(f"{self.journal.name}.*.tmp"))
+        if self.job_dir.is_dir():
+            files.extend(self.job_dir.rglob("*.tmp"))
+        return files
+
+    def size(self) -> int:
+        return sum(_tree_size(p) for p in self.paths())
+
+    def delete(self):
+        for path in self.paths():
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+
+
+def decompress_run(state_dir: Path, run_id: str):
+    """Decompress a run's files so it can be appended to again."""
+    files = RunFiles(Path(state_dir), run_id)
+    decompress(files.journal)
+    if files.job_dir.is_dir():
+        for path in list(files.job_dir.rglob("*")):
+            if path.is_file() and codec_of(path) is not None:
+                decompress(path.with_name(path.name.rsplit(".", 1)[0]))
+
+
+class RunRetention:
+    """Keeps the state directory within an age and size budget.
+
+    ``collect`` compresses runs that are no longer running (leaving files
+    written within ``min_idle_seconds`` alone), then deletes runs started
+    more than ``max_age_days`` ago and, if the runs still take more than
+    ``max_bytes``, the oldest finished runs until they fit. A budget of 0
+    disables it. Caches under ``state/cache`` have their own limits and are
+    not counted.
+
+    A run whose header still says "running" but was last written more
+    than ``abandon_after_seconds`` ago (the job time budget) belongs to a
+    process that crashed; it is compressed, counted and deleted like a
+    finished run. None keeps every running run.
+    """
+
+    def __init__(
+        self,
+        state_dir: Path,
+        max_age_days: float = 30,
+        max_bytes: int = 1024 * 1024 * 1024,
+        compression: str = "auto",
+        catalog=None,
+        min_idle_seconds: float = 300,
+        abandon_after_seconds: Optional[float] = None,
+    ):
+        self.state_dir = Path(state_dir)
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.codec = resolve_codec(compression)
+        self.catalog = catalog
+        self.min_idle_seconds = min_idle_seconds
+        self.abandon_after_seconds = abandon_after_seconds
+        self._thread: Optional[threading.Thread] = None
+
+    def _runs(self, now: float) -> List[Dict[str, Any]]:
+        runs = []
+        for header in self.state_dir.glob("run_*.json"):
+            run_id = header.stem[len("run_") :]
+            try:
+                updated = header.stat().st_mtime
+            except OSError:
+                continue
+            try:
+                data = json.loads(header.read_text(encoding="utf-8"))
+                started = datetime.fromisoformat(data["timestamp"]).timestamp()
+            except (OSError, ValueError, KeyError, TypeError):
+                data, started = {}, updated
+            # Headers are rewritten on start and resume, so a live job's
+            # header is never older than the job budget
+            live = data.get("status") == "running" and (
+                self.abandon_after_seconds is None
+                or updated > now - self.abandon_after_seconds
+            )
+            runs.append(
+                {
+                    "files": RunFiles(self.state_dir, run_id),
+                    "live": live,
+                    "started": started,
+                }
+            )
+        return sorted(runs, key=lambda run: run["started"])
+
+    def collect(self) -> Dict[str, Any]:
+        """Apply compression and the budgets; returns what was reclaimed."""
+        now = time.time()
+        compressed = 0
+        reclaimed = 0
+        runs = self._runs(now)
+
+        if self.codec is not None:
+            idle_before = now - self.min_idle_seconds
+            for run in runs:
+                if run["live"]:
+                    continue
+                for path in run["files"].temporary():
+                    try:
+                        if path.stat().st_mtime <= idle_before:
+                            reclaimed += path.stat().st_size
+                            path.unlink()
+                    except OSError:
+                        continue
+                for path in run["files"].compressible():
+                    try:
+                        if path.stat().st_mtime > idle_before:
+                            continue
+                        reclaimed += compress(path, self.codec)
+                        compressed += 1
+                    except OSError:
+                        continue
+
+        deleted: List[str] = []
+        kept = []
+        cutoff = now - self.max_age_days * 86400
+        for run in runs:
+            if self.max_age_days and run["started"] < cutoff and not run["live"]:
+                reclaimed += self._delete(run, deleted)
+            else:
+                kept.append(run)
+
+        total = sum(run["files"].size() for run in kept)
+        if self.max_bytes and total > self.max_bytes:
+            for run in kept:
+                if total <= self.max_bytes:
+                    break
+                if run["live"]:
+                    continue
+                freed = self._delete(run, deleted)
+                total -= freed
+                reclaimed += freed
+
+        if deleted and self.catalog is not None:
+            self.catalog.delete(deleted)
+
+        return {
+            "compressed_files": compressed,
+            "deleted_runs": len(deleted),
+            "reclaimed_bytes": reclaimed,
+            "total_bytes": total,
+        }
+
+    @staticmethod
+    def _delete(run: Dict[str, Any], deleted: List[str]) -> int:
+        files = run["files"]
+        size = files.size()
+        files.delete()
+        deleted.append(files.run_id)
+        return size
+
+    def start_background(self):
+        """Run ``collect`` on a daemon thread (e.g. while a job plans)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._collect_quietly, name="jj-state-gc", daemon=True
+        )
+        self._thread.start()
+
+    def _collect_quietly(self):
+        try:
+            self.collect()
+        except Exception:
+            pass  # Retention must never fail a job
@@ -0,0 +1,44 @@
+"""Tests for result caches."""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.memo import StepCache
+
+
+def test_step_cache_key_tracks_inputs(tmp_path):
+    """Changing an input file changes the key; unrelated files do not."""
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    (workspace / "requirements.txt").write_text("fastapi\n")
+    cache = StepCache(tmp_path / "cache", workspace, max_bytes=1 << 20)
+
+    key = cache.key("pkg_install", {"packages": None})
+    cache.put([key], "pkg_install", {"success": True, "stdout": "ok"})
+    assert cache.get(key) == {"success": True, "stdout": "ok"}
+
+    (workspace / "README.md").write_text("docs")
+    assert cache.key("pkg_install", {}) == key
+
+    (workspace / "requirements.txt").write_text("fastapi\nuvicorn\n")
+    assert cache.key("pkg_install", {}) != key
+
+
+def test_step_cache_evicts_least_recently_used(tmp_path):
+    """The oldest untouched entry goes first when over budget."""
+    cache = StepCache(tmp_path / "cache", tmp_path, max_bytes=1 << 20)
+    result = {"success": True, "stdout": "x" * 50}
+
+    cache.put(["a" * 64], "tests_run", result)
+    old = cache._entry_path("a" * 64)
+    cache.max_bytes = old.stat().st_size * 2
+    cache.put(["b" * 64], "tests_run", result)
+    os.utime(old, (1, 1))
+    cache._entry_path("b" * 64).touch()
+    cache.put(["c" * 64], "tests_run", result)
+
+    assert cache.get("a" * 64) is None
+    assert cache.get("c" * 64) is not None
@@ -0,0 +1,98 @@
+"""Tests for bounded streaming capture of command output."""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from runtime.capture import OutputCapture, OutputSpool, capture_sync
+from runtime.localsafe import LocalSafeRuntime
+
+# 20000 numbered lines, about 200 KB
+CHATTY = (
+    f'"{sys.executable}" -c "import sys; '
+    "[print(f'line {i:05d}') for i in range(20000)]; "
+    "print('done', file=sys.stderr)\""
+)
+
+
+def make_runtime(workspace: Path, spill_dir=None) -> LocalSafeRuntime:
+    runtime = LocalSafeRuntime(workspace, {"allowed_paths": [str(workspace / "**")]})
+    runtime.spool = OutputSpool(head_bytes=100, tail_bytes=200, spill_dir=spill_dir)
+    return runtime
+
+
+@pytest.mark.asyncio
+async def test_chatty_command_keeps_head_and_tail_and_spills(tmp_path):
+    runtime = make_runtime(tmp_path, spill_dir=tmp_path / "output")
+    lines = []
+    runtime.spool.subscribe(lambda label, stream, line: lines.append((stream, line)))
+
+    result = await runtime.run_async(CHATTY)
+
+    assert result["success"]
+    assert result["stdout"].startswith("line 00000\n")
+    assert result["stdout"].endswith("line 19999\n")
+    assert "bytes omitted" in result["stdout"]
+    assert len(result["stdout"]) < 500
+    assert result["stderr"] == "done\n"
+
+    spilled = Path(result["stdout_file"]).read_text().splitlines()
+    assert len(spilled) == 20000 and spilled[-1] == "line 19999"
+    assert len(lines) == 20001
+    assert ("stdout", "line 12345") in lines and ("stderr", "done") in lines
+
+
+def test_sync_run_uses_the_same_capture(tmp_path):
+    runtime = make_runtime(tmp_path)
+    result = runtime.run(CHATTY)
+
+    assert result["success"]
+    assert result["stdout"].endswith("line 19999\n")
+    assert "stdout_file" not in result
+
+
+@pytest.mark.parametrize("new_session", [True, False])
+def test_sync_timeout_kills_the_child(tmp_path, new_session):
+    # Without its own session the child is not a group leader, so the
+    # kill falls back from killpg to the child itself
+    process = subprocess.Popen(
+        ["sleep", "3"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=new_session,
+    )
+    stdout, stderr = OutputSpool(spill_dir=tmp_path).open()
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        capture_sync(process, 0.5, stdout, stderr)
+    assert time.monotonic() - start < 2
+
+
+def test_ring_buffer_memory_stays_flat():
+    capture = OutputCapture("0001", "stdout", head_bytes=16, tail_bytes=64)
+    for i in range(10000):
+        capture.feed(f"chunk {i}\n".encode())
+
+    assert capture.total_bytes > 80000
+    assert len(capture._head) == 16
+    assert capture._tail_size < 64 + len(b"chunk 9999\n")
+    assert capture.text().endswith("chunk 9999\n")
+
+
+def test_spool_labels_continue_after_existing_spill_files(tmp_path):
+    """A resumed job's spool never reuses (and truncates) earlier files."""
+    (tmp_path / "0007.stdout.log").write_text("first session")
+    (tmp_path / "0003.stderr.log.gz").write_bytes(b"")
+
+    spool = OutputSpool(spill_dir=tmp_path)
+    stdout, stderr = spool.open()
+
+    assert stdout.spill_path == tmp_path / "0008.stdout.log"
+    assert stderr.spill_path == tmp_path / "0008.stderr.log"
+    assert spool.open()[0].spill_path == tmp_path / "0009.stdout.log"
+    assert (tmp_path / "0007.stdout.log").read_text() == "first session"
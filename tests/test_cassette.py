@@ -0,0 +1,140 @@
+"""Tests for LLM record/replay cassettes."""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import Planner
+from api.cassette import Cassette, CassetteMiss
+from api.llm_client import LLMClient
+from metrics import metrics
+
+TOOL_ARGS = json.dumps({"path": "hello.txt", "content": "hi"})
+
+
+def tool_call_response():
+    return ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls",
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [
+                            {
+                                "id": "call_0",
+                                "type": "function",
+                                "function": {
+                                    "name": "fs_write",
+                                    "arguments": TOOL_ARGS,
+                                },
+                            }
+                        ],
+                    },
+                }
+            ],
+        }
+    )
+
+
+def tool_call_chunks():
+    pieces = [TOOL_ARGS[:10], TOOL_ARGS[10:]]
+    for i, piece in enumerate(pieces):
+        tool_call = {"index": 0, "function": {"arguments": piece}}
+        if i == 0:
+            tool_call.update(id="call_0", type="function")
+            tool_call["function"]["name"] = "fs_write"
+        yield ChatCompletionChunk.model_validate(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": "gpt-4o-mini",
+                "choices": [{"index": 0, "delta": {"tool_calls": [tool_call]}}],
+            }
+        )
+
+
+class RecordingApi:
+    """Stands in for the OpenAI API while recording."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        if kwargs.get("stream"):
+
+            async def stream():
+                for chunk in tool_call_chunks():
+                    yield chunk
+
+            return stream()
+        return tool_call_response()
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_offline(tmp_path, monkeypatch):
+    path = tmp_path / "plan.cassette.jsonl"
+    recorder = LLMClient(api_key="test", cassette=Cassette(path, mode="record"))
+    api = RecordingApi()
+    recorder.client = SimpleNamespace(chat=SimpleNamespace(completions=api))
+
+    planner = Planner(recorder)
+    recorded = await planner.plan("write hello")
+    streamed = [step async for step in planner.plan_stream("write hello")]
+    assert api.calls == 2
+
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    replayer = LLMClient(cassette=Cassette(path, mode="replay"))
+    planner = Planner(replayer)
+    stats = metrics.llm_phases["plan"]
+    calls, cached, timed = stats["calls"], stats["cached_calls"], len(stats["ttfts"])
+    assert await planner.plan("write hello") == recorded
+    assert [step async for step in planner.plan_stream("write hello")] == streamed
+    assert streamed[0]["args"] == json.loads(TOOL_ARGS)
+
+    # Replays are counted apart and never skew latency or TTFT
+    assert stats["cached_calls"] == cached + 2
+    assert stats["calls"] == calls
+    assert len(stats["ttfts"]) == timed
+
+
+@pytest.mark.asyncio
+async def test_strict_replay_rejects_unknown_requests(tmp_path):
+    path = tmp_path / "empty.jsonl"
+    path.write_text("")
+    cassette = Cassette(path, mode="replay", strict=True)
+    with pytest.raises(CassetteMiss):
+        await cassette.send({"model": "m", "messages": []}, None)
+
+
+@pytest.mark.asyncio
+async def test_loose_replay_falls_back_only_within_the_same_model(tmp_path):
+    path = tmp_path / "plan.cassette.jsonl"
+    recorder = Cassette(path, mode="record")
+    request = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "a"}]}
+
+    async def send():
+        return tool_call_response()
+
+    await recorder.send(request, send)
+
+    cassette = Cassette(path, mode="replay")
+    with pytest.raises(CassetteMiss):
+        await cassette.send({**request, "model": "gpt-4o"}, None)
+    changed = {**request, "messages": [{"role": "user", "content": "b"}]}
+    response = await cassette.send(changed, None)
+    assert response.choices[0].message.tool_calls[0].function.name == "fs_write"
@@ -0,0 +1,101 @@
+"""Tests for the run catalog."""
+
+import json
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import api.server as server
+from state.catalog import RunCatalog
+from state.manager import StateManager
+
+
+def test_list_is_newest_first_filtered_and_paginated(tmp_path):
+    catalog = RunCatalog(tmp_path / "catalog.sqlite")
+    for i in range(25):
+        catalog.record_start(f"run{i:02d}", 1000.0 + i, f"prompt {i}", "/ws/a")
+        if i % 2:
+            catalog.record_completion(f"run{i:02d}", "failed", 1010.0 + i, 3, "boom")
+
+    seen = []
+    cursor = None
+    while True:
+        page = catalog.list(limit=10, cursor=cursor)
+        seen.extend(run["run_id"] for run in page["runs"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [f"run{i:02d}" for i in reversed(range(25))]
+
+    failed = catalog.list(limit=100, status="failed")["runs"]
+    assert len(failed) == 12
+    assert failed[0]["duration_seconds"] == 10.0
+    assert failed[0]["steps"] == 3
+    assert failed[0]["failure"] == "boom"
+    assert catalog.list(workspace="/ws/b")["runs"] == []
+    assert len(catalog.list(limit=100, since=1020.0)["runs"]) == 5
+
+    with pytest.raises(ValueError):
+        catalog.list(cursor="not-a-cursor")
+
+
+def test_state_manager_records_runs_and_indexes_legacy_files(tmp_path):
+    state_dir = tmp_path / "state"
+    state_dir.mkdir()
+    legacy = {
+        "run_id": "legacy01",
+        "timestamp": "2024-01-01T10:00:00",
+        "completed_at": "2024-01-01T10:00:30",
+        "prompt": "old job",
+        "workspace": "/ws",
+        "status": "failed",
+        "steps": [{"step": 1}, {"step": 2}],
+        "results": {"error": "it broke"},
+    }
+    (state_dir / "run_legacy01.json").write_text(json.dumps(legacy))
+
+    # A new catalog picks up runs written before it existed
+    manager = StateManager(state_dir)
+    [run] = manager.list_runs()
+    assert run["run_id"] == "legacy01"
+    assert run["duration_seconds"] == 30.0
+    assert run["steps"] == 2
+    assert run["failure"] == "it broke"
+
+    run_id = manager.start_run("new job", tmp_path)
+    assert manager.list_runs(status="running")[0]["run_id"] == run_id
+    manager.log_step({"step": 1, "tool": "shell_run", "result": {}})
+    manager.complete_run(True, {"success": True})
+
+    runs = StateManager(state_dir).list_runs()
+    assert [r["run_id"] for r in runs] == [run_id, "legacy01"]
+    assert runs[0]["status"] == "completed"
+    assert runs[0]["steps"] == 1
+    assert runs[0]["failure"] is None
+
+
+@pytest.mark.asyncio
+async def test_runs_api(tmp_path, monkeypatch):
+    manager = StateManager(tmp_path / "state")
+    run_ids = [manager.start_run(f"job {i}", tmp_path) for i in range(3)]
+    monkeypatch.setattr(server, "_state_manager", manager)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://jj") as client:
+        first = (await client.get("/runs", params={"limit": 2})).json()
+        assert len(first["runs"]) == 2
+        rest = (
+            await client.get("/runs", params={"cursor": first["next_cursor"]})
+        ).json()
+        listed = [r["run_id"] for r in first["runs"] + rest["runs"]]
+        assert sorted(listed) == sorted(run_ids)
+        assert rest["next_cursor"] is None
+
+        run = (await client.get(f"/runs/{run_ids[0]}")).json()
+        assert run["prompt"] == "job 0"
+        assert (await client.get("/runs/missing")).status_code == 404
+        assert (await client.get("/runs", params={"cursor": "x"})).status_code == 400
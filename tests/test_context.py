@@ -0,0 +1,59 @@
+"""Tests for the fix-plan failure context compactor."""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.context import FailureContextBuilder, relevant_output
+from agent.tokens import estimate_tokens
+
+
+def test_relevant_output_keeps_traceback_and_tail():
+    noise = [f"collecting item {i}" for i in range(200)]
+    traceback = [
+        "Traceback (most recent call last):",
+        '  File "app.py", line 3, in <module>',
+        "    main()",
+        "ValueError: bad config",
+    ]
+    text = "\n".join(noise[:100] + traceback + noise[100:] + ["1 failed"])
+
+    compact = relevant_output(text, tail_lines=5)
+
+    assert "\n".join(traceback) in compact
+    assert compact.endswith("1 failed")
+    assert "collecting item 50" not in compact
+    assert "lines omitted" in compact
+
+
+def test_build_dedupes_and_respects_ceiling():
+    stderr = "\n".join(["warning: noisy"] * 500 + ["error: missing module foo"])
+    failures = [
+        {
+            "tool": "shell_run",
+            "args": {"command": f"python step{i}.py"},
+            "result": {"success": False, "error": "exit 1", "stderr": stderr},
+        }
+        for i in range(3)
+    ]
+    history = [
+        {
+            "tool": "fs_write",
+            "args": {"path": f"f{i}.py", "content": "x = 1\n" * 2000},
+            "result": {"success": True},
+        }
+        for i in range(10)
+    ]
+
+    builder = FailureContextBuilder(max_tokens=600)
+    context, savings = builder.build(failures, history)
+
+    assert len(context["failures"]) == 1
+    assert context["failures"][0]["occurrences"] == 3
+    assert "error: missing module foo" in context["failures"][0]["result"]["stderr"]
+    assert "x = 1" not in json.dumps(context)
+    assert estimate_tokens(json.dumps(context)) <= 600
+    assert savings["saved_tokens"] > 0
+    assert savings["compact_tokens"] < savings["original_tokens"]
@@ -0,0 +1,67 @@
+"""Tests for sandbox dependency cache mounts."""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from runtime.depcache import LAST_USED, MOUNT_LEASE, DependencyCaches, image_key
+from runtime.sandboxed import SandboxedRuntime
+
+
+def test_caches_are_mounted_per_image(tmp_path):
+    capabilities = {"sandbox": {"image": "node:20-slim", "cache_mounts": ["npm"]}}
+    runtime = SandboxedRuntime(tmp_path, capabilities)
+    runtime.enable_dependency_caches(tmp_path / "cache", max_bytes=1 << 20)
+
+    cmd = runtime._build_run_command("npm ci")
+
+    cache_dir = tmp_path / "cache" / image_key("node:20-slim") / "npm"
+    assert "node:20-slim" in cmd
+    assert f"type=bind,source={cache_dir},target=/cache/npm,readonly=false" in cmd
+    assert "npm_config_cache=/cache/npm" in cmd
+    assert not any("/cache/pip" in arg for arg in cmd)
+    assert image_key("node:20-slim") != image_key("node:20")
+
+
+def test_eviction_drops_least_recently_used_first(tmp_path):
+    caches = DependencyCaches(tmp_path, "python:3.11-slim", max_bytes=1500)
+    mounted = DependencyCaches(tmp_path, "python:3.11-slim", 0, names=["npm"])
+    for i, name in enumerate(["pip", "uv", "npm"]):
+        path = caches.path(name)
+        path.mkdir(parents=True)
+        (path / "blob").write_bytes(b"x" * 1000)
+        (path / LAST_USED).touch()
+        # pip oldest; all used within the last few minutes
+        used = time.time() - 300 + i * 60
+        os.utime(path / LAST_USED, (used, used))
+    # npm is still mounted by a live runtime
+    mounted.mount_args()
+
+    stats = caches.evict()
+
+    assert stats["removed"] == 2
+    assert not caches.path("pip").exists() and not caches.path("uv").exists()
+    assert caches.path("npm").exists()
+
+    mounted.release()
+    caches.max_bytes = 0
+    assert caches.evict()["removed"] == 1
+
+
+def test_leases_of_dead_processes_are_ignored(tmp_path):
+    caches = DependencyCaches(tmp_path, "python:3.11-slim", max_bytes=0)
+    caches.mount_args()
+    for name in ("pip", "uv", "npm"):
+        (caches.path(name) / "blob").write_bytes(b"x")
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    stale = caches.path("pip") / f"{MOUNT_LEASE}.{dead.pid}.0"
+    stale.touch()
+    caches.release()
+
+    assert caches.evict()["removed"] == 3
+    assert not stale.exists()
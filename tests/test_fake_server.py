@@ -0,0 +1,67 @@
+"""Tests for the fake OpenAI-compatible server."""
+
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import Planner, PlanningError
+from api.fake_server import FakeLLM, create_app
+from api.llm_client import LLMClient
+from api.transport import ResilientCaller
+
+SCRIPT = [
+    [
+        {"tool": "fs_mkdir", "args": {"path": "app"}},
+        {"tool": "fs_write", "args": {"path": "app/main.py", "content": "print(1)\n"}},
+    ]
+]
+
+
+def client_for(fake):
+    """LLMClient talking to the fake server in-process."""
+    llm = LLMClient(
+        api_key="test",
+        caller=ResilientCaller(max_retries=2, backoff_base=0.001, backoff_max=0.01),
+    )
+    transport = httpx.ASGITransport(app=create_app(fake))
+    llm.client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://fake-llm/v1",
+        http_client=httpx.AsyncClient(transport=transport),
+        max_retries=0,
+    )
+    return llm
+
+
+@pytest.mark.asyncio
+async def test_scripted_plan_plain_and_streamed():
+    fake = FakeLLM(latency_ms=0, chunk_delay_ms=0, script=SCRIPT)
+    planner = Planner(client_for(fake))
+
+    plan = await planner.plan("build")
+    streamed = [step async for step in planner.plan_stream("build")]
+
+    expected = [(s["tool"], s["args"]) for s in SCRIPT[0]]
+    assert [(s["tool"], s["args"]) for s in plan] == expected
+    assert [(s["tool"], s["args"]) for s in streamed] == expected
+
+
+@pytest.mark.asyncio
+async def test_injected_errors_are_retried_then_surface():
+    fake = FakeLLM(latency_ms=0, error_rate=1.0, seed=1)
+    planner = Planner(client_for(fake))
+
+    with pytest.raises(PlanningError):
+        await planner.plan("build")
+    assert fake.requests == 3
+
+
+def test_random_plans_use_planner_tools():
+    fake = FakeLLM(seed=7, completion_tokens=100)
+    tools = {step["tool"] for step in fake.plan()}
+    assert tools <= {"fs_mkdir", "fs_write"}
@@ -0,0 +1,93 @@
+"""Tests for the on-disk LLM response cache."""
+
+import sqlite3
+import sys
+import time
+from contextlib import closing
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api.cache import ResponseCache, request_key
+from api.llm_client import LLMClient
+
+
+def completion(content):
+    return ChatCompletion.model_validate(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }
+            ],
+        }
+    )
+
+
+class CountingCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        return completion(f"answer {self.calls}")
+
+
+def test_request_key_ignores_argument_order():
+    a = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+    b = {"messages": [{"content": "hi", "role": "user"}], "model": "m"}
+    assert request_key(a) == request_key(b)
+    assert request_key(a) != request_key({**a, "temperature": 0.3})
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = ResponseCache(tmp_path / "llm.sqlite", ttl_seconds=0, max_bytes=10**6)
+    cache.put("a", {"x": 1})
+    assert cache.get("a") == {"x": 1}
+
+    cache.ttl_seconds = 0.01
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+    path = tmp_path / "lru.sqlite"
+    cache = ResponseCache(path, ttl_seconds=0, max_bytes=10**6)
+    cache.put("a", {"x": "a" * 50})
+    with closing(sqlite3.connect(path)) as conn:
+        size = conn.execute("SELECT size FROM responses").fetchone()[0]
+
+    # Room for two entries: the least recently used one goes first
+    cache.max_bytes = 2 * size
+    cache.put("b", {"x": "b" * 50})
+    cache.get("a")
+    cache.put("c", {"x": "c" * 50})
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_hit_cache(tmp_path):
+    cache = ResponseCache(tmp_path / "llm.sqlite", ttl_seconds=3600, max_bytes=10**6)
+    client = LLMClient(api_key="test", cache=cache)
+    completions = CountingCompletions()
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    request = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hi"}]}
+    first = await client.chat.completions.create(**request)
+    second = await client.chat.completions.create(**request)
+    assert completions.calls == 1
+    assert second.choices[0].message.content == first.choices[0].message.content
+    # Planner telemetry keeps cache hits out of latency stats
+    assert second.served_locally and not getattr(first, "served_locally", False)
+
+    await client.create(cache_bypass=True, **request)
+    assert completions.calls == 2
@@ -0,0 +1,92 @@
+"""Tests for the buffered structured logger."""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from jj_agent.logging import Logger
+from jj_agent.logging.writer import LogWriter, get_writer
+
+
+def test_logger_filters_redacts_and_keeps_one_handle(tmp_path):
+    log_file = tmp_path / "job" / "exec.log"
+    logger = Logger(job_id="job1", log_file=log_file, level="INFO")
+
+    logger.debug("skipped", detail="x")
+    for i in range(100):
+        logger.info("step", step=i, token="sk-" + "a" * 30)
+    assert logger.flush()
+
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [e["step"] for e in entries] == list(range(100))
+    assert all(e["level"] == "INFO" and e["job_id"] == "job1" for e in entries)
+    assert entries[0]["token"] == "[REDACTED]"
+
+    writer = get_writer()
+    assert log_file in writer._handles
+    logger.close()
+    assert log_file not in writer._handles
+
+    # Logging after close reopens the file and appends
+    logger.warning("again")
+    assert logger.flush()
+    assert json.loads(log_file.read_text().splitlines()[-1])["message"] == "again"
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    writer = LogWriter(max_queue=2, stderr=False, block_timeout=0.05)
+    gate = threading.Event()
+    log_file = tmp_path / "exec.log"
+
+    def slow(entry):
+        gate.wait(5)
+        return json.dumps(entry)
+
+    writer.submit((log_file, {"n": 0}, slow))
+    deadline = time.monotonic() + 5
+    while writer._queue.qsize() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    # The writer is stuck formatting entry 0; two more fit in the queue
+    assert writer.submit((log_file, {"n": 1}, json.dumps))
+    assert writer.submit((log_file, {"n": 2}, json.dumps))
+    started = time.monotonic()
+    assert not writer.submit((log_file, {"n": 3}, json.dumps))
+    assert time.monotonic() - started < 0.05
+    # Errors wait briefly for room before giving up
+    assert not writer.submit((log_file, {"n": 4}, json.dumps), block=True)
+    assert writer.dropped == 2
+
+    gate.set()
+    writer.stop()
+    lines = log_file.read_text().splitlines()
+    assert [json.loads(line)["n"] for line in lines] == [0, 1, 2]
+    assert not writer._handles
+
+
+def test_entries_are_snapshotted_and_bad_ones_counted(tmp_path):
+    writer = LogWriter(stderr=False)
+    log_file = tmp_path / "exec.log"
+
+    def broken(entry):
+        raise TypeError("cannot serialize")
+
+    writer.submit((log_file, {"n": 0}, broken))
+    writer.submit((log_file, {"n": 1}, json.dumps))
+    assert writer.flush()
+    assert writer.dropped == 1
+    writer.stop()
+    assert [json.loads(line)["n"] for line in log_file.read_text().splitlines()] == [1]
+
+    logger = Logger(log_file=tmp_path / "job.log")
+    args = {"path": "a.txt"}
+    logger.info("step", args=args)
+    args["path"] = "changed"
+    assert logger.flush()
+    entry = json.loads((tmp_path / "job.log").read_text())
+    assert entry["args"] == {"path": "a.txt"}
+    logger.close()
@@ -0,0 +1,104 @@
+"""Tests for the plan optimizer."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.optimizer import PlanOptimizer
+
+
+def step(tool, **args):
+    return {"tool": tool, "args": args}
+
+
+def test_writes_and_patches_coalesce():
+    """Superseded writes vanish and patches fold into the surviving write."""
+    plan = [
+        step("fs_mkdir", path="app"),
+        step("fs_write", path="app/main.py", content="v1"),
+        step("fs_write", path="app/main.py", content="print('x')"),
+        step("fs_patch", path="app/main.py", old_string="x", new_string="y"),
+    ]
+    optimized, report = PlanOptimizer().optimize(plan)
+
+    assert optimized == [step("fs_write", path="app/main.py", content="print('y')")]
+    assert report["removed_steps"] == 3
+    assert plan[2]["args"]["content"] == "print('x')", "input plan is not mutated"
+
+
+def test_patch_chain_becomes_multi_edit(tmp_path):
+    """Patches on a file that is not written in the plan are merged."""
+    (tmp_path / "a.py").write_text("13")
+    plan = [
+        step("fs_patch", path="a.py", old_string="1", new_string="2"),
+        step("fs_write", path="b.py", content=""),
+        step("fs_patch", path="a.py", old_string="3", new_string="4"),
+    ]
+    optimized, _ = PlanOptimizer(tmp_path).optimize(plan)
+
+    assert optimized[0]["args"]["edits"] == [
+        {"old_string": "1", "new_string": "2"},
+        {"old_string": "3", "new_string": "4"},
+    ]
+    assert len(optimized) == 2
+
+
+def test_patches_that_may_fail_are_kept_in_order(tmp_path):
+    """Only patches known to apply are merged or superseded."""
+    (tmp_path / "a.py").write_text("1")
+    plan = [
+        # The second edit does not apply: merging would undo the first
+        step("fs_patch", path="a.py", old_string="1", new_string="2"),
+        step("fs_patch", path="a.py", old_string="9", new_string="0"),
+        # Fails on a missing file; a later write must not hide that
+        step("fs_patch", path="new.py", old_string="x", new_string="y"),
+        step("fs_write", path="new.py", content="x"),
+        # Nothing is known about the file after a barrier
+        step("shell_run", command="make"),
+        step("fs_patch", path="a.py", old_string="2", new_string="3"),
+        step("fs_patch", path="a.py", old_string="3", new_string="4"),
+    ]
+    optimized, report = PlanOptimizer(tmp_path).optimize(plan)
+
+    assert optimized == plan
+    assert report["removed_steps"] == 0
+    assert PlanOptimizer().optimize(plan[:2])[0] == plan[:2]
+
+
+def test_barriers_and_reads_block_rewrites():
+    """Steps observed by a read or a shell command are kept."""
+    plan = [
+        step("fs_mkdir", path="build"),
+        step("shell_run", command="ls build"),
+        step("fs_write", path="build/out.txt", content="a"),
+        step("fs_read", path="build/out.txt"),
+        step("fs_write", path="build/out.txt", content="b"),
+    ]
+    optimized, report = PlanOptimizer().optimize(plan)
+
+    assert optimized == plan
+    assert report["removed_steps"] == 0
+
+
+def test_git_adds_merge():
+    """Adjacent git_add calls collapse when staging stays the same."""
+    plan = [
+        step("git_init"),
+        step("git_add", files="a.py"),
+        step("fs_write", path="b.py", content=""),
+        step("git_add", files="b.py"),
+        step("git_add", files="."),
+        step("git_init"),
+        step("git_commit", message="init"),
+    ]
+    optimized, report = PlanOptimizer().optimize(plan)
+
+    assert [s["tool"] for s in optimized] == [
+        "git_init",
+        "fs_write",
+        "git_add",
+        "git_commit",
+    ]
+    assert optimized[2]["args"]["files"] == "."
+    assert report["rewrites"] == {"merged_git_adds": 2, "duplicate_steps": 1}
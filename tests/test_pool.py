@@ -0,0 +1,86 @@
+"""Tests for the warm sandbox container pool."""
+
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from runtime.sandboxed import SandboxedRuntime
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="fake docker is a script")
+
+# Stands in for docker: logs every call and runs exec'd commands on the host
+FAKE_DOCKER = """#!{python}
+import json, os, subprocess, sys
+
+args = sys.argv[1:]
+with open(os.environ["FAKE_DOCKER_LOG"], "a") as log:
+    log.write(json.dumps(args) + "\\n")
+if args[0] == "exec":
+    # Drop the "timeout N" wrapper so a killed exec takes its command along
+    workdir, command = args[2], args[-1].split(" ", 2)[2]
+    cwd = os.environ["FAKE_DOCKER_ROOT"] + workdir[len("/workspace"):]
+    sys.exit(subprocess.call(["sh", "-c", command], cwd=cwd))
+"""
+
+
+@pytest.fixture
+def fake_docker(tmp_path, monkeypatch):
+    script = tmp_path / "docker"
+    script.write_text(FAKE_DOCKER.format(python=sys.executable))
+    script.chmod(0o755)
+    log = tmp_path / "docker.log"
+    workspace = tmp_path / "ws"
+    (workspace / "sub").mkdir(parents=True)
+    monkeypatch.setenv("FAKE_DOCKER_LOG", str(log))
+    monkeypatch.setenv("FAKE_DOCKER_ROOT", str(workspace))
+
+    def calls(verb):
+        lines = log.read_text().splitlines() if log.exists() else []
+        return [args for args in map(json.loads, lines) if args[0] == verb]
+
+    runtime = SandboxedRuntime(workspace, {}, pool_size=1, pool_max_commands=3)
+    runtime.container_runtime = str(script)
+    yield runtime, calls
+    runtime.close()
+
+
+@pytest.mark.asyncio
+async def test_commands_reuse_warm_containers(fake_docker):
+    runtime, calls = fake_docker
+
+    results = [await runtime.run_async(f"echo {i}") for i in range(4)]
+    in_sub = await runtime.run_async("pwd", cwd=str(runtime.workspace / "sub"))
+
+    assert [r["stdout"] for r in results] == ["0\n", "1\n", "2\n", "3\n"]
+    assert all(r["pooled"] for r in results)
+    assert in_sub["stdout"].strip().endswith("sub")
+    # Three commands per container; the spent one is removed and replaced
+    starts = calls("run")
+    assert len(starts) == 2
+    assert all("--read-only" in args and args[-1] == "infinity" for args in starts)
+    assert len(calls("exec")) == 5
+
+    names = {args[args.index("--name") + 1] for args in starts}
+    await runtime.aclose()
+    removed = {name for args in calls("rm") for name in args[2:]}
+    assert names <= removed
+
+
+@pytest.mark.asyncio
+async def test_timed_out_container_is_replaced(fake_docker):
+    runtime, calls = fake_docker
+
+    # A job deadline cancels the command; killing the exec client leaves
+    # it running in the container, so the container is retired
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(runtime.run_async("sleep 5"), 0.5)
+    after = await runtime.run_async("echo ok")
+
+    assert after["stdout"] == "ok\n"
+    assert len(calls("run")) == 2
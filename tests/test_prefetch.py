@@ -0,0 +1,92 @@
+"""Tests for speculative prefetch of environment steps."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import Executor
+
+
+def make_executor(tmp_path):
+    capabilities = {"allowed_paths": [str(tmp_path / "**")], "denied_paths": []}
+    executor = Executor(tmp_path, capabilities, llm_client=None)
+    calls = []
+
+    async def fake_install(packages=None, manager=None, path=None, dry_run=False):
+        calls.append((tmp_path / "requirements.txt").read_text())
+        await asyncio.sleep(0.05)
+        return {"success": True, "stdout": "installed"}
+
+    executor.pkg.install_async = fake_install
+    return executor, calls
+
+
+@pytest.mark.asyncio
+async def test_prefetched_install_is_adopted(tmp_path):
+    """A matching plan step reuses the speculative install."""
+    (tmp_path / "requirements.txt").write_text("requests\n")
+    executor, calls = make_executor(tmp_path)
+
+    executor.start_prefetch()
+    result = await executor.execute_plan([{"tool": "pkg_install", "args": {}}])
+
+    assert result["success"]
+    assert result["results"][0]["result"]["prefetched"]
+    assert len(calls) == 1
+    executor.close()
+
+
+@pytest.mark.asyncio
+async def test_prefetch_discarded_when_manifest_changes(tmp_path):
+    """Rewriting the manifest before the install invalidates speculation."""
+    (tmp_path / "requirements.txt").write_text("requests\n")
+    executor, calls = make_executor(tmp_path)
+
+    executor.start_prefetch()
+    result = await executor.execute_plan(
+        [
+            {
+                "tool": "fs_write",
+                "args": {"path": "requirements.txt", "content": "httpx\n"},
+            },
+            {"tool": "pkg_install", "args": {}},
+        ]
+    )
+
+    assert result["success"]
+    assert "prefetched" not in result["results"][1]["result"]
+    assert calls[-1] == "httpx\n"
+    executor.close()
+
+
+@pytest.mark.asyncio
+async def test_prefetched_install_writing_lockfile_is_adopted(tmp_path):
+    """Files the speculative install writes itself don't invalidate it."""
+    (tmp_path / "requirements.txt").write_text("requests\n")
+    executor, calls = make_executor(tmp_path)
+    install = executor.pkg.install_async
+
+    async def locking_install(**kwargs):
+        result = await install(**kwargs)
+        (tmp_path / "uv.lock").write_text("requests==2.32.3\n")
+        return result
+
+    executor.pkg.install_async = locking_install
+    executor.start_prefetch()
+    result = await executor.execute_plan(
+        [
+            {"tool": "fs_read", "args": {"path": "uv.lock"}},
+            {"tool": "pkg_install", "args": {}},
+        ]
+    )
+
+    assert result["success"]
+    # The read waited for the speculative install instead of racing it
+    assert result["results"][0]["result"]["content"] == "requests==2.32.3\n"
+    assert result["results"][1]["result"]["prefetched"]
+    assert len(calls) == 1
+    executor.close()
@@ -0,0 +1,33 @@
+"""Tests for the workspace repo map."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.repomap import RepoMap
+
+
+def test_repo_map_reparses_only_changed_files(tmp_path):
+    """Symbols are cached per file and refreshed from mtimes."""
+    workspace = tmp_path / "ws"
+    (workspace / "pkg").mkdir(parents=True)
+    (workspace / "app.py").write_text("class App:\n    def run(self): ...\n")
+    (workspace / "pkg" / "util.js").write_text("export function helper() {}\n")
+    cache_path = tmp_path / "repomap.json"
+
+    text = RepoMap(workspace, cache_path).render(max_tokens=500)
+    assert "app.py (" in text and "class App(run)" in text
+    assert "pkg/util.js" in text and "function helper" in text
+
+    # Only .py is parseable now, so util.js symbols must come from the cache
+    repo_map = RepoMap(
+        workspace, cache_path, parsers={".py": lambda source: ["def changed"]}
+    )
+    (workspace / "app.py").write_text("def main(): ...\n# longer\n")
+    text = repo_map.render(max_tokens=500)
+    assert "app.py" in text and "def changed" in text
+    assert "function helper" in text
+
+    trimmed = RepoMap(workspace).render(max_tokens=8)
+    assert "more files" in trimmed
@@ -0,0 +1,131 @@
+"""Tests for run state retention and compression."""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from jj_agent.logging import AuditLogger, read_audit
+from state.manager import StateManager
+from state.retention import RunFiles, RunRetention
+
+
+def finished_run(manager, prompt, steps=3, success=True):
+    run_id = manager.start_run(prompt, Path("/ws"))
+    for i in range(steps):
+        manager.log_step({"step": i + 1, "tool": "shell_run", "result": {}})
+    job_dir = manager.state_dir / run_id
+    job_dir.mkdir()
+    (job_dir / "exec.log").write_text('{"level": "INFO"}\n' * 200)
+    manager.complete_run(success, {"success": success})
+    return run_id
+
+
+def age(manager, run_id, days):
+    """Backdate a run's start time."""
+    header_path = manager.state_dir / f"run_{run_id}.json"
+    header = json.loads(header_path.read_text())
+    started = time.time() - days * 86400
+    header["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started))
+    header_path.write_text(json.dumps(header))
+
+
+def test_finished_runs_are_compressed_and_read_transparently(tmp_path):
+    manager = StateManager(tmp_path)
+    run_id = finished_run(manager, "done")
+    running = manager.start_run("in progress", Path("/ws"))
+
+    retention = RunRetention(tmp_path, compression="gzip", min_idle_seconds=0)
+    report = retention.collect()
+
+    assert report["compressed_files"] == 2
+    assert report["reclaimed_bytes"] > 0 and report["deleted_runs"] == 0
+    assert not (tmp_path / f"run_{run_id}.jsonl").exists()
+    assert (tmp_path / f"run_{run_id}.jsonl.gz").exists()
+    assert (tmp_path / run_id / "exec.log.gz").exists()
+    # The running run is left alone
+    assert (tmp_path / f"run_{running}.jsonl").exists()
+
+    run = manager.get_run(run_id)
+    assert [s["step"] for s in run["steps"]] == [1, 2, 3]
+
+    # Resuming decompresses so new events append to the plain journal
+    manager.resume_run(run_id)
+    manager.log_step({"step": 4, "tool": "shell_run", "result": {}})
+    assert not (tmp_path / f"run_{run_id}.jsonl.gz").exists()
+    assert (tmp_path / run_id / "exec.log").exists()
+    assert [s["step"] for s in manager.get_run(run_id)["steps"]] == [1, 2, 3, 4]
+
+
+def test_compressed_audit_trail_is_readable(tmp_path):
+    audit = AuditLogger("job1", tmp_path)
+    audit.log_action("fs_write", {"path": "a"}, {"success": True}, 1.0)
+    audit.log_denial("shell_run", {"command": "sudo ls"}, "not allowed")
+
+    RunRetention(tmp_path, compression="gzip").collect()  # no header: untouched
+    (tmp_path / "run_job1.json").write_text(
+        json.dumps({"run_id": "job1", "timestamp": "2024-01-01T00:00:00"})
+    )
+    RunRetention(
+        tmp_path, max_age_days=0, compression="gzip", min_idle_seconds=0
+    ).collect()
+
+    assert (tmp_path / "job1" / "audit.jsonl.gz").exists()
+    entries = list(read_audit(tmp_path, "job1"))
+    assert [e["tool"] for e in entries] == ["fs_write", "shell_run"]
+    assert entries[1]["result"]["denied"] is True
+
+
+def test_age_and_size_budgets_delete_oldest_finished_runs(tmp_path):
+    manager = StateManager(tmp_path)
+    old = finished_run(manager, "old")
+    age(manager, old, 40)
+    older = finished_run(manager, "older", success=False)
+    age(manager, older, 20)
+    recent = finished_run(manager, "recent")
+    age(manager, recent, 10)
+    newest = finished_run(manager, "newest")
+
+    run_size = RunFiles(tmp_path, newest).size()
+    retention = RunRetention(
+        tmp_path,
+        max_age_days=30,
+        max_bytes=int(run_size * 2.5),
+        compression="none",
+        catalog=manager.catalog,
+    )
+    report = retention.collect()
+
+    assert report["deleted_runs"] == 2
+    assert report["total_bytes"] <= run_size * 2.5
+    for run_id in (old, older):
+        assert not (tmp_path / f"run_{run_id}.json").exists()
+        assert not (tmp_path / run_id).exists()
+    assert [r["run_id"] for r in manager.list_runs()] == [newest, recent]
+
+
+def test_running_runs_past_the_job_budget_are_abandoned(tmp_path):
+    manager = StateManager(tmp_path)
+    crashed = manager.start_run("crashed", Path("/ws"))
+    manager.log_step({"step": 1, "tool": "shell_run", "result": {}})
+    live = StateManager(tmp_path).start_run("live", Path("/ws"))
+    stale = time.time() - 3600
+    for path in (tmp_path / f"run_{crashed}.json", tmp_path / f"run_{crashed}.jsonl"):
+        os.utime(path, (stale, stale))
+
+    retention = RunRetention(
+        tmp_path,
+        max_bytes=1,
+        compression="gzip",
+        abandon_after_seconds=20 * 60,
+    )
+    report = retention.collect()
+
+    assert report["compressed_files"] == 1
+    assert report["deleted_runs"] == 1
+    assert not (tmp_path / f"run_{crashed}.json").exists()
+    assert (tmp_path / f"run_{live}.json").exists()
+    assert (tmp_path / f"run_{live}.jsonl").exists()
@@ -0,0 +1,138 @@
+"""Tests for incremental retry and the step ledger."""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import Executor
+from agent.ledger import StepLedger
+from agent.router import ModelRouter
+from metrics import metrics
+
+
+class FakeCompletions:
+    """Returns one scripted list of tool calls per request."""
+
+    def __init__(self, plans):
+        self.plans = list(plans)
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        calls = [
+            SimpleNamespace(
+                id=f"call_{i}",
+                function=SimpleNamespace(name=tool, arguments=json.dumps(args)),
+            )
+            for i, (tool, args) in enumerate(self.plans.pop(0))
+        ]
+        message = SimpleNamespace(tool_calls=calls, content=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def fake_client(plans):
+    return SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(plans)))
+
+
+def test_ledger_invalidates_on_overlapping_write():
+    """Rewriting a manifest makes an earlier install stale."""
+    ledger = StepLedger()
+    ledger.record("pkg_install", {}, {"success": True}, iteration=1)
+    ledger.record("fs_write", {"path": "a.txt"}, {"success": True}, iteration=1)
+    assert ledger.lookup("pkg_install", {}) is not None
+
+    ledger.record("fs_write", {"path": "requirements.txt"}, {"success": True}, 1)
+    assert ledger.lookup("pkg_install", {}) is None
+    assert ledger.lookup("fs_write", {"path": "a.txt"}) is not None
+
+    ledger.record("pkg_install", {}, {"success": True}, iteration=1)
+    ledger.record("shell_run", {"command": "ls"}, {"success": True}, 1)
+    assert ledger.lookup("fs_write", {"path": "a.txt"}) is None
+    assert ledger.lookup("pkg_install", {}) is None
+
+
+@pytest.mark.asyncio
+async def test_retry_runs_only_fix_and_failed_steps(tmp_path):
+    """Succeeded steps are not replayed on the next iteration."""
+    capabilities = {"allowed_paths": [str(tmp_path / "**")], "denied_paths": []}
+    client = fake_client(
+        [
+            [
+                ("fs_write", {"path": "a.txt", "content": "a"}),
+                ("fs_write", {"path": "cfg.txt", "content": "x"}),
+            ]
+        ]
+    )
+    executor = Executor(tmp_path, capabilities, client)
+
+    plan = [
+        {"tool": "fs_write", "args": {"path": "a.txt", "content": "a"}},
+        {"tool": "shell_run", "args": {"command": "cat cfg.txt"}},
+    ]
+    result = await executor.execute_with_retry(plan, max_iterations=2)
+
+    assert result["success"]
+    assert result["iterations"] == 2
+    second = result["results"][1]["results"]
+    assert [r["tool"] for r in second] == ["fs_write", "fs_write", "shell_run"]
+    assert second[2]["result"]["stdout"] == "x"
+    assert second[0]["result"]["skipped"]
+    assert result["ledger"]["skipped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_install_reruns_after_shell_rewrites_manifest(tmp_path):
+    """A shell step can change any file, so a committed install goes stale."""
+    (tmp_path / "requirements.txt").write_text("requests\n")
+    capabilities = {"allowed_paths": [str(tmp_path / "**")], "denied_paths": []}
+    client = fake_client(
+        [[("pkg_install", {}), ("fs_write", {"path": "ok", "content": ""})]]
+    )
+    executor = Executor(tmp_path, capabilities, client)
+    installs = []
+
+    async def fake_install(packages=None, manager=None, path=None, dry_run=False):
+        installs.append((tmp_path / "requirements.txt").read_text())
+        return {"success": True, "stdout": "installed"}
+
+    executor.pkg.install_async = fake_install
+
+    plan = [
+        {"tool": "pkg_install", "args": {}},
+        {"tool": "shell_run", "args": {"command": "echo flask >> requirements.txt"}},
+        {"tool": "shell_run", "args": {"command": "test -f ok"}},
+    ]
+    result = await executor.execute_with_retry(plan, max_iterations=2)
+    executor.close()
+
+    assert result["success"] and result["iterations"] == 2
+    assert installs == ["requests\n", "requests\nflask\n"]
+    second = result["results"][1]["results"]
+    assert second[0]["tool"] == "pkg_install"
+    assert not second[0]["result"].get("skipped")
+
+
+@pytest.mark.asyncio
+async def test_fix_plans_escalate_after_failed_fix(tmp_path):
+    """A larger model is used only once a fix iteration has failed too."""
+    capabilities = {"allowed_paths": [str(tmp_path / "**")], "denied_paths": []}
+    failing = [("shell_run", {"command": "exit 1"})]
+    client = fake_client([failing, failing])
+    router = ModelRouter(
+        "small", phase_models={"fix": "fixer"}, escalation_model="large"
+    )
+    executor = Executor(tmp_path, capabilities, client, router=router)
+    calls_before = metrics.llm_phases.get("fix", {}).get("calls", 0)
+
+    plan = [{"tool": "shell_run", "args": {"command": "exit 1"}}]
+    result = await executor.execute_with_retry(plan, max_iterations=3)
+
+    assert not result["success"]
+    models = [r["model"] for r in client.chat.completions.requests]
+    assert models == ["fixer", "large"]
+    assert metrics.llm_phases["fix"]["calls"] == calls_before + 2
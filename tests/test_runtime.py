@@ -0,0 +1,96 @@
+"""Tests for the asynchronous runtime execution path."""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from runtime.localsafe import LocalSafeRuntime
+
+
+def make_runtime(workspace: Path) -> LocalSafeRuntime:
+    capabilities = {
+        "allowed_paths": [str(workspace / "**")],
+        "denied_paths": [],
+        "deny_globs": [],
+        "allowed_commands": [],
+        "denied_commands": [],
+    }
+    return LocalSafeRuntime(workspace, capabilities)
+
+
+@pytest.mark.asyncio
+async def test_run_async_captures_output(tmp_path):
+    """run_async returns the same result shape as run."""
+    runtime = make_runtime(tmp_path)
+    result = await runtime.run_async("echo hello && echo oops >&2 && exit 3")
+
+    assert not result["success"]
+    assert result["returncode"] == 3
+    assert result["stdout"].strip() == "hello"
+    assert result["stderr"].strip() == "oops"
+
+
+@pytest.mark.asyncio
+async def test_run_async_does_not_block_loop(tmp_path):
+    """Two slow commands overlap instead of running back to back."""
+    runtime = make_runtime(tmp_path)
+    start = time.monotonic()
+    await asyncio.gather(runtime.run_async("sleep 0.5"), runtime.run_async("sleep 0.5"))
+    assert time.monotonic() - start < 0.9
+
+
+@pytest.mark.asyncio
+async def test_cancel_kills_process_group(tmp_path):
+    """Cancelling a command also kills the children it spawned."""
+    runtime = make_runtime(tmp_path)
+    marker = tmp_path / "marker"
+    task = asyncio.ensure_future(
+        runtime.run_async(f"(sleep 0.5 && touch {marker}) & wait")
+    )
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    await asyncio.sleep(0.7)
+    assert not marker.exists()
+
+
+@pytest.mark.asyncio
+async def test_timeout(tmp_path):
+    """Timed-out commands are reported, not raised."""
+    runtime = make_runtime(tmp_path)
+    result = await runtime.run_async("sleep 5", timeout=0.2)
+    assert not result["success"]
+    assert "timed out" in result["error"]
+
+
+@pytest.mark.asyncio
+async def test_job_deadline_cancels_running_steps(tmp_path):
+    """Steps still running when the budget expires are killed and reported."""
+    from agent import Executor
+    from runtime import Deadline
+
+    capabilities = {"allowed_paths": [str(tmp_path / "**")], "denied_paths": []}
+    executor = Executor(tmp_path, capabilities, None, deadline=Deadline(0.3))
+
+    start = time.monotonic()
+    result = await executor.execute_plan(
+        [
+            {"tool": "fs_write", "args": {"path": "a.txt", "content": "a"}},
+            {"tool": "shell_run", "args": {"command": "sleep 5"}},
+            {"tool": "fs_write", "args": {"path": "b.txt", "content": "b"}},
+        ]
+    )
+
+    assert time.monotonic() - start < 2
+    assert result["deadline_exceeded"]
+    outcomes = [r["result"].get("deadline_exceeded", False) for r in result["results"]]
+    assert outcomes == [False, True, True]
+    assert (tmp_path / "a.txt").exists()
+    assert not (tmp_path / "b.txt").exists()
@@ -0,0 +1,96 @@
+"""Tests for dependency-aware plan scheduling."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import Executor
+from agent.scheduler import DependencyGraph, StepScheduler
+
+
+def test_independent_writes_have_no_dependencies():
+    """Writes to unrelated paths can run in parallel."""
+    graph = DependencyGraph()
+    assert graph.add({"tool": "fs_write", "args": {"path": "a.py"}}) == set()
+    assert graph.add({"tool": "fs_write", "args": {"path": "b.py"}}) == set()
+    assert graph.add({"tool": "fs_read", "args": {"path": "c.py"}}) == set()
+
+
+def test_overlapping_paths_are_ordered():
+    """Steps on the same path or a parent directory keep plan order."""
+    graph = DependencyGraph()
+    graph.add({"tool": "fs_mkdir", "args": {"path": "app"}})
+    assert graph.add({"tool": "fs_write", "args": {"path": "app/main.py"}}) == {0}
+    assert graph.add({"tool": "fs_read", "args": {"path": "./app/main.py"}}) == {
+        0,
+        1,
+    }
+    assert graph.add({"tool": "fs_read", "args": {"path": "app/main.py"}}) == {0, 1}
+
+
+def test_absolute_and_relative_paths_to_the_same_file_overlap():
+    """A workspace path named absolutely or relatively is the same file."""
+    graph = DependencyGraph(workspace="/abs/ws")
+    graph.add({"tool": "fs_write", "args": {"path": "/abs/ws/a.py"}})
+    assert graph.add({"tool": "fs_patch", "args": {"path": "a.py"}}) == {0}
+    assert graph.add({"tool": "fs_write", "args": {"path": "./pkg/b.py"}}) == set()
+    assert graph.add({"tool": "fs_read", "args": {"path": "/abs/ws/pkg"}}) == {2}
+    # Outside the workspace, an absolute path is not a relative one
+    assert graph.add({"tool": "fs_write", "args": {"path": "/etc/a.py"}}) == set()
+    assert graph.add({"tool": "fs_write", "args": {"path": "/abs/ws2/a.py"}}) == set()
+
+
+def test_barriers_and_explicit_hints():
+    """shell_run waits for everything before it; later steps wait for it."""
+    graph = DependencyGraph()
+    graph.add({"tool": "fs_write", "args": {"path": "a.py"}, "id": "call_a"})
+    graph.add({"tool": "fs_write", "args": {"path": "b.py"}})
+    assert graph.add({"tool": "shell_run", "args": {"command": "ls"}}) == {0, 1}
+    assert graph.add({"tool": "fs_write", "args": {"path": "c.py"}}) == {2}
+    assert graph.add(
+        {"tool": "fs_write", "args": {"path": "d.py"}, "depends_on": ["call_a", 4]}
+    ) == {0, 2, 3}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_limits_concurrency():
+    """No more than max_parallel steps run at the same time."""
+    running = 0
+    peak = 0
+
+    async def run_step(index, step):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return index
+
+    scheduler = StepScheduler(run_step, max_parallel=2)
+    for i in range(6):
+        scheduler.submit({"tool": "fs_write", "args": {"path": f"f{i}.txt"}})
+
+    assert await scheduler.drain() == list(range(6))
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_execute_plan_writes_files(tmp_path):
+    """Parallel execution still produces every file and ordered results."""
+    capabilities = {"allowed_paths": [str(tmp_path / "**")], "denied_paths": []}
+    executor = Executor(tmp_path, capabilities, llm_client=None)
+
+    plan = [{"tool": "fs_mkdir", "args": {"path": "pkg"}}]
+    plan += [
+        {"tool": "fs_write", "args": {"path": f"pkg/m{i}.py", "content": str(i)}}
+        for i in range(5)
+    ]
+    result = await executor.execute_plan(plan)
+
+    assert result["success"]
+    assert [r["step"] for r in result["results"]] == list(range(1, 7))
+    assert (tmp_path / "pkg" / "m4.py").read_text() == "4"
@@ -106,3 +106,103 @@ def test_unsafe_pipes():
     for cmd in unsafe:
         is_allowed, error = runtime._check_command(cmd)
         assert not is_allowed, f"Unsafe pipe should be denied: {cmd}"
+
+
+def test_compiled_policy_is_shared_and_immutable(tmp_path):
+    """Test the compiled policy attached by load_capabilities."""
+    import pytest
+
+    from config import Config
+    from runtime.policy import CapabilityPolicy
+    from tools.fs import FileSystemTool
+    from tools.web import WebTool
+
+    capabilities = Config().load_capabilities(tmp_path, tmp_path)
+    policy = capabilities["policy"]
+    capabilities["deny_globs"] = ["*.pem"]
+
+    assert LocalSafeRuntime(tmp_path, capabilities).policy is policy
+    assert FileSystemTool(tmp_path, capabilities).policy is policy
+    assert WebTool(tmp_path, capabilities).policy is policy
+    with pytest.raises(AttributeError):
+        policy._deny_globs = ()
+
+    # The fs tool allows any workspace path the deny rules do not match
+    fs = FileSystemTool(
+        tmp_path, {"allowed_paths": ["/opt/**"], "deny_globs": ["*.pem"]}
+    )
+    assert fs.write("notes.txt", "hi")["success"]
+    assert not fs.write("cert.pem", "x")["success"]
+    assert not fs._check_path(tmp_path.parent / "outside.txt")
+
+    # Rules changed after loading need a freshly compiled policy
+    assert policy.check_path(tmp_path / "cert.pem")[0]
+    assert not CapabilityPolicy(capabilities).check_path(tmp_path / "cert.pem")[0]
+
+
+def test_compiled_policy_rules(tmp_path):
+    """Test prefix, glob, command and domain matching."""
+    from runtime.policy import CapabilityPolicy
+
+    policy = CapabilityPolicy(
+        {
+            "allowed_paths": [str(tmp_path / "**"), "/opt/*/cache"],
+            "denied_paths": [str(tmp_path / "secrets")],
+            "deny_globs": ["*.key"],
+            "allowed_commands": ["^echo ", r"^git (status|diff)"],
+            "denied_commands": ["RM -RF"],
+            "network": {"allowed_domains": ["pypi.org"]},
+        }
+    )
+
+    assert policy.check_path(tmp_path / "src" / "app.py") == (True, None)
+    assert policy.check_path(Path("/opt/tool/cache"))[0]
+    assert policy.check_path(tmp_path / "secretsfile.txt")[0]
+    is_allowed, error = policy.check_path(tmp_path / "secrets" / "token")
+    assert not is_allowed and "denied path" in error
+    is_allowed, error = policy.check_path(tmp_path / "deep" / "dir" / "id.key")
+    assert not is_allowed and "*.key" in error
+    assert not policy.check_path(Path("/etc/passwd"))[0]
+
+    assert policy.check_command("ECHO hi") == (True, None)
+    assert policy.check_command("git diff HEAD")[0]
+    assert not policy.check_command("git push")[0]
+    is_allowed, error = policy.check_command("echo x; rm -rf build")
+    assert error == "Command matches denied pattern: RM -RF"
+
+    assert policy.check_domain("files.pypi.org")
+    assert not policy.check_domain("notpypi.org")
+
+
+def test_denied_step_is_audited_once(tmp_path):
+    """A denied tool call leaves exactly one audit record."""
+    import asyncio
+
+    from agent import Executor
+    from jj_agent.logging import read_audit
+
+    capabilities = {
+        "allowed_paths": [str(tmp_path / "**")],
+        "denied_paths": [],
+        "allowed_commands": ["^echo "],
+        "denied_commands": [],
+    }
+    executor = Executor(
+        tmp_path, capabilities, None, state_dir=tmp_path / "state", job_id="job1"
+    )
+    result = asyncio.run(
+        executor.execute_plan(
+            [
+                {"tool": "shell_run", "args": {"command": "sudo ls"}},
+                {"tool": "shell_run", "args": {"command": "echo hi"}},
+            ]
+        )
+    )
+    executor.close()
+
+    assert result["results"][0]["result"]["denied"]
+    entries = list(read_audit(tmp_path / "state", "job1"))
+    assert [e["result"]["denied"] for e in entries if e["tool"] == "shell_run"] == [
+        True,
+        False,
+    ]
@@ -0,0 +1,60 @@
+"""Tests for the persistent shell session runtime."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from runtime.session import SessionRuntime
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="session shell is POSIX-only")
+
+
+def make_runtime(workspace: Path, **kwargs) -> SessionRuntime:
+    capabilities = {
+        "allowed_paths": [str(workspace / "**")],
+        "allowed_commands": [],
+        "denied_commands": ["rm -rf"],
+    }
+    return SessionRuntime(workspace, capabilities, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_environment_persists_between_commands(tmp_path):
+    runtime = make_runtime(tmp_path)
+    try:
+        first = await runtime.run_async("export GREETING=hi; echo err >&2")
+        second = await runtime.run_async("echo $GREETING; printf no-newline")
+        failed = await runtime.run_async("false")
+    finally:
+        runtime.close()
+
+    assert first["success"] and first["stderr"] == "err\n"
+    assert second["stdout"] == "hi\nno-newline"
+    assert failed["returncode"] == 1
+    assert runtime.sessions_started == 1
+
+
+@pytest.mark.asyncio
+async def test_exit_timeout_and_limits_recycle_the_shell(tmp_path):
+    runtime = make_runtime(tmp_path, max_commands=3)
+    try:
+        exited = await runtime.run_async("export KEPT=1; exit 7")
+        after_exit = await runtime.run_async("echo ${KEPT:-gone}")
+        timed_out = await runtime.run_async("sleep 5", timeout=0.5)
+        after_timeout = await runtime.run_async("echo alive")
+        for _ in range(3):
+            await runtime.run_async("true")
+        denied = await runtime.run_async("rm -rf build")
+    finally:
+        runtime.close()
+
+    assert exited["returncode"] == 7 and not exited["success"]
+    assert after_exit["stdout"] == "gone\n"
+    assert "timed out" in timed_out["error"]
+    assert after_timeout["stdout"] == "alive\n"
+    assert runtime.sessions_started == 4
+    assert denied["denied"]
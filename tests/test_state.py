@@ -0,0 +1,122 @@
+"""Tests for the journaled run state."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import Executor
+from state.manager import StateManager
+
+
+def test_steps_append_without_rewriting_the_header(tmp_path):
+    manager = StateManager(tmp_path / "state")
+    run_id = manager.start_run("build", tmp_path)
+    header = manager.state_dir / f"run_{run_id}.json"
+    before = header.read_text()
+
+    for i in range(50):
+        manager.log_step({"step": i + 1, "tool": "shell_run", "result": {}})
+
+    assert header.read_text() == before
+    journal = manager.state_dir / f"run_{run_id}.jsonl"
+    assert len(journal.read_text().splitlines()) == 50
+
+    # A torn final line (crash mid-write) is skipped
+    with journal.open("a") as f:
+        f.write('{"event": "st')
+    run = manager.get_run(run_id)
+    assert [s["step"] for s in run["steps"]] == list(range(1, 51))
+    assert run["status"] == "running"
+
+
+def test_complete_run_compacts_results_into_the_header(tmp_path):
+    manager = StateManager(tmp_path / "state")
+    run_id = manager.start_run("build", tmp_path)
+    step = {"step": 1, "tool": "shell_run", "result": {"success": False}}
+    iteration = {"success": False, "results": [step], "history": [step] * 3}
+    manager.complete_run(
+        False, {"success": False, "iterations": 1, "results": [iteration]}
+    )
+
+    header = json.loads((manager.state_dir / f"run_{run_id}.json").read_text())
+    assert header["status"] == "failed"
+    assert "history" not in json.dumps(header)
+    assert header["results"]["iteration_summaries"] == [
+        {"success": False, "steps": 1, "failed_steps": [1], "duration_seconds": None}
+    ]
+
+
+def test_legacy_run_files_are_still_readable(tmp_path):
+    manager = StateManager(tmp_path)
+    legacy = {"run_id": "abcd1234", "status": "completed", "steps": [{"step": 1}]}
+    (tmp_path / "run_abcd1234.json").write_text(json.dumps(legacy))
+
+    assert manager.get_run("abcd1234") == legacy
+
+
+@pytest.mark.asyncio
+async def test_executor_journals_each_step(tmp_path):
+    manager = StateManager(tmp_path / "state")
+    run_id = manager.start_run("write", tmp_path)
+    capabilities = {"allowed_paths": [str(tmp_path / "**")], "denied_paths": []}
+    executor = Executor(tmp_path, capabilities, None, state_manager=manager)
+
+    await executor.execute_plan(
+        [{"tool": "fs_write", "args": {"path": "a.txt", "content": "x" * 5000}}]
+    )
+    executor.close()
+
+    (step,) = manager.get_run(run_id)["steps"]
+    assert step["tool"] == "fs_write" and step["iteration"] == 1
+    assert step["args"]["content_chars"] == 5000 and "content" not in step["args"]
+
+
+@pytest.mark.asyncio
+async def test_resume_continues_after_the_last_committed_step(tmp_path):
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    manager = StateManager(tmp_path / "state")
+    run_id = manager.start_run("write three files", workspace)
+    capabilities = {"allowed_paths": [str(workspace / "**")], "denied_paths": []}
+    plan = [
+        {"tool": "fs_write", "args": {"path": name, "content": name * 3}}
+        for name in ("a", "b", "c")
+    ]
+    executor = Executor(
+        workspace, capabilities, None, state_manager=manager, max_parallel_steps=1
+    )
+    await executor.execute_plan(plan)
+    executor.close()
+
+    # Simulate a crash before the third step was committed
+    journal = manager.state_dir / f"run_{run_id}.jsonl"
+    journal.write_text("".join(journal.read_text().splitlines(True)[:-1]))
+    (workspace / "a").write_text("edited")
+    (workspace / "c").unlink()
+
+    manager = StateManager(tmp_path / "state")
+    checkpoint = manager.load_checkpoint(run_id)
+    assert checkpoint["iteration"] == 1
+    assert sorted(checkpoint["completed"]) == [0, 1]
+    assert checkpoint["plan"] == plan
+    assert checkpoint["interrupted"]
+
+    manager.resume_run(run_id)
+    executor = Executor(workspace, capabilities, None, state_manager=manager)
+    result = await executor.execute_with_retry(
+        checkpoint["plan"], checkpoint=checkpoint
+    )
+    executor.close()
+    manager.complete_run(result["success"], result)
+
+    assert result["success"] and result["iterations"] == 1
+    assert [r["step"] for r in result["results"][0]["results"]] == [1, 2, 3]
+    assert (workspace / "a").read_text() == "edited"
+    assert (workspace / "c").read_text() == "ccc"
+    assert [s["step"] for s in manager.get_run(run_id)["steps"]] == [1, 2, 3]
+    assert manager.list_runs()[0]["status"] == "completed"
+    assert not manager.load_checkpoint(run_id)["interrupted"]
@@ -0,0 +1,97 @@
+"""Tests for streamed planning and execution."""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import Executor, Planner
+from agent.planner import ToolCallStreamParser
+
+
+def delta_chunk(index, call_id=None, name=None, arguments=None):
+    function = SimpleNamespace(name=name, arguments=arguments)
+    tool_call = SimpleNamespace(index=index, id=call_id, function=function)
+    delta = SimpleNamespace(tool_calls=[tool_call], content=None)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+def split_calls(calls):
+    """Chunk each tool call's JSON arguments into small deltas."""
+    chunks = []
+    for i, (tool, args) in enumerate(calls):
+        text = json.dumps(args)
+        chunks.append(delta_chunk(i, f"call_{i}", tool, ""))
+        for start in range(0, len(text), 5):
+            chunks.append(delta_chunk(i, arguments=text[start : start + 5]))
+    return chunks
+
+
+class StreamingCompletions:
+    """Streams scripted chunks, pausing until `release` is set midway."""
+
+    def __init__(self, chunks, pause_after):
+        self.chunks = chunks
+        self.pause_after = pause_after
+        self.release = asyncio.Event()
+
+    async def create(self, **kwargs):
+        assert kwargs["stream"] is True
+
+        async def stream():
+            for i, chunk in enumerate(self.chunks):
+                if i == self.pause_after:
+                    await asyncio.wait_for(self.release.wait(), 5)
+                yield chunk
+
+        return stream()
+
+
+def test_parser_emits_calls_in_order():
+    """A call is emitted once its arguments are complete JSON."""
+    parser = ToolCallStreamParser()
+    chunks = split_calls(
+        [("fs_mkdir", {"path": "src"}), ("fs_write", {"path": "a", "content": "}"})]
+    )
+    emitted = []
+    for chunk in chunks:
+        emitted.extend(parser.feed(chunk))
+    emitted.extend(parser.finish())
+
+    assert [s["tool"] for s in emitted] == ["fs_mkdir", "fs_write"]
+    assert emitted[1]["args"] == {"path": "a", "content": "}"}
+    assert emitted[0]["id"] == "call_0"
+
+
+@pytest.mark.asyncio
+async def test_execution_starts_before_plan_finishes(tmp_path):
+    """The first step runs while the LLM is still streaming the rest."""
+    calls = [
+        ("fs_write", {"path": "a.txt", "content": "a"}),
+        ("fs_write", {"path": "b.txt", "content": "b"}),
+    ]
+    chunks = split_calls(calls)
+    completions = StreamingCompletions(chunks, pause_after=len(chunks) // 2 + 1)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    capabilities = {"allowed_paths": [str(tmp_path / "**")], "denied_paths": []}
+    executor = Executor(tmp_path, capabilities, client)
+
+    async def release_when_first_written():
+        while not (tmp_path / "a.txt").exists():
+            await asyncio.sleep(0.01)
+        completions.release.set()
+
+    releaser = asyncio.ensure_future(release_when_first_written())
+    result = await executor.execute_plan(Planner(client).plan_stream("build"))
+    await releaser
+
+    assert result["success"]
+    assert [s["tool"] for s in result["plan"]] == ["fs_write", "fs_write"]
+    assert (tmp_path / "b.txt").read_text() == "b"
+    executor.close()
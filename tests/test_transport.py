@@ -0,0 +1,95 @@
+"""Tests for LLM request retries, hedging and planning errors."""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent import Planner, PlanningError
+from api.llm_client import LLMClient
+from api.transport import LatencyTracker, ResilientCaller, shared_http_client
+
+
+def status_error(status):
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+    response = httpx.Response(status, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_only():
+    caller = ResilientCaller(max_retries=3, backoff_base=0.001, backoff_max=0.01)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise status_error(429 if len(attempts) == 1 else 503)
+        return "ok"
+
+    assert await caller.call(flaky) == "ok"
+    assert len(attempts) == 3
+
+    async def bad_request():
+        attempts.append(1)
+        raise status_error(400)
+
+    attempts.clear()
+    with pytest.raises(openai.APIStatusError):
+        await caller.call(bad_request)
+    assert len(attempts) == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_takes_first_answer():
+    latency = LatencyTracker(min_samples=1)
+    latency.record(0.01)
+    caller = ResilientCaller(hedge=True, latency=latency)
+    started = []
+
+    async def send():
+        started.append(1)
+        if len(started) == 1:
+            await asyncio.sleep(5)
+            return "slow"
+        return "fast"
+
+    result = await asyncio.wait_for(caller.call(send), 1)
+    assert result == "fast"
+    assert len(started) == 2
+
+
+@pytest.mark.asyncio
+async def test_planner_raises_on_failed_request():
+    async def create(**kwargs):
+        raise status_error(400)
+
+    client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    with pytest.raises(PlanningError):
+        await Planner(client).plan("build something")
+
+
+def test_pooled_client_is_per_event_loop():
+    async def open_client():
+        return shared_http_client()
+
+    async def open_and_close():
+        client = shared_http_client()
+        assert shared_http_client() is client
+        llm = LLMClient(api_key="test")
+        llm._api()
+        await llm.aclose()
+        return client
+
+    first = asyncio.run(open_client())
+    second = asyncio.run(open_and_close())
+    assert first is not second
+    assert second.is_closed
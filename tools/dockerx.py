@@ -8,10 +8,15 @@ from .shell import ShellTool
 class DockerTool:
     """Tool for Docker operations."""
 
-    def __init__(self, workspace: Path, capabilities: Dict[str, Any]):
+    def __init__(
+        self,
+        workspace: Path,
+        capabilities: Dict[str, Any],
+        shell: Optional[ShellTool] = None,
+    ):
         self.workspace = Path(workspace).resolve()
         self.capabilities = capabilities
-        self.shell = ShellTool(workspace, capabilities)
+        self.shell = shell or ShellTool(workspace, capabilities)
 
     def compose_up(
         self,
@@ -21,12 +26,29 @@ class DockerTool:
         dry_run: bool = False,
     ) -> Dict[str, Any]:
         """Start docker-compose services."""
+        cmd = self._compose_up_command(file, detach, build)
+        return self.shell.run(cmd, cwd=str(self.workspace), dry_run=dry_run)
+
+    async def compose_up_async(
+        self,
+        file: Optional[str] = None,
+        detach: bool = True,
+        build: bool = False,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """Start docker-compose services without blocking the event loop."""
+        cmd = self._compose_up_command(file, detach, build)
+        return await self.shell.run_async(cmd, cwd=str(self.workspace), dry_run=dry_run)
+
+    def _compose_up_command(
+        self, file: Optional[str], detach: bool, build: bool
+    ) -> str:
+        """Build a docker-compose up command."""
         file_arg = f"-f {file}" if file else ""
         build_arg = "--build" if build else ""
         detach_arg = "-d" if detach else ""
 
-        cmd = f"docker-compose {file_arg} up {build_arg} {detach_arg}".strip()
-        return self.shell.run(cmd, cwd=str(self.workspace), dry_run=dry_run)
+        return f"docker-compose {file_arg} up {build_arg} {detach_arg}".strip()
 
     def compose_down(
         self, file: Optional[str] = None, dry_run: bool = False
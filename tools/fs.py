@@ -1,9 +1,18 @@
 """File system operations tool."""
 
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
 import difflib
 
+try:
+    from ..runtime.policy import CapabilityPolicy
+except ImportError:
+    # Fallback for direct execution
+    import sys
+
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+    from runtime.policy import CapabilityPolicy
+
 
 class FileSystemTool:
     """Tool for file system operations."""
@@ -13,6 +22,7 @@ class FileSystemTool:
         self.capabilities = capabilities
         self.allowed_paths = capabilities.get("allowed_paths", [])
         self.denied_paths = capabilities.get("denied_paths", [])
+        self.policy = CapabilityPolicy.from_capabilities(capabilities)
 
     def _check_path(self, path: Path) -> bool:
         """Check if a path is allowed."""
@@ -24,20 +34,9 @@ class FileSystemTool:
         except ValueError:
             return False
 
-        # Check denied paths
-        path_str = str(path)
-        for denied in self.denied_paths:
-            denied_expanded = denied.replace("${workspace}", str(self.workspace))
-            if path_str.startswith(denied_expanded) or path_str == denied_expanded:
-                return False
-
-        # Check allowed paths
-        for allowed in self.allowed_paths:
-            allowed_expanded = allowed.replace("${workspace}", str(self.workspace))
-            if path_str.startswith(allowed_expanded) or path_str == denied_expanded:
-                return True
-
-        return True
+        # Anything in the workspace is writable unless explicitly denied
+        is_allowed, _ = self.policy.check_path(path, allow_unlisted=True)
+        return is_allowed
 
     def write(self, path: str, content: str, dry_run: bool = False) -> Dict[str, Any]:
         """Write content to a file."""
@@ -84,6 +83,18 @@ class FileSystemTool:
         self, path: str, old_string: str, new_string: str, dry_run: bool = False
     ) -> Dict[str, Any]:
         """Patch a file by replacing old_string with new_string."""
+        return self.patch_many(
+            path, [{"old_string": old_string, "new_string": new_string}], dry_run
+        )
+
+    def patch_many(
+        self, path: str, edits: List[Dict[str, str]], dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """Apply several replacements to a file with a single read and write.
+
+        Edits are applied in order; if any old_string is missing the file is
+        left unchanged.
+        """
         file_path = self.workspace / path
 
         if not self._check_path(file_path):
@@ -95,10 +106,13 @@ class FileSystemTool:
         try:
             content = file_path.read_text(encoding="utf-8")
 
-            if old_string not in content:
-                return {"success": False, "error": "old_string not found in file"}
-
-            new_content = content.replace(old_string, new_string)
+            new_content = content
+            for edit in edits:
+                if edit["old_string"] not in new_content:
+                    return {"success": False, "error": "old_string not found in file"}
+                new_content = new_content.replace(
+                    edit["old_string"], edit["new_string"]
+                )
 
             if dry_run:
                 diff = "\n".join(
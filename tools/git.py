@@ -8,10 +8,32 @@ from .shell import ShellTool
 class GitTool:
     """Tool for Git operations."""
 
-    def __init__(self, workspace: Path, capabilities: Dict[str, Any]):
+    def __init__(
+        self,
+        workspace: Path,
+        capabilities: Dict[str, Any],
+        shell: Optional[ShellTool] = None,
+    ):
         self.workspace = Path(workspace).resolve()
         self.capabilities = capabilities
-        self.shell = ShellTool(workspace, capabilities)
+        self.shell = shell or ShellTool(workspace, capabilities)
+
+    def _commit_command(self, message: str) -> str:
+        """Build a commit command with the message escaped for the shell."""
+        escaped_message = message.replace('"', '\\"')
+        return f'git commit -m "{escaped_message}"'
+
+    def _branch_command(self, name: str, create: bool) -> str:
+        """Build a checkout command for a new or existing branch."""
+        if create:
+            return f"git checkout -b {name}"
+        return f"git checkout {name}"
+
+    def _push_command(self, remote: str, branch: Optional[str]) -> str:
+        """Build a push command."""
+        if branch:
+            return f"git push {remote} {branch}"
+        return f"git push {remote}"
 
     def init(self, dry_run: bool = False) -> Dict[str, Any]:
         """Initialize a Git repository."""
@@ -25,10 +47,8 @@ class GitTool:
 
     def commit(self, message: str, dry_run: bool = False) -> Dict[str, Any]:
         """Commit changes."""
-        # Escape the message for shell
-        escaped_message = message.replace('"', '\\"')
         return self.shell.run(
-            f'git commit -m "{escaped_message}"',
+            self._commit_command(message),
             cwd=str(self.workspace),
             dry_run=dry_run,
         )
@@ -37,14 +57,11 @@ class GitTool:
         self, name: str, create: bool = True, dry_run: bool = False
     ) -> Dict[str, Any]:
         """Create or switch to a branch."""
-        if create:
-            return self.shell.run(
-                f"git checkout -b {name}", cwd=str(self.workspace), dry_run=dry_run
-            )
-        else:
-            return self.shell.run(
-                f"git checkout {name}", cwd=str(self.workspace), dry_run=dry_run
-            )
+        return self.shell.run(
+            self._branch_command(name, create),
+            cwd=str(self.workspace),
+            dry_run=dry_run,
+        )
 
     def push(
         self,
@@ -53,14 +70,11 @@ class GitTool:
         dry_run: bool = False,
     ) -> Dict[str, Any]:
         """Push to remote repository."""
-        if branch:
-            return self.shell.run(
-                f"git push {remote} {branch}", cwd=str(self.workspace), dry_run=dry_run
-            )
-        else:
-            return self.shell.run(
-                f"git push {remote}", cwd=str(self.workspace), dry_run=dry_run
-            )
+        return self.shell.run(
+            self._push_command(remote, branch),
+            cwd=str(self.workspace),
+            dry_run=dry_run,
+        )
 
     def status(self, dry_run: bool = False) -> Dict[str, Any]:
         """Get Git status."""
@@ -71,3 +85,48 @@ class GitTool:
         return self.shell.run(
             f"git remote add {name} {url}", cwd=str(self.workspace), dry_run=dry_run
         )
+
+    async def init_async(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Initialize a Git repository without blocking the event loop."""
+        return await self.shell.run_async(
+            "git init", cwd=str(self.workspace), dry_run=dry_run
+        )
+
+    async def add_async(
+        self, files: str = ".", dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """Add files to Git staging without blocking the event loop."""
+        return await self.shell.run_async(
+            f"git add {files}", cwd=str(self.workspace), dry_run=dry_run
+        )
+
+    async def commit_async(self, message: str, dry_run: bool = False) -> Dict[str, Any]:
+        """Commit changes without blocking the event loop."""
+        return await self.shell.run_async(
+            self._commit_command(message),
+            cwd=str(self.workspace),
+            dry_run=dry_run,
+        )
+
+    async def branch_async(
+        self, name: str, create: bool = True, dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """Create or switch to a branch without blocking the event loop."""
+        return await self.shell.run_async(
+            self._branch_command(name, create),
+            cwd=str(self.workspace),
+            dry_run=dry_run,
+        )
+
+    async def push_async(
+        self,
+        remote: str = "origin",
+        branch: Optional[str] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """Push to remote repository without blocking the event loop."""
+        return await self.shell.run_async(
+            self._push_command(remote, branch),
+            cwd=str(self.workspace),
+            dry_run=dry_run,
+        )
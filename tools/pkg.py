@@ -8,23 +8,22 @@ from .shell import ShellTool
 class PackageTool:
     """Tool for package management operations."""
 
-    def __init__(self, workspace: Path, capabilities: Dict[str, Any]):
+    def __init__(
+        self,
+        workspace: Path,
+        capabilities: Dict[str, Any],
+        shell: Optional[ShellTool] = None,
+    ):
         self.workspace = Path(workspace).resolve()
         self.capabilities = capabilities
-        self.shell = ShellTool(workspace, capabilities)
-
-    def _detect_manager(self, path: Optional[str] = None) -> str:
-        """Detect package manager from project files."""
-        work_dir = Path(path) if path else self.workspace
+        self.shell = shell or ShellTool(workspace, capabilities)
 
+    def _detect_from_files(self, work_dir: Path) -> str:
+        """Detect package manager from project files ("python" needs a uv probe)."""
         if (work_dir / "pyproject.toml").exists() or (
             work_dir / "requirements.txt"
         ).exists():
-            # Try uv first, then pip
-            result = self.shell.run("uv --version", cwd=str(work_dir))
-            if result["success"]:
-                return "uv"
-            return "pip"
+            return "python"
 
         if (work_dir / "package.json").exists():
             if (work_dir / "pnpm-lock.yaml").exists():
@@ -35,6 +34,50 @@ class PackageTool:
 
         return "pip"  # Default
 
+    def _detect_manager(self, path: Optional[str] = None) -> str:
+        """Detect package manager from project files."""
+        work_dir = Path(path) if path else self.workspace
+
+        manager = self._detect_from_files(work_dir)
+        if manager == "python":
+            # Try uv first, then pip
+            result = self.shell.run("uv --version", cwd=str(work_dir))
+            return "uv" if result["success"] else "pip"
+        return manager
+
+    async def _detect_manager_async(self, path: Optional[str] = None) -> str:
+        """Detect package manager without blocking the event loop."""
+        work_dir = Path(path) if path else self.workspace
+
+        manager = self._detect_from_files(work_dir)
+        if manager == "python":
+            result = await self.shell.run_async("uv --version", cwd=str(work_dir))
+            return "uv" if result["success"] else "pip"
+        return manager
+
+    def _install_command(
+        self, packages: Optional[List[str]], manager: str
+    ) -> Optional[str]:
+        """Build the install command, or None for an unknown manager."""
+        if packages:
+            # Install specific packages
+            if manager == "uv":
+                return f"uv pip install {' '.join(packages)}"
+            elif manager == "pip" or manager == "pip3":
+                return f"{manager} install {' '.join(packages)}"
+            elif manager in ["npm", "pnpm", "yarn"]:
+                return f"{manager} install {' '.join(packages)}"
+            return None
+
+        # Install from lock file
+        if manager == "uv":
+            return "uv pip install -r requirements.txt"
+        elif manager == "pip" or manager == "pip3":
+            return f"{manager} install -r requirements.txt"
+        elif manager in ["npm", "pnpm", "yarn"]:
+            return f"{manager} install"
+        return None
+
     def install(
         self,
         packages: Optional[List[str]] = None,
@@ -46,39 +89,29 @@ class PackageTool:
         work_dir = Path(path) if path else self.workspace
         manager = manager or self._detect_manager(str(work_dir))
 
-        if packages:
-            # Install specific packages
-            if manager == "uv":
-                cmd = f"uv pip install {' '.join(packages)}"
-            elif manager == "pip" or manager == "pip3":
-                cmd = f"{manager} install {' '.join(packages)}"
-            elif manager in ["npm", "pnpm", "yarn"]:
-                cmd = f"{manager} install {' '.join(packages)}"
-            else:
-                return {
-                    "success": False,
-                    "error": f"Unknown package manager: {manager}",
-                }
-        else:
-            # Install from lock file
-            if manager == "uv":
-                cmd = "uv pip install -r requirements.txt"
-            elif manager == "pip" or manager == "pip3":
-                cmd = f"{manager} install -r requirements.txt"
-            elif manager == "npm":
-                cmd = "npm install"
-            elif manager == "pnpm":
-                cmd = "pnpm install"
-            elif manager == "yarn":
-                cmd = "yarn install"
-            else:
-                return {
-                    "success": False,
-                    "error": f"Unknown package manager: {manager}",
-                }
+        cmd = self._install_command(packages, manager)
+        if cmd is None:
+            return {"success": False, "error": f"Unknown package manager: {manager}"}
 
         return self.shell.run(cmd, cwd=str(work_dir), dry_run=dry_run)
 
+    async def install_async(
+        self,
+        packages: Optional[List[str]] = None,
+        manager: Optional[str] = None,
+        path: Optional[str] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """Install packages without blocking the event loop."""
+        work_dir = Path(path) if path else self.workspace
+        manager = manager or await self._detect_manager_async(str(work_dir))
+
+        cmd = self._install_command(packages, manager)
+        if cmd is None:
+            return {"success": False, "error": f"Unknown package manager: {manager}"}
+
+        return await self.shell.run_async(cmd, cwd=str(work_dir), dry_run=dry_run)
+
     def add(
         self,
         package: str,
@@ -5,7 +5,13 @@ from typing import Dict, Any, Optional
 
 try:
     from ..config import config
-    from ..runtime import LocalSafeRuntime, SandboxedRuntime
+    from ..runtime import (
+        Deadline,
+        LocalSafeRuntime,
+        OutputSpool,
+        SandboxedRuntime,
+        SessionRuntime,
+    )
 except ImportError:
     # Fallback for direct execution
     import sys
@@ -13,7 +19,13 @@ except ImportError:
 
     sys.path.insert(0, str(Path(__file__).parent.parent.parent))
     from config import config
-    from runtime import LocalSafeRuntime, SandboxedRuntime
+    from runtime import (
+        Deadline,
+        LocalSafeRuntime,
+        OutputSpool,
+        SandboxedRuntime,
+        SessionRuntime,
+    )
 
 
 class ShellTool:
@@ -26,10 +38,65 @@ class ShellTool:
         # Initialize runtime based on config
         runtime_type = config.runtime
         if runtime_type == "sandboxed":
-            self.runtime = SandboxedRuntime(workspace, capabilities)
+            self.runtime = SandboxedRuntime(
+                workspace,
+                capabilities,
+                pool_size=config.sandbox_pool_size,
+                pool_max_commands=config.sandbox_pool_max_commands,
+            )
+        elif runtime_type == "session":
+            self.runtime = SessionRuntime(
+                workspace,
+                capabilities,
+                max_commands=config.session_max_commands,
+                max_age_seconds=config.session_max_age_seconds,
+            )
         else:
             self.runtime = LocalSafeRuntime(workspace, capabilities)
 
+        # Bounded output capture shared by every command; set spool.spill_dir
+        # to keep full output on disk
+        self.spool = OutputSpool(
+            head_bytes=config.capture_head_kb * 1024,
+            tail_bytes=config.capture_tail_kb * 1024,
+        )
+        self.runtime.spool = self.spool
+
+        # Job deadline; per-command timeouts never outlive it
+        self.deadline: Optional[Deadline] = None
+
+    def close(self):
+        """Release runtime resources such as a persistent shell."""
+        close = getattr(self.runtime, "close", None)
+        if close is not None:
+            close()
+
+    async def aclose(self):
+        """Release runtime resources without blocking the event loop."""
+        aclose = getattr(self.runtime, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        else:
+            self.close()
+
+    def _timeout(self, timeout: Optional[int]) -> Optional[float]:
+        """Resolve a command timeout, or None if the job deadline has passed."""
+        if timeout is None:
+            timeout = config.max_tool_seconds
+        if self.deadline is None:
+            return timeout
+        if self.deadline.expired():
+            return None
+        return self.deadline.clamp(timeout)
+
+    def _deadline_result(self, command: str) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "command": command,
+            "error": "Job time budget exhausted",
+            "deadline_exceeded": True,
+        }
+
     def run(
         self,
         command: str,
@@ -38,9 +105,26 @@ class ShellTool:
         timeout: Optional[int] = None,
     ) -> Dict[str, Any]:
         """Run a shell command."""
-        if timeout is None:
-            timeout = config.max_tool_seconds
+        resolved = self._timeout(timeout)
+        if resolved is None:
+            return self._deadline_result(command)
 
         return self.runtime.run(
-            command=command, cwd=cwd, timeout=timeout, dry_run=dry_run
+            command=command, cwd=cwd, timeout=resolved, dry_run=dry_run
+        )
+
+    async def run_async(
+        self,
+        command: str,
+        cwd: Optional[str] = None,
+        dry_run: bool = False,
+        timeout: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Run a shell command without blocking the event loop."""
+        resolved = self._timeout(timeout)
+        if resolved is None:
+            return self._deadline_result(command)
+
+        return await self.runtime.run_async(
+            command=command, cwd=cwd, timeout=resolved, dry_run=dry_run
         )
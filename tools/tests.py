@@ -8,20 +8,20 @@ from .shell import ShellTool
 class TestTool:
     """Tool for running tests."""
 
-    def __init__(self, workspace: Path, capabilities: Dict[str, Any]):
+    def __init__(
+        self,
+        workspace: Path,
+        capabilities: Dict[str, Any],
+        shell: Optional[ShellTool] = None,
+    ):
         self.workspace = Path(workspace).resolve()
         self.capabilities = capabilities
-        self.shell = ShellTool(workspace, capabilities)
-
-    def _detect_test_framework(self, path: Optional[str] = None) -> str:
-        """Detect test framework from project files."""
-        work_dir = Path(path) if path else self.workspace
+        self.shell = shell or ShellTool(workspace, capabilities)
 
-        # Check for pytest
-        if (work_dir / "pytest.ini").exists() or (work_dir / "pyproject.toml").exists():
-            result = self.shell.run("pytest --version", cwd=str(work_dir))
-            if result["success"]:
-                return "pytest"
+    def _framework_from_files(self, work_dir: Path, has_pytest: bool) -> str:
+        """Pick a test framework from project files and the pytest probe."""
+        if has_pytest:
+            return "pytest"
 
         # Check for jest
         if (work_dir / "package.json").exists():
@@ -46,6 +46,43 @@ class TestTool:
 
         return "pytest"
 
+    def _wants_pytest_probe(self, work_dir: Path) -> bool:
+        """Return True if the project has pytest configuration."""
+        return (work_dir / "pytest.ini").exists() or (
+            work_dir / "pyproject.toml"
+        ).exists()
+
+    def _detect_test_framework(self, path: Optional[str] = None) -> str:
+        """Detect test framework from project files."""
+        work_dir = Path(path) if path else self.workspace
+
+        # Check for pytest
+        has_pytest = False
+        if self._wants_pytest_probe(work_dir):
+            result = self.shell.run("pytest --version", cwd=str(work_dir))
+            has_pytest = result["success"]
+
+        return self._framework_from_files(work_dir, has_pytest)
+
+    async def _detect_test_framework_async(self, path: Optional[str] = None) -> str:
+        """Detect test framework without blocking the event loop."""
+        work_dir = Path(path) if path else self.workspace
+
+        has_pytest = False
+        if self._wants_pytest_probe(work_dir):
+            result = await self.shell.run_async("pytest --version", cwd=str(work_dir))
+            has_pytest = result["success"]
+
+        return self._framework_from_files(work_dir, has_pytest)
+
+    def _test_command(self, framework: str, args: Optional[str]) -> Optional[str]:
+        """Build the test command for a framework, or None if unknown."""
+        if framework == "pytest":
+            return f"pytest {args or ''}".strip()
+        elif framework == "jest":
+            return f"npm test {args or ''}".strip()
+        return None
+
     def pytest(
         self,
         path: Optional[str] = None,
@@ -54,7 +91,7 @@ class TestTool:
     ) -> Dict[str, Any]:
         """Run pytest tests."""
         work_dir = Path(path) if path else self.workspace
-        cmd = f"pytest {args or ''}".strip()
+        cmd = self._test_command("pytest", args)
         return self.shell.run(cmd, cwd=str(work_dir), dry_run=dry_run)
 
     def jest(
@@ -65,7 +102,7 @@ class TestTool:
     ) -> Dict[str, Any]:
         """Run jest tests."""
         work_dir = Path(path) if path else self.workspace
-        cmd = f"npm test {args or ''}".strip()
+        cmd = self._test_command("jest", args)
         return self.shell.run(cmd, cwd=str(work_dir), dry_run=dry_run)
 
     def run(
@@ -85,3 +122,20 @@ class TestTool:
             return self.jest(path=str(work_dir), args=args, dry_run=dry_run)
         else:
             return {"success": False, "error": f"Unknown test framework: {framework}"}
+
+    async def run_async(
+        self,
+        framework: Optional[str] = None,
+        path: Optional[str] = None,
+        args: Optional[str] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """Run tests without blocking the event loop."""
+        work_dir = Path(path) if path else self.workspace
+        framework = framework or await self._detect_test_framework_async(str(work_dir))
+
+        cmd = self._test_command(framework, args)
+        if cmd is None:
+            return {"success": False, "error": f"Unknown test framework: {framework}"}
+
+        return await self.shell.run_async(cmd, cwd=str(work_dir), dry_run=dry_run)
@@ -4,7 +4,17 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 from urllib.parse import urlparse
 
-from ..config import config
+try:
+    from ..config import config
+    from ..runtime.policy import CapabilityPolicy
+except ImportError:
+    # Fallback for direct execution
+    import sys
+
+    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+    from config import config
+    from runtime.policy import CapabilityPolicy
+
 from jj_agent import __version__
 
 
@@ -19,6 +29,7 @@ class WebTool:
             self.network_config.get("allow_web", False) and config.allow_web
         )
         self.allowed_domains = self.network_config.get("allowed_domains", [])
+        self.policy = CapabilityPolicy.from_capabilities(capabilities)
         self.fetch_count = 0
         self.max_fetches = config.max_fetches_per_job
 
@@ -38,18 +49,13 @@ class WebTool:
             domain = domain.split(":")[0]
 
             # Check against allowlist
-            if not self.allowed_domains:
+            if not self.policy.has_allowed_domains:
                 return (
                     False,
                     "No allowed domains configured. Web access requires domain allowlist.",
                 )
 
-            allowed = any(
-                domain == allowed or domain.endswith(f".{allowed}")
-                for allowed in self.allowed_domains
-            )
-
-            if not allowed:
+            if not self.policy.check_domain(domain):
                 return False, f"Domain {domain} not in allowed_domains list"
 
             return True, None